@@ -0,0 +1,103 @@
+"""
+HTTP conditional requests cho SmartLearn API.
+ETag/Last-Modified được tính từ (id, updated_at) của các rows trả về;
+khi If-None-Match hoặc If-Modified-Since khớp thì trả 304 mà không
+serialize body.
+"""
+
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Iterable, Optional
+
+from fastapi import Request, Response, status
+from fastapi.responses import JSONResponse
+
+# Catalog công khai: browser/CDN dùng lại trong 60s, sau đó revalidate bằng ETag
+PUBLIC_CATALOG_CACHE_CONTROL = "public, max-age=60, stale-while-revalidate=300"
+
+# Nội dung cần đăng nhập: chỉ browser của user được giữ, luôn revalidate
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def rows_etag(rows: Iterable[Any], *extra: Any) -> str:
+    """Weak ETag từ (id, updated_at) của rows cùng các giá trị bổ sung."""
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows:
+        updated_at = row.updated_at.isoformat() if row.updated_at else ""
+        digest.update(f"{row.id}:{updated_at};".encode())
+    digest.update(repr(extra).encode())
+    return f'W/"{digest.hexdigest()}"'
+
+
+def rows_last_modified(rows: Iterable[Any]) -> Optional[datetime]:
+    """updated_at mới nhất của rows (None nếu không có)."""
+    timestamps = [_as_utc(row.updated_at) for row in rows if row.updated_at]
+    return max(timestamps) if timestamps else None
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Weak comparison (RFC 7232 §2.3.2)
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def is_not_modified(
+    request: Request, etag: str, last_modified: Optional[datetime] = None
+) -> bool:
+    """
+    Request có thể được trả 304 không.
+
+    If-None-Match được ưu tiên; If-Modified-Since chỉ được xét khi client
+    không gửi If-None-Match.
+    """
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates chỉ chính xác tới giây
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
+
+
+def conditional_json(
+    request: Request,
+    etag: str,
+    build: Callable[[], Any],
+    last_modified: Optional[datetime] = None,
+    cache_control: str = PUBLIC_CATALOG_CACHE_CONTROL,
+) -> Response:
+    """
+    JSONResponse của build() kèm validators, hoặc 304 nếu client còn bản mới nhất.
+
+    build chỉ được gọi khi thật sự cần gửi body.
+    """
+    headers = {"ETag": etag, "Cache-Control": cache_control}
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(_as_utc(last_modified), usegmt=True)
+
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return JSONResponse(content=build(), headers=headers)
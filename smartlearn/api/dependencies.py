@@ -4,30 +4,41 @@ Common dependencies for FastAPI routes.
 Bao gồm các dependency injection functions và utilities.
 """
 
-from fastapi import Depends, HTTPException, status
+import hmac
+from typing import Optional
+
+from fastapi import Depends, Header, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from sqlalchemy.orm import Session
+from smartlearn.core.config import settings
 from smartlearn.core.database import get_db
 from smartlearn.core.security import verify_token
 from smartlearn.models.user import User
+from smartlearn.services.principal_cache import (
+    UserPrincipal, get_principal, resolve_token
+)
 
 # Security scheme
 security = HTTPBearer(auto_error=False)
 
 
-def get_current_user(
+def get_current_principal(
     db: Session = Depends(get_db),
     credentials: HTTPAuthorizationCredentials = Depends(security)
-) -> User:
+) -> UserPrincipal:
     """
-    Lấy current user từ JWT token.
+    Lấy principal gọn (id, is_active) của current user từ JWT token.
+    
+    Token đã verify và principal được cache trong process, nên cache hit
+    không decode JWT lần nữa và không chạy SQL. Dùng cho routes chỉ cần
+    user id; routes cần User object dùng get_current_user.
     
     Args:
         db: Database session
         credentials: HTTP Authorization credentials
     
     Returns:
-        User: Current user object
+        UserPrincipal: Current user principal (id, is_active)
     
     Raises:
         HTTPException: Nếu token không hợp lệ hoặc user không tồn tại
@@ -41,22 +52,22 @@ def get_current_user(
     
     try:
         token = credentials.credentials
-        user_id = verify_token(token)
+        user_id = resolve_token(token, verify_token)
         
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
+        principal = get_principal(db, user_id)
+        if not principal:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User not found"
             )
         
-        if not user.is_active:
+        if not principal.is_active:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="User is inactive"
             )
         
-        return user
+        return principal
         
     except Exception as e:
         raise HTTPException(
@@ -65,6 +76,36 @@ def get_current_user(
         )
 
 
+def get_current_user(
+    db: Session = Depends(get_db),
+    principal: UserPrincipal = Depends(get_current_principal)
+) -> User:
+    """
+    Lấy current user từ JWT token.
+    
+    Token được verify qua get_current_principal (cached); chỉ còn một
+    query User theo primary key.
+    
+    Args:
+        db: Database session
+        principal: Current user principal
+    
+    Returns:
+        User: Current user object
+    
+    Raises:
+        HTTPException: Nếu token không hợp lệ hoặc user không tồn tại
+    """
+    user = db.query(User).filter(User.id == principal.id).first()
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    
+    return user
+
+
 def get_current_active_user(
     current_user: User = Depends(get_current_user)
 ) -> User:
@@ -86,4 +127,26 @@ def get_current_active_user(
             detail="Inactive user"
         )
     
-    return current_user
\ No newline at end of file
+    return current_user
+
+
+def require_service_token(
+    x_service_token: Optional[str] = Header(None)
+) -> None:
+    """
+    Chỉ cho phép các jobs nội bộ (gửi header X-Service-Token).
+    
+    Token được so với settings.SERVICE_API_TOKEN; nếu chưa cấu hình token
+    thì mọi request đều bị từ chối.
+    
+    Raises:
+        HTTPException: Nếu thiếu token hoặc token sai
+    """
+    expected = getattr(settings, "SERVICE_API_TOKEN", None)
+    if not expected or not x_service_token or not hmac.compare_digest(
+        x_service_token.encode(), expected.encode()
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Service credentials required"
+        )
@@ -10,10 +10,13 @@ from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.responses import JSONResponse
+from smartlearn.core.async_database import dispose_async_engine
 from smartlearn.core.config import settings, get_cors_origins
 from smartlearn.core.database import create_tables, get_database_info
 from smartlearn.api.routers import auth
+from smartlearn.api.routers import batch_recommendation
 from smartlearn.api.routers import course
+from smartlearn.api.routers import course_catalog
 from smartlearn.api.routers import interaction
 from smartlearn.api.routers import lesson
 from smartlearn.api.routers import progress
@@ -21,6 +24,9 @@ from smartlearn.api.routers import quiz
 from smartlearn.api.routers import recommendation
 from smartlearn.api.routers import resource
 from smartlearn.api.routers import search
+from smartlearn.api.routers import similar_course
+from smartlearn.services.model_registry import model_registry
+from smartlearn.services.password_hashing import shutdown_hashing_pool, start_hashing_pool
 
 
 @asynccontextmanager
@@ -41,10 +47,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         print(f"Database setup error: {e}")
         raise
 
+    # Load recommendation model trước request đầu tiên, sau đó theo dõi version mới
+    model_registry.preload()
+    model_registry.start_watching()
+
+    # Worker processes cho bcrypt (login/register)
+    start_hashing_pool()
+
     yield
 
     # Shutdown
     print("Shutting down SmartLearn API...")
+    model_registry.stop_watching()
+    shutdown_hashing_pool()
+    await dispose_async_engine()
 
 
 def create_application() -> FastAPI:
@@ -84,11 +100,14 @@ def create_application() -> FastAPI:
 
     # Include API routers
     app.include_router(auth.router, prefix="/api/auth", tags=["Authentication"])
+    app.include_router(course_catalog.router, prefix="/api/courses", tags=["Courses"])
     app.include_router(course.router, prefix="/api/courses", tags=["Courses"])
     app.include_router(lesson.router, prefix="/api/lessons", tags=["Lessons"])
     app.include_router(progress.router, prefix="/api/progress", tags=["Progress"])
     app.include_router(quiz.router, prefix="/api/quizzes", tags=["Quizzes"])
     app.include_router(recommendation.router, prefix="/api/recommendations", tags=["Recommendations"])
+    app.include_router(batch_recommendation.router, prefix="/api/recommendations", tags=["Recommendations"])
+    app.include_router(similar_course.router, prefix="/api/recommendations", tags=["Recommendations"])
     app.include_router(resource.router, prefix="/api/resources", tags=["Resources"])
     app.include_router(search.router, prefix="/api/search", tags=["Search"])
     app.include_router(interaction.router, prefix="/api/interactions", tags=["Interactions"])
@@ -0,0 +1,37 @@
+"""
+Batch recommendation router cho SmartLearn API.
+Dùng cho các job offline (email hằng đêm, pre-warm dashboard); chỉ gọi
+được bằng service token, không bằng JWT của user.
+"""
+
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from sqlalchemy.orm import Session
+
+from smartlearn.api.dependencies import require_service_token
+from smartlearn.core.database import get_db
+from smartlearn.services.recommendation_service import get_batch_recommendations
+
+router = APIRouter()
+
+# Giới hạn số users mỗi request để tránh response quá lớn
+MAX_BATCH_USERS = 10000
+
+
+class BatchRecommendationRequest(BaseModel):
+    """Request body cho batch recommendations."""
+
+    user_ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_USERS)
+    limit: int = Field(10, ge=1, le=50)
+
+
+@router.post("/batch", dependencies=[Depends(require_service_token)])
+def batch_recommendations(
+    request: BatchRecommendationRequest,
+    db: Session = Depends(get_db),
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Lấy personalized course recommendations cho nhiều users một lần."""
+    results = get_batch_recommendations(request.user_ids, db, request.limit)
+    return {str(user_id): courses for user_id, courses in results.items()}
@@ -0,0 +1,98 @@
+"""
+Course catalog browsing router cho SmartLearn API.
+Keyset pagination với opaque cursors: chi phí mỗi trang không phụ thuộc
+độ sâu, thứ tự ổn định giữa các trang. Các routes hỗ trợ
+ETag/If-None-Match (304 Not Modified); danh sách courses không gửi
+Last-Modified vì course bị bỏ khỏi danh sách không làm tăng max(updated_at).
+Danh sách bài học (có video_url) cần đăng nhập và không được cache công khai.
+"""
+
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from smartlearn.api.conditional import (
+    PRIVATE_CACHE_CONTROL, conditional_json, rows_etag, rows_last_modified
+)
+from smartlearn.api.dependencies import get_current_principal
+from smartlearn.core.async_database import get_async_db
+from smartlearn.core.database import get_db
+from smartlearn.services.course_pagination import DEFAULT_SORT, SORT_COLUMNS
+from smartlearn.services.course_service import AsyncCourseService, CourseService
+from smartlearn.services.lesson_service import LessonService
+from smartlearn.services.principal_cache import UserPrincipal
+
+router = APIRouter()
+
+SORT_PATTERN = "^(" + "|".join(SORT_COLUMNS) + ")$"
+
+
+@router.get("/browse")
+async def browse_courses(
+    request: Request,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="next_cursor của trang trước"),
+    sort: str = Query(DEFAULT_SORT, pattern=SORT_PATTERN),
+    category: Optional[str] = None,
+    difficulty_level: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """Duyệt catalog khóa học theo trang (cursor-based)."""
+    page = await AsyncCourseService.get_courses_page(
+        db, limit, cursor, sort, category, difficulty_level
+    )
+    items = page["items"]
+    return conditional_json(
+        request,
+        rows_etag(items, page["next_cursor"], page["total"]),
+        lambda: {
+            "items": [course.to_dict() for course in items],
+            "next_cursor": page["next_cursor"],
+            "total": page["total"],
+        },
+    )
+
+
+@router.get("/popular")
+async def popular_courses(
+    request: Request,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """Các khóa học phổ biến nhất (từ catalog cache)."""
+    courses = await AsyncCourseService.get_popular_courses(db, limit)
+    return conditional_json(
+        request,
+        rows_etag(courses),
+        lambda: [course.to_dict() for course in courses],
+    )
+
+
+@router.get("/{course_id}/lessons")
+def course_lessons(
+    course_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    principal: UserPrincipal = Depends(get_current_principal),
+) -> Response:
+    """Danh sách bài học của khóa học đang mở (từ catalog cache)."""
+    course = CourseService.get_course(db, course_id)
+    # Khóa học ẩn hoặc chưa publish không được lộ (kể cả sự tồn tại)
+    if not course or not (course.is_active and course.is_published):
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Course not found"
+        )
+    
+    lessons = LessonService.get_lessons_by_course(db, course_id)
+    # Thêm/xóa lesson cập nhật Course.lesson_count (và updated_at) nên
+    # Last-Modified tính cả course
+    return conditional_json(
+        request,
+        rows_etag([course, *lessons]),
+        lambda: [lesson.to_dict() for lesson in lessons],
+        rows_last_modified([course, *lessons]),
+        cache_control=PRIVATE_CACHE_CONTROL,
+    )
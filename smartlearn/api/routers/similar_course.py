@@ -0,0 +1,24 @@
+"""
+Similar courses router cho SmartLearn API.
+"Students who liked this also liked" dựa trên item factors của SVD model.
+"""
+
+from typing import Any, Dict, List
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from smartlearn.core.async_database import get_async_db
+from smartlearn.services.recommendation_service import get_similar_courses_async
+
+router = APIRouter()
+
+
+@router.get("/courses/{course_id}/similar")
+async def similar_courses(
+    course_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db),
+) -> List[Dict[str, Any]]:
+    """Lấy các khóa học tương tự với khóa học cho trước."""
+    return await get_similar_courses_async(course_id, db, limit)
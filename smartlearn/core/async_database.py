@@ -0,0 +1,59 @@
+"""
+Async database configuration cho SmartLearn system.
+SQLAlchemy 2.0 AsyncEngine/AsyncSession trên asyncpg, dùng cho các
+read-heavy routes để không chiếm threadpool của FastAPI.
+"""
+
+from typing import AsyncGenerator
+
+from sqlalchemy.ext.asyncio import (
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+
+from .config import settings
+
+# Pool riêng cho async engine (không dùng chung với engine sync)
+ASYNC_POOL_SIZE = 20
+ASYNC_MAX_OVERFLOW = 30
+
+
+def get_async_database_url(url: str) -> str:
+    """Đổi URL postgresql:// (psycopg2) sang driver asyncpg."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    pool_size=ASYNC_POOL_SIZE,
+    max_overflow=ASYNC_MAX_OVERFLOW,
+    pool_pre_ping=True,
+)
+
+# expire_on_commit=False: objects vẫn đọc được sau commit mà không
+# phát sinh lazy load (lazy IO không được phép trong async)
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+)
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependency tạo AsyncSession cho mỗi request.
+
+    Yields:
+        AsyncSession: Async database session
+    """
+    async with AsyncSessionLocal() as session:
+        yield session
+
+
+async def dispose_async_engine() -> None:
+    """Đóng connection pool của async engine (gọi khi shutdown)."""
+    await async_engine.dispose()
@@ -0,0 +1,144 @@
+"""
+Benchmark training cho SmartLearn recommendation system.
+So sánh thời gian fit của NumPy ALS (mf_trainer.train_als) với Surprise
+SVD.fit trên cùng ratings và cùng params như train_model.py, kèm RMSE
+trên holdout để chắc rằng hai model tương đương.
+
+Mặc định dùng 10M ratings ngẫu nhiên phân phối lệch như dữ liệu thật;
+--export dùng interactions.npz của export_training_data.py.
+"""
+
+import argparse
+import os
+import sys
+import time
+import warnings
+warnings.filterwarnings('ignore')
+
+import numpy as np
+from surprise import SVD
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from data_split import build_surprise_sets, random_split
+from mf_trainer import train_als
+from train_model import DEFAULT_SVD_PARAMS, load_training_data
+from smartlearn.services.id_encoder import IdEncoder
+
+DEFAULT_N_USERS = 500000
+DEFAULT_N_ITEMS = 20000
+DEFAULT_N_RATINGS = 10000000
+
+# Mục tiêu: ALS fit nhanh hơn SVD.fit ít nhất chừng này lần
+TARGET_SPEEDUP = 5.0
+
+
+def synthetic_ratings(n_users, n_items, n_ratings, seed=42):
+    """Ratings ngẫu nhiên; users/items theo phân phối Zipf (vài users rất active)."""
+    rng = np.random.default_rng(seed)
+    user_weights = 1.0 / np.arange(1, n_users + 1) ** 0.8
+    item_weights = 1.0 / np.arange(1, n_items + 1) ** 0.8
+    users = rng.choice(n_users, n_ratings, p=user_weights / user_weights.sum())
+    items = rng.choice(n_items, n_ratings, p=item_weights / item_weights.sum())
+    ratings = rng.integers(1, 6, n_ratings).astype(np.float32)
+    return users.astype(np.int64), items.astype(np.int64), ratings
+
+
+def _rmse(predicted, ratings):
+    return float(np.sqrt(np.mean((np.asarray(predicted) - ratings) ** 2)))
+
+
+def run_benchmark(user_ids, item_ids, ratings, params=None, seed=42):
+    """
+    Fit cả hai backends trên phần train của một random split.
+
+    Returns:
+        Dict thời gian fit (giây), speedup và RMSE holdout của từng backend
+    """
+    params = params or DEFAULT_SVD_PARAMS
+    test = random_split(len(ratings), seed=seed)
+
+    print("\n🚀 Fitting Surprise SVD...")
+    trainset, testset = build_surprise_sets(user_ids, item_ids, ratings, test)
+    algo = SVD(**params, random_state=seed)
+    started = time.perf_counter()
+    algo.fit(trainset)
+    svd_seconds = time.perf_counter() - started
+    svd_rmse = _rmse([prediction.est for prediction in algo.test(testset)], ratings[test])
+
+    print("\n🚀 Fitting NumPy ALS...")
+    user_encoder = IdEncoder.from_ids(user_ids)
+    item_encoder = IdEncoder.from_ids(item_ids)
+    user_indices = user_encoder.encode(user_ids)
+    item_indices = item_encoder.encode(item_ids)
+    started = time.perf_counter()
+    engine = train_als(
+        user_indices[~test],
+        item_indices[~test],
+        ratings[~test],
+        len(user_encoder),
+        len(item_encoder),
+        n_factors=params["n_factors"],
+        n_epochs=params["n_epochs"],
+        reg=params["reg_all"],
+        seed=seed,
+        verbose=False,
+    )
+    als_seconds = time.perf_counter() - started
+    als_rmse = _rmse(engine.predict(user_indices[test], item_indices[test]), ratings[test])
+
+    return {
+        "n_ratings": int(len(ratings)),
+        "params": params,
+        "svd_seconds": svd_seconds,
+        "als_seconds": als_seconds,
+        "speedup": svd_seconds / als_seconds,
+        "svd_rmse": svd_rmse,
+        "als_rmse": als_rmse,
+    }
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark NumPy ALS against Surprise SVD.fit")
+    parser.add_argument(
+        "--export", action="store_true",
+        help="Use interactions.npz instead of synthetic ratings",
+    )
+    parser.add_argument("--users", type=int, default=DEFAULT_N_USERS)
+    parser.add_argument("--items", type=int, default=DEFAULT_N_ITEMS)
+    parser.add_argument("--ratings", type=int, default=DEFAULT_N_RATINGS)
+    return parser.parse_args()
+
+
+def main():
+    """Main benchmark function."""
+
+    args = parse_args()
+
+    print("🎯 SmartLearn Training Benchmark (ALS vs SVD)")
+    print("=" * 50)
+
+    if args.export:
+        df = load_training_data()
+        if df is None:
+            return
+        user_ids = df["user_id"].to_numpy(dtype=np.int64)
+        item_ids = df["item_id"].to_numpy(dtype=np.int64)
+        ratings = df["rating"].to_numpy(dtype=np.float32)
+    else:
+        print(f"{args.users} users, {args.items} items, {args.ratings} synthetic ratings")
+        user_ids, item_ids, ratings = synthetic_ratings(args.users, args.items, args.ratings)
+
+    report = run_benchmark(user_ids, item_ids, ratings)
+
+    print(f"\nSurprise SVD.fit: {report['svd_seconds']:.1f}s (holdout RMSE {report['svd_rmse']:.4f})")
+    print(f"NumPy ALS:        {report['als_seconds']:.1f}s (holdout RMSE {report['als_rmse']:.4f})")
+    status = "✅" if report["speedup"] >= TARGET_SPEEDUP else "⚠️"
+    print(f"{status} Speedup: {report['speedup']:.1f}x (target {TARGET_SPEEDUP:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
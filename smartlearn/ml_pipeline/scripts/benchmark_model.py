@@ -0,0 +1,271 @@
+"""
+Benchmark model cho SmartLearn recommendation system.
+Đánh giá top-N quality (precision/recall/NDCG@k, catalog coverage) trên
+holdout và đo latency/throughput scoring của một model version đã lưu.
+Report JSON được ghi ra --output để so sánh giữa các lần retrain.
+
+Holdout chỉ tái tạo được trên đúng dữ liệu lúc train: benchmark từ chối
+khi fingerprint (exported_at, số rows) của data khác với lúc train.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+import warnings
+warnings.filterwarnings('ignore')
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from data_split import DEFAULT_LEAVE_LAST_N, DEFAULT_TEST_SIZE, SPLIT_MODES, split_interactions
+from train_model import data_fingerprint, load_training_data
+from smartlearn.services.model_registry import (
+    load_version, read_current_version, read_training_info
+)
+
+DEFAULT_K = 10
+# Holdout items có rating >= ngưỡng này được tính là relevant
+DEFAULT_RELEVANCE_THRESHOLD = 4.0
+# Số users đo latency từng request
+DEFAULT_LATENCY_SAMPLES = 1000
+
+
+
+def ranking_metrics(
+    engine,
+    mappings,
+    train_df,
+    test_df,
+    k=DEFAULT_K,
+    relevance_threshold=DEFAULT_RELEVANCE_THRESHOLD,
+):
+    """
+    Precision/recall/NDCG@k và catalog coverage trên holdout.
+
+    Top-k của mỗi user loại các items đã có trong train (giống serving loại
+    courses đã đăng ký). Hits được tính vectorized bằng np.isin trên keys
+    user_row * n_items + item_idx.
+
+    Returns:
+        Tuple (metrics dict, thời gian scoring tính bằng giây)
+    """
+    user_encoder = mappings["user_encoder"]
+    item_encoder = mappings["item_encoder"]
+    n_items = engine.n_items
+
+    relevant = test_df[test_df["rating"] >= relevance_threshold]
+    rel_users = user_encoder.encode(relevant["user_id"].to_numpy())
+    rel_items = item_encoder.encode(relevant["item_id"].to_numpy())
+    known = (rel_users >= 0) & (rel_items >= 0)
+    rel_users, rel_items = rel_users[known], rel_items[known]
+
+    eval_users, rel_rows = np.unique(rel_users, return_inverse=True)
+    n_eval = len(eval_users)
+    if n_eval == 0:
+        return {"n_users": 0}, 0.0
+
+    relevant_keys = np.unique(rel_rows.astype(np.int64) * n_items + rel_items)
+    n_relevant = np.bincount(rel_rows, minlength=n_eval)
+
+    # Items đã thấy trong train của các eval users
+    train_users = user_encoder.encode(train_df["user_id"].to_numpy())
+    train_items = item_encoder.encode(train_df["item_id"].to_numpy())
+    positions = np.searchsorted(eval_users, train_users)
+    np.minimum(positions, n_eval - 1, out=positions)
+    seen = (eval_users[positions] == train_users) & (train_items >= 0)
+
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    ideal_dcg = np.cumsum(discounts)
+
+    hits = np.zeros((n_eval, k), dtype=bool)
+    recommended = np.zeros(n_items, dtype=bool)
+
+    started = time.perf_counter()
+    for start, item_indices, scores in engine.top_k_batch(
+        eval_users, k, exclude_rows=positions[seen], exclude_items=train_items[seen]
+    ):
+        stop = start + len(item_indices)
+        valid = np.isfinite(scores)
+        keys = np.arange(start, stop)[:, None] * n_items + item_indices
+        hits[start:stop, :item_indices.shape[1]] = np.isin(keys, relevant_keys) & valid
+        recommended[item_indices[valid]] = True
+    elapsed = time.perf_counter() - started
+
+    n_hits = hits.sum(axis=1)
+    dcg = hits @ discounts
+    idcg = ideal_dcg[np.minimum(n_relevant, k) - 1]
+
+    metrics = {
+        "n_users": int(n_eval),
+        "n_relevant": int(n_relevant.sum()),
+        f"precision@{k}": float(np.mean(n_hits / k)),
+        f"recall@{k}": float(np.mean(n_hits / n_relevant)),
+        f"ndcg@{k}": float(np.mean(dcg / idcg)),
+        f"hit_rate@{k}": float(np.mean(n_hits > 0)),
+        "coverage": float(recommended.sum() / max(n_items, 1)),
+    }
+    return metrics, elapsed
+
+
+def scoring_latency(engine, k=DEFAULT_K, n_samples=DEFAULT_LATENCY_SAMPLES, seed=42):
+    """Latency top-k của từng user (như một request) tính bằng milliseconds."""
+    if engine.n_users == 0:
+        return {}
+
+    rng = np.random.default_rng(seed)
+    users = rng.integers(0, engine.n_users, min(n_samples, engine.n_users))
+
+    # Warm-up: page-in memory-mapped factors
+    engine.top_k(int(users[0]), k)
+
+    timings = np.empty(len(users))
+    for n, user_idx in enumerate(users):
+        started = time.perf_counter()
+        engine.top_k(int(user_idx), k)
+        timings[n] = time.perf_counter() - started
+
+    timings *= 1000.0
+    return {
+        "n_samples": int(len(users)),
+        "mean_ms": float(timings.mean()),
+        "p50_ms": float(np.percentile(timings, 50)),
+        "p95_ms": float(np.percentile(timings, 95)),
+        "p99_ms": float(np.percentile(timings, 99)),
+        "requests_per_sec": float(1000.0 / timings.mean()),
+    }
+
+
+def run_benchmark(
+    version=None,
+    split=None,
+    test_size=DEFAULT_TEST_SIZE,
+    leave_last_n=DEFAULT_LEAVE_LAST_N,
+    k=DEFAULT_K,
+    relevance_threshold=DEFAULT_RELEVANCE_THRESHOLD,
+    latency_samples=DEFAULT_LATENCY_SAMPLES,
+):
+    """
+    Benchmark một model version (mặc định version đang active).
+
+    Split mặc định lấy từ training info của version để holdout trùng với
+    lúc train; users/items không có trong model bị bỏ qua.
+
+    Returns:
+        Report dict, hoặc None nếu không có model/data hoặc data khác lúc train
+    """
+    version = version or read_current_version()
+    if version is None:
+        print("❌ No model version found. Please run train_model.py first.")
+        return None
+
+    bundle = load_version(version)
+    print(f"✅ Loaded model version {version}")
+
+    df = load_training_data()
+    if df is None:
+        return None
+
+    info = read_training_info(version)
+    trained_on = info.get("data")
+    if trained_on is None:
+        print("⚠️ Version has no data fingerprint, holdout may overlap training data")
+    elif trained_on != data_fingerprint(df):
+        print("❌ Training data changed since this version was trained:")
+        print(f"   trained on {trained_on}, found {data_fingerprint(df)}")
+        print("Please benchmark with the export used for training, or retrain.")
+        return None
+
+    if split is None:
+        split_info = info.get("split", {})
+        split = split_info.get("mode", "random")
+        test_size = split_info.get("test_size", test_size)
+        leave_last_n = split_info.get("leave_last_n", leave_last_n)
+
+    test_mask = split_interactions(df, split, test_size=test_size, leave_last_n=leave_last_n)
+    train_df, test_df = df[~test_mask], df[test_mask]
+
+    print(f"\n📊 Ranking metrics @{k} ({split} split, {len(test_df)} holdout rows)...")
+    metrics, elapsed = ranking_metrics(
+        bundle.engine, bundle.mappings, train_df, test_df, k, relevance_threshold
+    )
+
+    print("\n⏱️ Measuring per-user scoring latency...")
+    latency = scoring_latency(bundle.engine, k, latency_samples)
+
+    report = {
+        "version": version,
+        "benchmarked_at": pd.Timestamp.now().isoformat(),
+        "k": k,
+        "split": {"mode": split, "test_size": test_size, "leave_last_n": leave_last_n},
+        "relevance_threshold": relevance_threshold,
+        "n_users": bundle.engine.n_users,
+        "n_items": bundle.engine.n_items,
+        "n_factors": int(bundle.engine.item_factors.shape[1]),
+        "metrics": metrics,
+        "batch_scoring": {
+            "seconds": elapsed,
+            "users_per_sec": metrics.get("n_users", 0) / elapsed if elapsed else None,
+        },
+        "latency": latency,
+    }
+    return report
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Benchmark a SmartLearn model version")
+    parser.add_argument("--version", default=None, help="Model version (default: current)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Cutoff for top-N metrics")
+    parser.add_argument(
+        "--split", choices=SPLIT_MODES, default=None,
+        help="Holdout split (default: the split recorded at training time)",
+    )
+    parser.add_argument("--test-size", type=float, default=DEFAULT_TEST_SIZE)
+    parser.add_argument("--leave-last", type=int, default=DEFAULT_LEAVE_LAST_N)
+    parser.add_argument(
+        "--relevance-threshold", type=float, default=DEFAULT_RELEVANCE_THRESHOLD,
+        help="Minimum holdout rating counted as relevant",
+    )
+    parser.add_argument(
+        "--latency-samples", type=int, default=DEFAULT_LATENCY_SAMPLES,
+        help="Users timed individually for latency percentiles",
+    )
+    parser.add_argument(
+        "--output", default=None,
+        help="Write the full JSON report to this path",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main benchmark function."""
+
+    args = parse_args()
+
+    print("🎯 SmartLearn Model Benchmark")
+    print("=" * 50)
+
+    report = run_benchmark(
+        args.version, args.split, args.test_size, args.leave_last,
+        args.k, args.relevance_threshold, args.latency_samples
+    )
+    if report is None:
+        return
+
+    print(json.dumps({"metrics": report["metrics"], "latency": report["latency"]}, indent=2))
+
+    # Version dir đã publish là read-only (workers memory-map nó)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\n💾 Report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+"""
+Train/test split cho SmartLearn recommendation model.
+Split vectorized trên NumPy arrays (random hoặc leave-last-N theo thời gian
+cho từng user) và build Surprise trainset/testset đúng một lần.
+"""
+
+import numpy as np
+import pandas as pd
+from surprise import Dataset, Reader
+
+DEFAULT_TEST_SIZE = 0.2
+DEFAULT_LEAVE_LAST_N = 1
+
+SPLIT_MODES = ("random", "temporal")
+
+
+def random_split(n_rows, test_size=DEFAULT_TEST_SIZE, seed=42):
+    """Boolean test mask chọn ngẫu nhiên test_size phần dữ liệu."""
+    rng = np.random.default_rng(seed)
+    test = np.zeros(n_rows, dtype=bool)
+    test[rng.permutation(n_rows)[:int(round(n_rows * test_size))]] = True
+    return test
+
+
+def leave_last_n_split(user_ids, timestamps, n=DEFAULT_LEAVE_LAST_N):
+    """
+    Boolean test mask giữ lại N interactions mới nhất của mỗi user.
+
+    Giống cách serving: model chỉ thấy quá khứ và phải đoán những gì user
+    làm tiếp theo. User có <= N interactions được giữ hoàn toàn trong
+    train (không có gì để học cho user đó nếu đưa hết vào test).
+    """
+    user_ids = np.asarray(user_ids)
+    timestamps = np.asarray(timestamps)
+    n_rows = len(user_ids)
+    if n_rows == 0:
+        return np.zeros(0, dtype=bool)
+
+    # Sort theo (user, timestamp); vị trí tính từ cuối nhóm của user
+    order = np.lexsort((timestamps, user_ids))
+    sorted_users = user_ids[order]
+
+    group_starts = np.flatnonzero(np.r_[True, sorted_users[1:] != sorted_users[:-1]])
+    group_sizes = np.diff(np.r_[group_starts, n_rows])
+    group_ends = np.repeat(group_starts + group_sizes, group_sizes)
+    from_end = group_ends - np.arange(n_rows)
+
+    test = np.zeros(n_rows, dtype=bool)
+    test[order] = (from_end <= n) & (np.repeat(group_sizes, group_sizes) > n)
+    return test
+
+
+def split_interactions(
+    df,
+    mode="random",
+    test_size=DEFAULT_TEST_SIZE,
+    leave_last_n=DEFAULT_LEAVE_LAST_N,
+    seed=42,
+):
+    """
+    Tạo test mask cho interactions DataFrame.
+
+    Args:
+        df: Interactions (user_id, item_id, rating[, timestamp])
+        mode: "random" hoặc "temporal" (leave-last-N per user)
+        test_size: Tỷ lệ test khi mode="random"
+        leave_last_n: Số interactions mới nhất mỗi user đưa vào test
+        seed: Random seed
+
+    Returns:
+        Boolean array (len(df),), True = test
+    """
+    if mode not in SPLIT_MODES:
+        raise ValueError(f"Unknown split mode: {mode}")
+
+    if mode == "temporal":
+        if "timestamp" in df.columns:
+            return leave_last_n_split(
+                df["user_id"].to_numpy(), df["timestamp"].to_numpy(), leave_last_n
+            )
+        print("⚠️ No timestamp column, falling back to random split")
+
+    return random_split(len(df), test_size, seed)
+
+
+def build_surprise_sets(user_ids, item_ids, ratings, test_mask, rating_scale=(1.0, 5.0)):
+    """
+    Build Surprise trainset (từ train rows) và testset (list tuples).
+
+    Returns:
+        Tuple (trainset, testset)
+    """
+    user_ids = np.asarray(user_ids)
+    item_ids = np.asarray(item_ids)
+    ratings = np.asarray(ratings, dtype=np.float64)
+    train = ~np.asarray(test_mask, dtype=bool)
+
+    train_df = pd.DataFrame({
+        "user_id": user_ids[train],
+        "item_id": item_ids[train],
+        "rating": ratings[train],
+    })
+    reader = Reader(rating_scale=rating_scale)
+    trainset = Dataset.load_from_df(train_df, reader).build_full_trainset()
+
+    testset = list(zip(
+        user_ids[~train].tolist(),
+        item_ids[~train].tolist(),
+        ratings[~train].tolist(),
+    ))
+    return trainset, testset
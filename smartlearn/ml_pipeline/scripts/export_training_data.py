@@ -0,0 +1,255 @@
+"""
+Export training data cho SmartLearn recommendation system.
+Stream Interaction và UserCourseProgress từ database theo chunk
+(server-side cursor) vào file .npz nén với các cột typed, để memory
+không tăng theo kích thước lịch sử.
+
+Counts và streams chạy trong cùng một transaction REPEATABLE READ nên
+cùng nhìn một snapshot: rows ghi trong lúc export không làm lệch capacity.
+exported_at là now() của chính transaction đó (đồng hồ database).
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from datetime import timedelta, timezone
+
+import numpy as np
+from sqlalchemy import func
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from smartlearn.core.database import SessionLocal
+from smartlearn.models.interaction import Interaction
+from smartlearn.models.user_course_progress import UserCourseProgress
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), "..", "data")
+OUTPUT_FILE = "interactions.npz"
+
+# Số rows mỗi lần fetch từ server-side cursor
+DEFAULT_CHUNK_SIZE = 50000
+
+# IDs ratings trong khoảng này trước exported_at được ghi lại (manifest
+# "applied_ids") để incremental_update.py không áp dụng chúng lần nữa
+APPLIED_WINDOW = timedelta(minutes=10)
+
+# Implicit ratings cho enrollments không có rating explicit
+IMPLICIT_COMPLETED_RATING = 5.0
+IMPLICIT_ENROLLED_RATING = 4.0
+
+COLUMNS = {
+    "user_id": np.int32,
+    "item_id": np.int32,
+    "rating": np.float32,
+    "timestamp": np.int64,
+}
+
+
+def _as_utc(value):
+    """Datetime naive từ database được coi là UTC."""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+
+
+def _timestamp(value):
+    """Datetime -> epoch seconds (0 nếu không có)."""
+    return int(_as_utc(value).timestamp()) if value is not None else 0
+
+
+def _implicit_query(db, exported_at):
+    """Enrollments làm implicit feedback (ghi trước để rating explicit thắng khi dedupe)."""
+    return (
+        db.query(
+            UserCourseProgress.user_id,
+            UserCourseProgress.course_id,
+            UserCourseProgress.created_at,
+            UserCourseProgress.completed_at,
+        )
+        .filter(UserCourseProgress.created_at <= exported_at)
+    )
+
+
+def _implicit_row(user_id, course_id, enrolled_at, completed_at, exported_at):
+    """
+    (user, course, rating, timestamp) của một enrollment.
+
+    Timestamp là lúc hoàn thành, hoặc lúc đăng ký nếu chưa hoàn thành
+    trước exported_at (temporal split xếp đúng thứ tự theo thời gian).
+    """
+    if completed_at is not None and _as_utc(completed_at) <= exported_at:
+        return user_id, course_id, IMPLICIT_COMPLETED_RATING, _timestamp(completed_at)
+    return user_id, course_id, IMPLICIT_ENROLLED_RATING, _timestamp(enrolled_at)
+
+
+def _explicit_query(db, exported_at):
+    """Ratings khóa học từ Interaction."""
+    return (
+        db.query(
+            Interaction.user_id,
+            Interaction.item_id,
+            Interaction.rating,
+            Interaction.created_at,
+        )
+        .filter(
+            Interaction.item_type == "course",
+            Interaction.rating != None,
+            Interaction.created_at <= exported_at,
+        )
+    )
+
+
+def _applied_ids(db, exported_at):
+    """IDs các ratings đã export trong APPLIED_WINDOW cuối."""
+    rows = (
+        _explicit_query(db, exported_at)
+        .with_entities(Interaction.id)
+        .filter(Interaction.created_at > exported_at - APPLIED_WINDOW)
+        .all()
+    )
+    return np.array(sorted(row.id for row in rows), dtype=np.int64)
+
+
+def _stream(query, chunk_size):
+    """Iterate rows bằng server-side cursor, mỗi lần chunk_size rows."""
+    return query.execution_options(stream_results=True).yield_per(chunk_size)
+
+
+def _fill(columns, rows, start, capacity, chunk_size):
+    """
+    Ghi rows (user_id, item_id, rating, timestamp) vào columns từ vị trí start.
+
+    Returns:
+        Tuple (số rows đã ghi, True nếu còn rows vượt capacity)
+    """
+    n = start
+    stop_at = start + capacity
+    buffer = []
+
+    def flush():
+        nonlocal n
+        if not buffer:
+            return
+        block = np.array(buffer, dtype=np.float64)
+        stop = n + len(block)
+        for position, name in enumerate(COLUMNS):
+            columns[name][n:stop] = block[:, position]
+        n = stop
+        buffer.clear()
+
+    truncated = False
+    for row in rows:
+        if n + len(buffer) >= stop_at:
+            truncated = True
+            break
+        buffer.append(row)
+        if len(buffer) >= chunk_size:
+            flush()
+    flush()
+
+    return n - start, truncated
+
+
+def export_training_data(output_path=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Export dữ liệu training ra .npz.
+
+    Các cột được ghi vào memory-mapped .npy tạm theo từng chunk rồi nén
+    vào .npz (numpy ghi từng buffer), nên peak memory chỉ phụ thuộc chunk_size.
+
+    Returns:
+        Số rows đã export
+    """
+    if output_path is None:
+        output_path = os.path.join(DATA_DIR, OUTPUT_FILE)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)
+
+    db = SessionLocal()
+    tmp_dir = tempfile.mkdtemp(dir=os.path.dirname(output_path))
+
+    try:
+        # Một snapshot cho cả counts và streams; mốc export lấy trong
+        # cùng transaction nên không có khoảng hở giữa mốc và snapshot
+        db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        exported_at = _as_utc(db.query(func.now()).scalar())
+
+        implicit = _implicit_query(db, exported_at)
+        explicit = _explicit_query(db, exported_at)
+        implicit_capacity = implicit.count()
+        explicit_capacity = explicit.count()
+        capacity = implicit_capacity + explicit_capacity
+        if capacity == 0:
+            print("⚠️ No interactions to export")
+            return 0
+
+        print(f"Exporting up to {capacity} rows...")
+
+        columns = {
+            name: np.lib.format.open_memmap(
+                os.path.join(tmp_dir, f"{name}.npy"), mode="w+", dtype=dtype, shape=(capacity,)
+            )
+            for name, dtype in COLUMNS.items()
+        }
+
+        implicit_rows = (
+            _implicit_row(*row, exported_at) for row in _stream(implicit, chunk_size)
+        )
+        n_implicit, implicit_truncated = _fill(
+            columns, implicit_rows, 0, implicit_capacity, chunk_size
+        )
+
+        explicit_rows = (
+            (user_id, item_id, rating, _timestamp(created_at))
+            for user_id, item_id, rating, created_at in _stream(explicit, chunk_size)
+        )
+        n_explicit, explicit_truncated = _fill(
+            columns, explicit_rows, n_implicit, explicit_capacity, chunk_size
+        )
+        n = n_implicit + n_explicit
+
+        for source, truncated in (("enrollments", implicit_truncated), ("ratings", explicit_truncated)):
+            if truncated:
+                print(f"⚠️ More {source} than counted, extra rows were not exported")
+
+        tmp_output = os.path.join(tmp_dir, OUTPUT_FILE)
+        np.savez_compressed(
+            tmp_output,
+            exported_at=np.int64(_timestamp(exported_at)),
+            applied_ids=_applied_ids(db, exported_at),
+            **{name: column[:n] for name, column in columns.items()},
+        )
+        os.replace(tmp_output, output_path)
+
+        print(f"✅ Exported {n} rows to {output_path}")
+        return n
+
+    finally:
+        db.close()
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Export SmartLearn training data")
+    parser.add_argument("--output", default=None, help="Output .npz path")
+    parser.add_argument(
+        "--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Rows fetched per cursor batch"
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Main export function."""
+
+    args = parse_args()
+
+    print("🎯 SmartLearn Training Data Export")
+    print("=" * 50)
+
+    export_training_data(args.output, args.chunk_size)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Incremental update cho SmartLearn recommendation model.
+Áp dụng các ratings mới (Interaction) kể từ checkpoint của version hiện tại
+bằng vài bước SGD trên riêng các users/items bị ảnh hưởng, rồi publish
+version mới - không cần retrain toàn bộ.
+
+Ratings được đọc lại trong một cửa sổ chồng lấn trước checkpoint (bắt
+các rows commit trễ với created_at cũ hơn); IDs đã áp dụng trong cửa sổ
+được lưu trong manifest ("applied_ids", lần đầu do export_training_data.py
+ghi) để không áp dụng hai lần.
+"""
+
+import argparse
+import os
+import sys
+import warnings
+warnings.filterwarnings('ignore')
+
+import numpy as np
+import pandas as pd
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from export_training_data import APPLIED_WINDOW
+from smartlearn.core.database import SessionLocal
+from smartlearn.models.interaction import Interaction
+from smartlearn.services.id_encoder import load_mappings, save_mappings
+from smartlearn.services.item_similarity import build_similarity_index
+from smartlearn.services.model_registry import (
+    create_version_dir, prune_versions, publish_version,
+    read_current_version, read_training_info, version_dir, write_manifest
+)
+from smartlearn.services.recommendation_engine import ScoringEngine
+
+# Hyperparameters mặc định giống SVD lúc train (Surprise defaults)
+DEFAULT_N_EPOCHS = 5
+DEFAULT_LR = 0.005
+DEFAULT_REG = 0.02
+INIT_STD_DEV = 0.1
+
+# Đọc lại ratings trong khoảng này trước checkpoint (transaction commit trễ)
+CHECKPOINT_OVERLAP = pd.Timedelta(APPLIED_WINDOW)
+
+
+def load_current_version():
+    """Load engine (copy trong memory để sửa), mappings và training info."""
+    version = read_current_version()
+    if version is None:
+        return None
+
+    path = version_dir(version)
+
+    if not ScoringEngine.exists(path):
+        print("❌ Current version has no exported factors. Please run train_model.py first.")
+        return None
+
+    engine = ScoringEngine.load(path, mmap_mode=None)
+
+    mappings = load_mappings(path, mmap_mode=None)
+
+    try:
+        info = read_training_info(version)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return None
+
+    has_top_k = os.path.exists(os.path.join(path, "topk_items.npy"))
+
+    return version, engine, mappings, info, has_top_k
+
+
+def fetch_new_ratings(since):
+    """Lấy ratings khóa học được tạo sau mốc since."""
+    db = SessionLocal()
+    try:
+        rows = (
+            db.query(
+                Interaction.id, Interaction.user_id, Interaction.item_id,
+                Interaction.rating, Interaction.created_at
+            )
+            .filter(
+                Interaction.item_type == "course",
+                Interaction.rating != None,
+                Interaction.created_at > since,
+            )
+            .order_by(Interaction.created_at)
+            .all()
+        )
+    finally:
+        db.close()
+
+    df = pd.DataFrame(rows, columns=["id", "user_id", "item_id", "rating", "created_at"])
+    df["created_at"] = pd.to_datetime(df["created_at"], utc=True)
+    return df
+
+
+def select_unapplied(window, checkpoint, applied_ids):
+    """
+    Bỏ các ratings đã áp dụng khỏi cửa sổ.
+
+    applied_ids là None với manifest cũ (export không ghi IDs): coi mọi
+    rating tới checkpoint (exported_at) là đã nằm trong training data.
+    """
+    if applied_ids is None:
+        return window[window["created_at"] > checkpoint]
+    return window[~window["id"].isin(applied_ids)]
+
+
+def next_checkpoint(window, unapplied, checkpoint):
+    """
+    Checkpoint và applied_ids của version mới.
+
+    Sau lần chạy này mọi rating trong cửa sổ đều đã áp dụng (từ trước hoặc
+    bây giờ), nên applied_ids là các IDs của cửa sổ còn nằm trong khoảng
+    chồng lấn của checkpoint mới.
+    """
+    new_checkpoint = max(checkpoint, pd.Timestamp(unapplied["created_at"].max()))
+    recent = window[window["created_at"] > new_checkpoint - CHECKPOINT_OVERLAP]
+    return new_checkpoint, sorted(int(i) for i in recent["id"])
+
+
+def _grow(factors, bias, n_new, rng):
+    """Mở rộng factor matrix/bias cho ids mới (khởi tạo như SVD)."""
+    if n_new == 0:
+        return factors, bias
+    new_factors = rng.normal(0, INIT_STD_DEV, (n_new, factors.shape[1])).astype(factors.dtype)
+    return (
+        np.vstack([factors, new_factors]),
+        np.concatenate([bias, np.zeros(n_new, dtype=bias.dtype)]),
+    )
+
+
+def sgd_update(engine, user_indices, item_indices, ratings, n_epochs, lr, reg, rng):
+    """
+    SGD như SVD.fit của Surprise, nhưng chỉ trên các ratings mới;
+    chỉ factors/biases của users và items xuất hiện trong đó thay đổi.
+    """
+    pu, qi = engine.user_factors, engine.item_factors
+    bu, bi = engine.user_bias, engine.item_bias
+    mean = engine.global_mean
+
+    for _ in range(n_epochs):
+        for n in rng.permutation(len(ratings)):
+            u, i = user_indices[n], item_indices[n]
+            err = ratings[n] - (mean + bu[u] + bi[i] + qi[i] @ pu[u])
+
+            bu[u] += lr * (err - reg * bu[u])
+            bi[i] += lr * (err - reg * bi[i])
+
+            pu_u = pu[u].copy()
+            pu[u] += lr * (err * qi[i] - reg * pu[u])
+            qi[i] += lr * (err * pu_u - reg * qi[i])
+
+
+def incremental_update(n_epochs=DEFAULT_N_EPOCHS, lr=DEFAULT_LR, reg=DEFAULT_REG, seed=42):
+    """Chạy incremental update và publish version mới. Returns version hoặc None."""
+    loaded = load_current_version()
+    if loaded is None:
+        print("❌ No model version found. Please run train_model.py first.")
+        return None
+
+    base_version, engine, mappings, info, has_top_k = loaded
+    checkpoint = pd.Timestamp(info.get("checkpoint") or info["trained_at"])
+    if checkpoint.tzinfo is None:
+        checkpoint = checkpoint.tz_localize("UTC")
+
+    window = fetch_new_ratings((checkpoint - CHECKPOINT_OVERLAP).to_pydatetime())
+    df = select_unapplied(window, checkpoint, info.get("applied_ids"))
+    if df.empty:
+        print(f"✅ No new ratings since {checkpoint.isoformat()}, nothing to update")
+        return None
+
+    print(f"✅ Loaded {len(df)} new ratings since {checkpoint.isoformat()}")
+
+    rng = np.random.default_rng(seed)
+
+    # New users/items get appended indices and fresh factors
+    mappings["user_encoder"], new_users = mappings["user_encoder"].extend(df["user_id"].to_numpy())
+    mappings["item_encoder"], new_items = mappings["item_encoder"].extend(df["item_id"].to_numpy())
+    engine.user_factors, engine.user_bias = _grow(engine.user_factors, engine.user_bias, new_users, rng)
+    engine.item_factors, engine.item_bias = _grow(engine.item_factors, engine.item_bias, new_items, rng)
+    print(f"New users: {new_users}, new items: {new_items}")
+
+    user_indices = mappings["user_encoder"].encode(df["user_id"].to_numpy())
+    item_indices = mappings["item_encoder"].encode(df["item_id"].to_numpy())
+    ratings = df["rating"].to_numpy(dtype=np.float64)
+
+    print("\n🚀 Running incremental SGD...")
+    sgd_update(engine, user_indices, item_indices, ratings, n_epochs, lr, reg, rng)
+
+    # Write new version (arrays + manifest)
+    version, models_dir = create_version_dir()
+    engine.save(models_dir)
+    build_similarity_index(engine.item_factors).save(models_dir)
+
+    save_mappings(mappings, models_dir)
+
+    # Factors đổi nên top-K store cũ không còn đúng: tính lại cho version mới
+    if has_top_k:
+        from materialize_recommendations import DEFAULT_TOP_K, run_materialization
+        from train_model import load_training_data
+        seen = load_training_data()
+        new_pairs = df[["user_id", "item_id"]]
+        seen = new_pairs if seen is None else pd.concat([seen[["user_id", "item_id"]], new_pairs])
+        run_materialization(engine, mappings, models_dir, seen, info.get("materialized_top_k", DEFAULT_TOP_K))
+
+    new_checkpoint, applied_ids = next_checkpoint(window, df, checkpoint)
+    new_info = dict(info)
+    new_info.update({
+        "version": version,
+        "base_version": base_version,
+        "n_users": len(mappings["user_encoder"]),
+        "n_items": len(mappings["item_encoder"]),
+        "incremental_ratings": len(df),
+        "trained_at": pd.Timestamp.now().isoformat(),
+        "checkpoint": new_checkpoint.isoformat(),
+        "applied_ids": applied_ids,
+    })
+    write_manifest(models_dir, new_info)
+
+    publish_version(version)
+    prune_versions()
+    print(f"\n🚀 Published model version: {version} (based on {base_version})")
+
+    return version
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Incrementally update SmartLearn SVD model")
+    parser.add_argument("--epochs", type=int, default=DEFAULT_N_EPOCHS, help="SGD epochs over new ratings")
+    parser.add_argument("--lr", type=float, default=DEFAULT_LR, help="SGD learning rate")
+    parser.add_argument("--reg", type=float, default=DEFAULT_REG, help="Regularization term")
+    return parser.parse_args()
+
+
+def main():
+    """Main incremental update function."""
+
+    args = parse_args()
+
+    print("🎯 SmartLearn Incremental Model Update")
+    print("=" * 50)
+
+    incremental_update(args.epochs, args.lr, args.reg)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Materialize top-K recommendations cho SmartLearn recommendation system.
+Tính trước top-K courses của mọi user sau khi train và lưu ra .npy
+để service đọc trực tiếp (memory-mapped) thay vì inference mỗi request.
+
+Chạy riêng script này tạo một version mới (artifacts của version đang
+active + top-K store) rồi publish; không ghi vào version đã publish vì
+các API workers đang memory-map các files trong đó.
+"""
+
+import argparse
+import os
+import sys
+import warnings
+warnings.filterwarnings('ignore')
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from smartlearn.services.model_registry import (
+    LEGACY_VERSION, clone_version, load_version, prune_versions, publish_version,
+    read_current_version, write_manifest
+)
+
+# Số courses lưu cho mỗi user; lớn hơn limit của API để còn dư
+# sau khi service lọc các course đã đăng ký hoặc đã ẩn
+DEFAULT_TOP_K = 50
+
+TOPK_ITEMS_FILE = "topk_items.npy"
+TOPK_SCORES_FILE = "topk_scores.npy"
+
+
+def materialize_top_k(engine, mappings, df=None, top_k=DEFAULT_TOP_K):
+    """
+    Tính top-K course IDs và scores cho tất cả users.
+
+    Args:
+        engine: ScoringEngine đã build từ model
+        mappings: ID mappings dùng khi train
+        df: Interactions DataFrame; nếu có thì loại các items user đã tương tác
+        top_k: Số courses mỗi user
+
+    Returns:
+        Tuple (course IDs (n_users, top_k) int64 pad -1, scores float32 pad NaN)
+    """
+    n_users = engine.n_users
+    top_k = min(top_k, engine.n_items)
+
+    item_ids = np.asarray(mappings["item_encoder"].ids)
+
+    exclude_rows = exclude_items = None
+    if df is not None:
+        exclude_rows = mappings["user_encoder"].encode(df["user_id"].to_numpy())
+        exclude_items = mappings["item_encoder"].encode(df["item_id"].to_numpy())
+        # Bỏ các ids model chưa biết (dữ liệu export sau khi train)
+        known = (exclude_rows >= 0) & (exclude_items >= 0)
+        exclude_rows, exclude_items = exclude_rows[known], exclude_items[known]
+
+    topk_items = np.full((n_users, top_k), -1, dtype=np.int64)
+    topk_scores = np.full((n_users, top_k), np.nan, dtype=np.float32)
+
+    blocks = engine.top_k_batch(
+        np.arange(n_users), top_k, exclude_rows=exclude_rows, exclude_items=exclude_items
+    )
+    for start, item_indices, scores in blocks:
+        stop = start + item_indices.shape[0]
+        valid = np.isfinite(scores)
+        topk_items[start:stop] = np.where(valid, item_ids[item_indices], -1)
+        topk_scores[start:stop] = np.where(valid, scores, np.nan)
+
+    return topk_items, topk_scores
+
+
+def save_top_k(topk_items, topk_scores, models_dir):
+    """Lưu top-K store vào models directory."""
+    items_path = os.path.join(models_dir, TOPK_ITEMS_FILE)
+    scores_path = os.path.join(models_dir, TOPK_SCORES_FILE)
+
+    np.save(items_path, topk_items)
+    np.save(scores_path, topk_scores)
+
+    print(f"💾 Top-K items saved to: {items_path}")
+    print(f"💾 Top-K scores saved to: {scores_path}")
+
+
+def run_materialization(engine, mappings, models_dir, df=None, top_k=DEFAULT_TOP_K):
+    """Tính top-K từ engine của model đã train và ghi vào thư mục version."""
+    print(f"\n📦 Materializing top-{top_k} recommendations...")
+    topk_items, topk_scores = materialize_top_k(engine, mappings, df, top_k)
+    save_top_k(topk_items, topk_scores, models_dir)
+    print(f"✅ Materialized recommendations for {engine.n_users} users")
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Materialize top-K recommendations")
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help="Number of courses stored per user",
+    )
+    return parser.parse_args()
+
+
+def main():
+    """Materialize cho model version đang active vào một version mới."""
+
+    args = parse_args()
+
+    print("🎯 SmartLearn Recommendation Materialization")
+    print("=" * 50)
+
+    base_version = read_current_version()
+    if base_version is None:
+        print("❌ Model files not found. Please run train_model.py first.")
+        return
+    if base_version == LEGACY_VERSION:
+        print("❌ Legacy model layout. Please run train_model.py first.")
+        return
+
+    bundle = load_version(base_version)
+
+    # Interactions để loại các courses user đã đăng ký/đánh giá
+    from train_model import load_training_data
+    df = load_training_data()
+    if df is None:
+        print("⚠️ No interactions data, already-seen courses will not be excluded")
+
+    version, models_dir = clone_version(
+        base_version, exclude=(TOPK_ITEMS_FILE, TOPK_SCORES_FILE)
+    )
+    run_materialization(bundle.engine, bundle.mappings, models_dir, df, args.top_k)
+
+    info = dict(bundle.info)
+    info.update({
+        "version": version,
+        "base_version": base_version,
+        "materialized_top_k": args.top_k,
+    })
+    write_manifest(models_dir, info)
+
+    # API workers reload version mới (có top-K store)
+    publish_version(version)
+    prune_versions()
+    print(f"\n🚀 Published model version: {version} (based on {base_version})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+"""
+NumPy trainer cho SmartLearn recommendation model.
+Train cùng biased MF model như Surprise SVD bằng ALS (alternating least
+squares): mỗi nửa epoch giải ridge regression cho mọi user (hoặc item) theo
+batch, dựa trên CSR arrays của (user_idx, item_idx, rating), và xuất thẳng
+ScoringEngine mà service dùng.
+"""
+
+import os
+import sys
+import time
+
+import numpy as np
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from smartlearn.services.recommendation_engine import ScoringEngine
+
+DEFAULT_N_FACTORS = 50
+DEFAULT_N_EPOCHS = 15
+DEFAULT_REG = 0.05
+INIT_STD_DEV = 0.1
+
+# Số rows mỗi batch khi giải normal equations: gram tạm có kích thước
+# block_rows x (n_factors + 1)^2 floats (~10MB với 50 factors)
+DEFAULT_BLOCK_ROWS = 1024
+
+# Số ratings tối đa gather vào features tạm của một batch
+DEFAULT_BLOCK_RATINGS = 65536
+
+
+def build_csr(row_indices, col_indices, values, n_rows):
+    """
+    Sắp ratings theo row thành CSR arrays.
+
+    Returns:
+        Tuple (indptr (n_rows + 1,), col indices, values) theo thứ tự row
+    """
+    order = np.argsort(row_indices, kind="stable")
+    counts = np.bincount(row_indices, minlength=n_rows)
+    indptr = np.zeros(n_rows + 1, dtype=np.int64)
+    np.cumsum(counts, out=indptr[1:])
+    return indptr, col_indices[order], values[order]
+
+
+def _solve_rows(indptr, indices, targets, features, reg, block_rows, block_ratings):
+    """
+    Ridge least-squares cho từng row của CSR matrix.
+
+    Với row u: minimize sum_i (t_ui - x_u · f_i)^2 + reg * n_u * ||x_u||^2
+    (regularization theo số ratings như ALS-WR, tương đương reg_all mỗi
+    bước SGD). Rows được nhóm theo số ratings: mỗi batch rows cùng count c
+    gather features thành (B, c, dim), gram F^T F được tính bằng batched
+    np.matmul (BLAS) rồi giải một lần bằng batched np.linalg.solve.
+    """
+    n_rows = len(indptr) - 1
+    dim = features.shape[1]
+    solution = np.zeros((n_rows, dim), dtype=features.dtype)
+    eye = np.eye(dim, dtype=features.dtype)
+
+    counts = np.diff(indptr)
+    order = np.argsort(counts, kind="stable")
+    sorted_counts = counts[order]
+    bounds = np.flatnonzero(np.diff(sorted_counts)) + 1
+
+    for group_start, group_stop in zip(
+        np.concatenate([[0], bounds]), np.concatenate([bounds, [n_rows]])
+    ):
+        count = int(sorted_counts[group_start])
+        # Rows không có rating giữ nghiệm 0
+        if count == 0:
+            continue
+
+        batch = max(1, min(block_rows, block_ratings // count))
+        for start in range(group_start, group_stop, batch):
+            rows = order[start:min(start + batch, group_stop)]
+            positions = indptr[rows][:, None] + np.arange(count)
+
+            block_features = features[indices[positions]]
+            transposed = block_features.transpose(0, 2, 1)
+            gram = transposed @ block_features
+            gram += (reg * count) * eye
+            rhs = transposed @ targets[positions][..., None]
+
+            solution[rows] = np.linalg.solve(gram, rhs)[..., 0]
+
+    return solution
+
+
+def train_als(
+    user_indices,
+    item_indices,
+    ratings,
+    n_users,
+    n_items,
+    n_factors=DEFAULT_N_FACTORS,
+    n_epochs=DEFAULT_N_EPOCHS,
+    reg=DEFAULT_REG,
+    rating_scale=(1.0, 5.0),
+    block_rows=DEFAULT_BLOCK_ROWS,
+    block_ratings=DEFAULT_BLOCK_RATINGS,
+    seed=42,
+    verbose=True,
+):
+    """
+    Train biased MF bằng ALS.
+
+    est(u, i) = global_mean + bu[u] + bi[i] + pu[u] · qi[i]; bias được giải
+    cùng factors bằng cách thêm một cột hằng 1 vào features.
+
+    Args:
+        user_indices: User index (encoder index) của từng rating
+        item_indices: Item index của từng rating
+        ratings: Ratings
+        n_users: Số users trong user_encoder (users không có rating nhận 0)
+        n_items: Số items trong item_encoder
+        n_factors: Số latent factors
+        n_epochs: Số vòng ALS (mỗi vòng giải users rồi items)
+        reg: Regularization mỗi rating
+        rating_scale: (min, max) rating
+        block_rows: Số rows tối đa mỗi batch solve
+        block_ratings: Số ratings tối đa gather mỗi batch
+        seed: Random seed khởi tạo factors
+
+    Returns:
+        ScoringEngine với factors/biases float32 theo encoder index
+    """
+    user_indices = np.asarray(user_indices, dtype=np.int64)
+    item_indices = np.asarray(item_indices, dtype=np.int64)
+    ratings = np.asarray(ratings, dtype=np.float32)
+
+    global_mean = float(ratings.mean()) if len(ratings) else 0.0
+    residual = ratings - global_mean
+
+    user_csr = build_csr(user_indices, item_indices, residual, n_users)
+    item_csr = build_csr(item_indices, user_indices, residual, n_items)
+
+    rng = np.random.default_rng(seed)
+    # Cột cuối của mỗi matrix là bias
+    users = np.zeros((n_users, n_factors + 1), dtype=np.float32)
+    items = np.zeros((n_items, n_factors + 1), dtype=np.float32)
+    users[:, :-1] = rng.normal(0, INIT_STD_DEV, (n_users, n_factors))
+    items[:, :-1] = rng.normal(0, INIT_STD_DEV, (n_items, n_factors))
+
+    def with_constant(factors):
+        features = factors.copy()
+        features[:, -1] = 1.0
+        return features
+
+    started = time.perf_counter()
+    for epoch in range(n_epochs):
+        # Users: target r - mean - bi, features [qi, 1] -> [pu, bu]
+        indptr, cols, values = user_csr
+        users = _solve_rows(
+            indptr, cols, values - items[cols, -1], with_constant(items), reg, block_rows, block_ratings
+        )
+
+        # Items: target r - mean - bu, features [pu, 1] -> [qi, bi]
+        indptr, cols, values = item_csr
+        items = _solve_rows(
+            indptr, cols, values - users[cols, -1], with_constant(users), reg, block_rows, block_ratings
+        )
+
+        if verbose:
+            print(f"  ALS epoch {epoch + 1}/{n_epochs} ({time.perf_counter() - started:.1f}s)")
+
+    return ScoringEngine(
+        np.ascontiguousarray(users[:, :-1]),
+        np.ascontiguousarray(items[:, :-1]),
+        np.ascontiguousarray(users[:, -1]),
+        np.ascontiguousarray(items[:, -1]),
+        global_mean,
+        rating_scale=rating_scale,
+    )
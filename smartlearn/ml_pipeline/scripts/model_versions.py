@@ -0,0 +1,123 @@
+"""
+Quản lý model versions cho SmartLearn recommendation system.
+Liệt kê versions cùng metrics trong manifest, kiểm tra checksums và
+rollback CURRENT về một version trước (API workers tự reload).
+"""
+
+import argparse
+import os
+import sys
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from smartlearn.services.model_registry import (
+    list_versions, previous_version, publish_version, read_current_version,
+    read_manifest, verify_version, version_dir
+)
+
+
+def show_versions():
+    """In danh sách versions (cũ nhất trước), đánh dấu version đang active."""
+    current = read_current_version()
+    versions = list_versions()
+    if not versions:
+        print("⚠️ No model versions found")
+        return
+
+    for version in versions:
+        manifest = read_manifest(version_dir(version))
+        marker = "*" if version == current else " "
+        if manifest is None:
+            print(f"{marker} {version}  (no manifest)")
+            continue
+
+        info = manifest.get("info", {})
+        rmse = info.get("rmse")
+        details = [
+            f"rmse={rmse:.4f}" if rmse is not None else None,
+            f"users={info['n_users']}" if "n_users" in info else None,
+            f"items={info['n_items']}" if "n_items" in info else None,
+            f"backend={info['backend']}" if "backend" in info else None,
+            f"base={info['base_version']}" if "base_version" in info else None,
+        ]
+        print(f"{marker} {version}  " + "  ".join(d for d in details if d))
+
+
+def check_version(version):
+    """Kiểm tra checksums của version. Returns True nếu hợp lệ."""
+    problems = verify_version(version)
+    if problems:
+        print(f"❌ Version {version} failed verification:")
+        for problem in problems:
+            print(f"   - {problem}")
+        return False
+
+    print(f"✅ Version {version} verified")
+    return True
+
+
+def rollback(version=None):
+    """
+    Publish lại một version cũ (mặc định version ngay trước version active).
+
+    Version được kiểm tra checksum trước khi publish.
+    """
+    current = read_current_version()
+    version = version or previous_version()
+
+    if version is None:
+        print("❌ No earlier version to roll back to")
+        return False
+    if version not in list_versions():
+        print(f"❌ Version {version} not found")
+        return False
+    if version == current:
+        print(f"⚠️ Version {version} is already active")
+        return False
+    if not check_version(version):
+        return False
+
+    publish_version(version)
+    print(f"🚀 Rolled back from {current} to {version}")
+    return True
+
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Manage SmartLearn model versions")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("list", help="List versions and their metrics")
+
+    verify = subparsers.add_parser("verify", help="Verify artifact checksums")
+    verify.add_argument("version", nargs="?", default=None, help="Version (default: current)")
+
+    back = subparsers.add_parser("rollback", help="Publish an earlier version")
+    back.add_argument("version", nargs="?", default=None, help="Version (default: previous)")
+
+    return parser.parse_args()
+
+
+def main():
+    """Main version management function."""
+
+    args = parse_args()
+
+    if args.command == "list":
+        show_versions()
+    elif args.command == "verify":
+        version = args.version or read_current_version()
+        if version is None:
+            print("❌ No model version found")
+            sys.exit(1)
+        if not check_version(version):
+            sys.exit(1)
+    elif args.command == "rollback":
+        if not rollback(args.version):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
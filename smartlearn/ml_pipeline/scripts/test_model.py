@@ -3,8 +3,8 @@ Test SVD model cho SmartLearn recommendation system.
 Kiểm tra model performance và generate sample recommendations.
 """
 
-import pickle
 import os
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -13,30 +13,28 @@ from surprise import SVD, Dataset, Reader
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from smartlearn.services.id_encoder import IdEncoder
+from smartlearn.services.model_registry import load_version, read_current_version
+from smartlearn.services.recommendation_engine import ScoringEngine
+
 # Mock data for testing if no database
 MOCK_USERS = [1, 2, 3, 4, 5]
 MOCK_COURSES = [1, 2, 3, 4, 5, 6, 7, 8, 9, 10]
 
 def load_model():
-    """Load trained SVD model."""
-    
-    # Try to load from actual model file first
-    models_dir = os.path.join(os.path.dirname(__file__), "..", "models")
-    model_path = os.path.join(models_dir, "svd_model.pkl")
-    mappings_path = os.path.join(models_dir, "mappings.pkl")
+    """Load scoring engine và mappings của model version đang active."""
     
-    if os.path.exists(model_path) and os.path.exists(mappings_path):
+    # Try to load from actual model files first
+    version = read_current_version()
+    if version is not None:
         try:
-            # Load model
-            with open(model_path, "rb") as f:
-                model = pickle.load(f)
-            
-            # Load mappings
-            with open(mappings_path, "rb") as f:
-                mappings = pickle.load(f)
-            
-            print("✅ Loaded model from file")
-            return model, mappings, True
+            bundle = load_version(version)
+            print(f"✅ Loaded model version {version}")
+            return bundle.engine, bundle.mappings, True
             
         except Exception as e:
             print(f"❌ Error loading model: {e}")
@@ -66,15 +64,13 @@ def load_model():
     
     # Create mock mappings
     mappings = {
-        "user_encoder": {uid: i for i, uid in enumerate(MOCK_USERS)},
-        "user_decoder": {i: uid for uid, i in enumerate(MOCK_USERS)},
-        "item_encoder": {iid: i for i, iid in enumerate(MOCK_COURSES)},
-        "item_decoder": {i: iid for iid, i in enumerate(MOCK_COURSES)}
+        "user_encoder": IdEncoder.from_ids(MOCK_USERS),
+        "item_encoder": IdEncoder.from_ids(MOCK_COURSES)
     }
     
-    return model, mappings, False
+    return ScoringEngine.from_svd(model, mappings), mappings, False
 
-def test_model_predictions(model, mappings, is_real_model):
+def test_model_predictions(engine, mappings, is_real_model):
     """Test model predictions."""
     
     print("\n🧪 Testing Model Predictions")
@@ -82,27 +78,27 @@ def test_model_predictions(model, mappings, is_real_model):
     
     if is_real_model:
         # Test with real users/items from mappings
-        test_users = list(mappings["user_encoder"].keys())[:3]
-        test_items = list(mappings["item_encoder"].keys())[:3]
+        test_users = mappings["user_encoder"].ids[:3].tolist()
+        test_items = mappings["item_encoder"].ids[:3].tolist()
     else:
         # Test with mock data
         test_users = MOCK_USERS[:3]
         test_items = MOCK_COURSES[:3]
     
+    item_indices = mappings["item_encoder"].encode(test_items)
+    
     print("Sample predictions:")
     for user_id in test_users:
-        if user_id not in mappings["user_encoder"]:
+        user_idx = mappings["user_encoder"].get(user_id)
+        if user_idx is None:
             continue
-            
-        user_idx = mappings["user_encoder"][user_id]
         
-        predictions = []
-        for item_id in test_items:
-            if item_id in mappings["item_encoder"]:
-                item_idx = mappings["item_encoder"][item_id]
-                prediction = model.predict(user_idx, item_idx)
-                predicted_rating = prediction.est
-                predictions.append((item_id, predicted_rating))
+        scores = engine.score_user(user_idx)
+        predictions = [
+            (item_id, scores[item_idx])
+            for item_id, item_idx in zip(test_items, item_indices)
+            if item_idx >= 0
+        ]
         
         if predictions:
             print(f"User {user_id}:")
@@ -110,42 +106,32 @@ def test_model_predictions(model, mappings, is_real_model):
                 print(f"  Item {item_id}: {rating:.2f}")
             print()
 
-def get_recommendations(user_id, model, mappings, n=5):
+def get_recommendations(user_id, engine, mappings, n=5):
     """Get top N recommendations for a user."""
     
-    if user_id not in mappings["user_encoder"]:
+    user_idx = mappings["user_encoder"].get(user_id)
+    if user_idx is None:
         return []
     
-    user_idx = mappings["user_encoder"][user_id]
-    
-    # Get all items
-    all_items = list(mappings["item_encoder"].keys())
-    
-    # Predict ratings for all items
-    recommendations = []
-    for item_id in all_items:
-        item_idx = mappings["item_encoder"][item_id]
-        prediction = model.predict(user_idx, item_idx)
-        predicted_rating = prediction.est
-        recommendations.append((item_id, predicted_rating))
+    # Score all items at once and keep top N
+    item_indices, scores = engine.top_k(user_idx, n)
+    item_ids = mappings["item_encoder"].decode(item_indices)
     
-    # Sort by rating and return top N
-    recommendations.sort(key=lambda x: x[1], reverse=True)
-    return recommendations[:n]
+    return list(zip(item_ids.tolist(), scores.tolist()))
 
-def test_recommendations(model, mappings, is_real_model):
+def test_recommendations(engine, mappings, is_real_model):
     """Test recommendation system."""
     
     print("\n🎯 Testing Recommendations")
     print("-" * 40)
     
     if is_real_model:
-        test_users = list(mappings["user_encoder"].keys())[:3]
+        test_users = mappings["user_encoder"].ids[:3].tolist()
     else:
         test_users = MOCK_USERS[:3]
     
     for user_id in test_users:
-        recommendations = get_recommendations(user_id, model, mappings)
+        recommendations = get_recommendations(user_id, engine, mappings)
         
         if recommendations:
             print(f"Top 5 recommendations for User {user_id}:")
@@ -169,7 +155,7 @@ def test_backend_integration():
         
         # Test loading model through service
         model, mappings = _load_model()
-        if model and mappings:
+        if mappings:
             print("✅ Model loaded through service layer")
         else:
             print("⚠️ Model not available through service layer")
@@ -191,9 +177,9 @@ def main():
     print("=" * 50)
     
     # Load model
-    model, mappings, is_real_model = load_model()
+    engine, mappings, is_real_model = load_model()
     
-    if model is None or mappings is None:
+    if engine is None or mappings is None:
         print("❌ Failed to load model")
         return
     
@@ -202,10 +188,10 @@ def main():
     print(f"Items: {len(mappings['item_encoder'])}")
     
     # Test predictions
-    test_model_predictions(model, mappings, is_real_model)
+    test_model_predictions(engine, mappings, is_real_model)
     
     # Test recommendations
-    test_recommendations(model, mappings, is_real_model)
+    test_recommendations(engine, mappings, is_real_model)
     
     # Test backend integration
     test_backend_integration()
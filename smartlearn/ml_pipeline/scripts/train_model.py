@@ -3,30 +3,77 @@ Train SVD model cho SmartLearn recommendation system.
 Sử dụng Surprise library để train collaborative filtering model.
 """
 
+import argparse
 import os
-import pickle
+import sys
 import warnings
 warnings.filterwarnings('ignore')
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split
-from surprise import SVD, Dataset, Reader, accuracy
+from surprise import SVD, accuracy
 from surprise.dump import dump
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from data_split import (
+    DEFAULT_LEAVE_LAST_N, DEFAULT_TEST_SIZE, SPLIT_MODES,
+    build_surprise_sets, split_interactions
+)
+from smartlearn.services.id_encoder import IdEncoder, save_mappings
+from smartlearn.services.model_registry import (
+    create_version_dir, prune_versions, publish_version, write_manifest
+)
+from smartlearn.services.item_similarity import build_similarity_index
+from smartlearn.services.recommendation_engine import ScoringEngine
+
+def _read_npz(data_path):
+    """Đọc file .npz do export_training_data.py ghi (cột typed int32/float32)."""
+    with np.load(data_path) as data:
+        df = pd.DataFrame({
+            "user_id": data["user_id"],
+            "item_id": data["item_id"],
+            "rating": data["rating"],
+            "timestamp": data["timestamp"],
+        })
+        exported_at = int(data["exported_at"]) if "exported_at" in data.files else None
+        applied_ids = data["applied_ids"].tolist() if "applied_ids" in data.files else None
+    
+    # Explicit ratings được ghi sau implicit enrollments: giữ bản ghi cuối
+    df = df.drop_duplicates(["user_id", "item_id"], keep="last").reset_index(drop=True)
+    
+    if exported_at:
+        df.attrs["exported_at"] = pd.Timestamp(exported_at, unit="s", tz="UTC")
+    if applied_ids is not None:
+        # Ratings gần exported_at đã có trong data (xem incremental_update.py)
+        df.attrs["applied_ids"] = applied_ids
+    
+    return df
+
 def load_training_data():
-    """Load training data từ CSV files."""
+    """Load training data từ interactions.npz (hoặc interactions.csv)."""
     
     # Load interactions data
-    data_path = os.path.join(os.path.dirname(__file__), "..", "data", "interactions.csv")
+    data_dir = os.path.join(os.path.dirname(__file__), "..", "data")
+    npz_path = os.path.join(data_dir, "interactions.npz")
+    csv_path = os.path.join(data_dir, "interactions.csv")
     
-    if not os.path.exists(data_path):
+    if os.path.exists(npz_path):
+        data_path = npz_path
+    elif os.path.exists(csv_path):
+        data_path = csv_path
+    else:
         print("❌ Interactions data not found!")
         print("Please run export_training_data.py first to generate data.")
         return None
     
     try:
-        df = pd.read_csv(data_path)
+        if data_path == npz_path:
+            df = _read_npz(data_path)
+        else:
+            df = pd.read_csv(data_path)
         print(f"✅ Loaded {len(df)} interactions from {data_path}")
         
         # Display basic statistics
@@ -41,47 +88,53 @@ def load_training_data():
         print(f"❌ Error loading data: {e}")
         return None
 
+def data_fingerprint(df):
+    """Mốc export và số rows của training data (benchmark kiểm tra trùng khớp)."""
+    exported_at = df.attrs.get("exported_at")
+    return {
+        "exported_at": exported_at.isoformat() if exported_at is not None else None,
+        "n_rows": int(len(df)),
+    }
+
 def create_mappings(df):
-    """Tạo encoder/decoder mappings cho user và item IDs."""
+    """Tạo ID encoders (sorted int64 arrays) cho user và item IDs."""
     
-    unique_users = df["user_id"].unique()
-    unique_items = df["item_id"].unique()
-    
-    # Create mappings
-    user_encoder = {uid: idx for idx, uid in enumerate(unique_users)}
-    user_decoder = {idx: uid for uid, idx in user_encoder.items()}
-    item_encoder = {iid: idx for idx, iid in enumerate(unique_items)}
-    item_decoder = {idx: iid for iid, idx in item_encoder.items()}
+    user_encoder = IdEncoder.from_ids(df["user_id"].to_numpy())
+    item_encoder = IdEncoder.from_ids(df["item_id"].to_numpy())
     
     print(f"✅ Created mappings: {len(user_encoder)} users, {len(item_encoder)} items")
     
     return {
         "user_encoder": user_encoder,
-        "user_decoder": user_decoder,
-        "item_encoder": item_encoder,
-        "item_decoder": item_decoder
+        "item_encoder": item_encoder
     }
 
-def train_svd_model(df, mappings):
+# SVD parameters mặc định (khi không chạy tuning)
+DEFAULT_SVD_PARAMS = {
+    "n_factors": 50,  # Number of latent factors
+    "n_epochs": 20,   # Number of training epochs
+    "lr_all": 0.005,  # Learning rate for all parameters
+    "reg_all": 0.02   # Regularization term for all parameters
+}
+
+def train_svd_model(df, mappings, params=None, test_mask=None):
     """Train SVD model với Surprise library."""
     
-    # Prepare data for Surprise
-    reader = Reader(rating_scale=(1.0, 5.0))
-    data = Dataset.load_from_df(df[["user_id", "item_id", "rating"]], reader)
-    
-    # Split data
-    trainset, testset = train_test_split(data, test_size=0.2, random_state=42)
+    # Split data (mặc định random 80/20), build trainset/testset một lần
+    if test_mask is None:
+        test_mask = split_interactions(df)
+    trainset, testset = build_surprise_sets(
+        df["user_id"].to_numpy(),
+        df["item_id"].to_numpy(),
+        df["rating"].to_numpy(),
+        test_mask,
+    )
     
     # Train SVD model
     print("\n🚀 Training SVD model...")
     
     # SVD parameters
-    algo = SVD(
-        n_factors=50,  # Number of latent factors
-        n_epochs=20,   # Number of training epochs
-        lr_all=0.005,  # Learning rate for all parameters
-        reg_all=0.02   # Regularization term for all parameters
-    )
+    algo = SVD(**(params or DEFAULT_SVD_PARAMS))
     
     # Fit model
     algo.fit(trainset)
@@ -100,59 +153,231 @@ def train_svd_model(df, mappings):
     
     return algo, rmse, mae
 
-def save_model_and_mappings(algo, mappings, rmse, mae):
-    """Save trained model và mappings."""
+def train_numpy_model(df, mappings, params=None, test_mask=None):
+    """Train cùng biased MF model bằng NumPy ALS (mf_trainer.py)."""
+    from mf_trainer import train_als
+    
+    params = params or DEFAULT_SVD_PARAMS
     
-    # Create models directory
-    models_dir = os.path.join(os.path.dirname(__file__), "..", "models")
-    os.makedirs(models_dir, exist_ok=True)
+    user_indices = mappings["user_encoder"].encode(df["user_id"].to_numpy())
+    item_indices = mappings["item_encoder"].encode(df["item_id"].to_numpy())
+    ratings = df["rating"].to_numpy(dtype=np.float32)
     
-    # Save model
-    model_path = os.path.join(models_dir, "svd_model.pkl")
-    with open(model_path, "wb") as f:
-        pickle.dump(algo, f)
+    # Split data (mặc định random 80/20)
+    test = split_interactions(df) if test_mask is None else test_mask
     
-    # Save mappings
-    mappings_path = os.path.join(models_dir, "mappings.pkl")
-    with open(mappings_path, "wb") as f:
-        pickle.dump(mappings, f)
+    # Train model
+    print("\n🚀 Training MF model (NumPy ALS)...")
+    engine = train_als(
+        user_indices[~test],
+        item_indices[~test],
+        ratings[~test],
+        len(mappings["user_encoder"]),
+        len(mappings["item_encoder"]),
+        n_factors=params["n_factors"],
+        n_epochs=params["n_epochs"],
+        reg=params["reg_all"],
+    )
+    
+    # Test model
+    print("\n📊 Evaluating model...")
+    errors = engine.predict(user_indices[test], item_indices[test]) - ratings[test]
+    rmse = float(np.sqrt(np.mean(errors ** 2)))
+    mae = float(np.mean(np.abs(errors)))
+    
+    print(f"\n✅ Model trained successfully!")
+    print(f"RMSE: {rmse:.4f}")
+    print(f"MAE: {mae:.4f}")
+    
+    return engine, rmse, mae
+
+def save_model_and_mappings(
+    algo, mappings, rmse, mae, models_dir, checkpoint=None, extra_info=None, engine=None
+):
+    """
+    Save trained model và mappings vào thư mục version.
     
-    # Save training info
+    algo là Surprise SVD (backend "surprise") hoặc None khi engine được
+    train trực tiếp bằng NumPy backend. Chỉ factor/bias arrays được lưu
+    (không pickle SVD object); manifest.json được ghi sau cùng bằng
+    write_manifest, khi mọi artifact của version đã có mặt.
+    
+    Returns:
+        Tuple (engine, training info)
+    """
+    
+    # Export factor matrices và biases (.npy) để service memory-map
+    if engine is None:
+        engine = ScoringEngine.from_svd(algo, mappings)
+    engine.save(models_dir)
+    
+    # Build "similar courses" index từ item factors
+    similarity = build_similarity_index(engine.item_factors)
+    similarity.save(models_dir)
+    
+    # Save mappings (user_ids.npy / item_ids.npy)
+    save_mappings(mappings, models_dir)
+    
+    # Training info (ghi vào manifest.json)
     info = {
+        "version": os.path.basename(models_dir),
         "rmse": rmse,
         "mae": mae,
         "n_users": len(mappings["user_encoder"]),
         "n_items": len(mappings["item_encoder"]),
-        "trained_at": pd.Timestamp.now().isoformat()
+        "trained_at": pd.Timestamp.now().isoformat(),
+        # Interactions sau mốc này được incremental_update.py xử lý
+        "checkpoint": (checkpoint or pd.Timestamp.now(tz="UTC")).isoformat()
     }
+    info.update(extra_info or {})
     
-    info_path = os.path.join(models_dir, "training_info.pkl")
-    with open(info_path, "wb") as f:
-        pickle.dump(info, f)
+    print(f"\n💾 Factor matrices and similarity index saved to: {models_dir}")
+    print(f"💾 Mappings saved to: {models_dir}")
     
-    print(f"\n💾 Model saved to: {model_path}")
-    print(f"💾 Mappings saved to: {mappings_path}")
-    print(f"💾 Training info saved to: {info_path}")
+    return engine, info
+
+def parse_args():
+    """Parse command line arguments."""
+    parser = argparse.ArgumentParser(description="Train SmartLearn SVD model")
+    parser.add_argument(
+        "--materialize",
+        action="store_true",
+        help="Precompute top-K recommendations for every user after training",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=50,
+        help="Number of courses stored per user when materializing",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=["surprise", "numpy"],
+        default="surprise",
+        help="Training backend: Surprise SVD (SGD) or NumPy ALS",
+    )
+    parser.add_argument(
+        "--split",
+        choices=SPLIT_MODES,
+        default="random",
+        help="Holdout split: random or temporal leave-last-N per user",
+    )
+    parser.add_argument(
+        "--test-size",
+        type=float,
+        default=DEFAULT_TEST_SIZE,
+        help="Test fraction for the random split",
+    )
+    parser.add_argument(
+        "--leave-last",
+        type=int,
+        default=DEFAULT_LEAVE_LAST_N,
+        help="Most recent interactions per user held out by the temporal split",
+    )
+    parser.add_argument(
+        "--tune",
+        choices=["grid", "random"],
+        default=None,
+        help="Run parallel hyperparameter search with k-fold CV before training",
+    )
+    parser.add_argument(
+        "--folds",
+        type=int,
+        default=5,
+        help="Number of cross-validation folds when tuning",
+    )
+    parser.add_argument(
+        "--n-iter",
+        type=int,
+        default=20,
+        help="Number of sampled configs for random search",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for tuning (default: all CPU cores)",
+    )
+    args = parser.parse_args()
+    # tune_model tìm params cho Surprise SVD (SGD); ALS không dùng lr_all và
+    # reg_all có thang khác, nên params đó không áp dụng cho backend numpy
+    if args.tune and args.backend == "numpy":
+        parser.error("--tune searches Surprise SVD params and cannot be used with --backend numpy")
+    return args
 
 def main():
     """Main training function."""
     
+    args = parse_args()
+    
     print("🎯 SmartLearn SVD Model Training")
     print("=" * 50)
     
-    # Load data
+    # Load data (mốc thời gian dữ liệu cho incremental updates)
+    checkpoint = pd.Timestamp.now(tz="UTC")
     df = load_training_data()
     if df is None:
         return
+    checkpoint = df.attrs.get("exported_at", checkpoint)
     
     # Create mappings
     mappings = create_mappings(df)
     
+    extra_info = {"backend": args.backend, "data": data_fingerprint(df)}
+    if "applied_ids" in df.attrs:
+        extra_info["applied_ids"] = df.attrs["applied_ids"]
+    
+    # Holdout split (trước tuning để holdout không lọt vào CV)
+    test_mask = split_interactions(
+        df, args.split, test_size=args.test_size, leave_last_n=args.leave_last
+    )
+    extra_info["split"] = {
+        "mode": args.split,
+        "test_size": args.test_size,
+        "leave_last_n": args.leave_last,
+        "n_test": int(test_mask.sum()),
+    }
+    print(f"✅ Split ({args.split}): {len(df) - test_mask.sum()} train / {test_mask.sum()} test")
+    
+    # Optional: hyperparameter search, chỉ trên phần train
+    params = DEFAULT_SVD_PARAMS
+    if args.tune:
+        from tune_model import tune_svd
+        tuning = tune_svd(
+            df[~test_mask], mode=args.tune, n_folds=args.folds, n_iter=args.n_iter,
+            max_workers=args.workers
+        )
+        params = tuning["best_params"]
+        extra_info["tuning"] = tuning
+    extra_info["params"] = params
+    
     # Train model
-    algo, rmse, mae = train_svd_model(df, mappings)
+    algo = engine = None
+    if args.backend == "numpy":
+        engine, rmse, mae = train_numpy_model(df, mappings, params, test_mask)
+    else:
+        algo, rmse, mae = train_svd_model(df, mappings, params, test_mask)
+    
+    # Save model and mappings into a new version directory
+    version, models_dir = create_version_dir()
+    engine, info = save_model_and_mappings(
+        algo, mappings, rmse, mae, models_dir, checkpoint, extra_info, engine
+    )
+    
+    # Optional: precompute per-user top-K store
+    if args.materialize:
+        from materialize_recommendations import run_materialization
+        run_materialization(engine, mappings, models_dir, df, args.top_k)
+        info["materialized_top_k"] = args.top_k
+    
+    # Manifest (checksums + training info) sau khi đủ artifacts
+    write_manifest(models_dir, info)
+    print(f"💾 Manifest saved to: {models_dir}")
     
-    # Save model and mappings
-    save_model_and_mappings(algo, mappings, rmse, mae)
+    # Switch serving to the new version (running API picks it up)
+    publish_version(version)
+    prune_versions()
+    print(f"\n🚀 Published model version: {version}")
     
     print("\n🎉 Training completed successfully!")
     print("\n📋 Model is ready for recommendations!")
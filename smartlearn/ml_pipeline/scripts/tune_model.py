@@ -0,0 +1,175 @@
+"""
+Hyperparameter search cho SmartLearn SVD model.
+Grid/random search với k-fold cross-validation chạy song song trên mọi
+CPU core bằng ProcessPoolExecutor.
+"""
+
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+import warnings
+warnings.filterwarnings('ignore')
+
+import numpy as np
+from surprise import SVD, accuracy
+
+from data_split import build_surprise_sets
+
+# Search space mặc định
+PARAM_GRID = {
+    "n_factors": [20, 50, 100],
+    "n_epochs": [20, 30],
+    "lr_all": [0.002, 0.005, 0.01],
+    "reg_all": [0.02, 0.05, 0.1],
+}
+
+DEFAULT_N_FOLDS = 5
+DEFAULT_N_ITER = 20
+
+# Data dùng chung trong mỗi worker process: gửi một lần qua initializer.
+# Tasks chạy theo thứ tự fold nên mỗi worker chỉ giữ trainset của fold
+# hiện tại (memory không tăng theo n_folds)
+_shared = {}
+_fold_cache = {}
+
+
+def _init_worker(user_ids, item_ids, ratings, folds, rating_scale):
+    """Initializer của worker: nhận arrays một lần cho cả pool."""
+    _shared.update(
+        user_ids=user_ids,
+        item_ids=item_ids,
+        ratings=ratings,
+        folds=folds,
+        rating_scale=rating_scale,
+    )
+    _fold_cache.clear()
+
+
+def _get_fold(fold):
+    """Build (trainset, testset) của fold, thay cho fold đã cache trước đó."""
+    if fold not in _fold_cache:
+        _fold_cache.clear()
+        _fold_cache[fold] = build_surprise_sets(
+            _shared["user_ids"],
+            _shared["item_ids"],
+            _shared["ratings"],
+            _shared["folds"] == fold,
+            _shared["rating_scale"],
+        )
+    return _fold_cache[fold]
+
+
+def _evaluate(task):
+    """Train SVD với params trên một fold, trả về (config index, fold, rmse, mae)."""
+    config_idx, params, fold = task
+    trainset, testset = _get_fold(fold)
+
+    algo = SVD(**params)
+    algo.fit(trainset)
+    predictions = algo.test(testset)
+
+    return (
+        config_idx,
+        fold,
+        accuracy.rmse(predictions, verbose=False),
+        accuracy.mae(predictions, verbose=False),
+    )
+
+
+def candidate_params(mode="grid", n_iter=DEFAULT_N_ITER, param_grid=None, seed=42):
+    """Danh sách configs cần thử (toàn bộ grid hoặc n_iter configs ngẫu nhiên)."""
+    param_grid = param_grid or PARAM_GRID
+    keys = list(param_grid)
+    configs = [dict(zip(keys, values)) for values in itertools.product(*param_grid.values())]
+
+    if mode == "random" and n_iter < len(configs):
+        rng = np.random.default_rng(seed)
+        configs = [configs[i] for i in rng.choice(len(configs), n_iter, replace=False)]
+
+    return configs
+
+
+def tune_svd(
+    df,
+    mode="grid",
+    n_folds=DEFAULT_N_FOLDS,
+    n_iter=DEFAULT_N_ITER,
+    param_grid=None,
+    max_workers=None,
+    seed=42,
+    rating_scale=(1.0, 5.0),
+):
+    """
+    Tìm hyperparameters tốt nhất bằng k-fold CV song song.
+
+    Args:
+        df: Interactions DataFrame (user_id, item_id, rating)
+        mode: "grid" hoặc "random"
+        n_folds: Số folds
+        n_iter: Số configs khi mode="random"
+        param_grid: Search space (mặc định PARAM_GRID)
+        max_workers: Số processes (mặc định số CPU cores)
+        seed: Random seed cho fold assignment và random search
+
+    Returns:
+        Dict với best params, metrics và kết quả của mọi config
+    """
+    configs = candidate_params(mode, n_iter, param_grid, seed)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    rng = np.random.default_rng(seed)
+    folds = rng.permutation(len(df)) % n_folds
+
+    user_ids = df["user_id"].to_numpy()
+    item_ids = df["item_id"].to_numpy()
+    ratings = df["rating"].to_numpy(dtype=np.float64)
+
+    tasks = [
+        (config_idx, params, fold)
+        for config_idx, params in enumerate(configs)
+        for fold in range(n_folds)
+    ]
+
+    print(f"\n🔎 Tuning {len(configs)} configs x {n_folds} folds on {max_workers} workers...")
+    started = time.perf_counter()
+
+    rmse = np.zeros((len(configs), n_folds))
+    mae = np.zeros((len(configs), n_folds))
+
+    with ProcessPoolExecutor(
+        max_workers=max_workers,
+        initializer=_init_worker,
+        initargs=(user_ids, item_ids, ratings, folds, rating_scale),
+    ) as executor:
+        # Tasks sắp theo fold để mỗi worker tái sử dụng trainset đã cache
+        ordered = sorted(tasks, key=lambda task: task[2])
+        for config_idx, fold, fold_rmse, fold_mae in executor.map(_evaluate, ordered):
+            rmse[config_idx, fold] = fold_rmse
+            mae[config_idx, fold] = fold_mae
+
+    mean_rmse = rmse.mean(axis=1)
+    best = int(np.argmin(mean_rmse))
+
+    results = [
+        {
+            "params": params,
+            "rmse": float(mean_rmse[i]),
+            "rmse_std": float(rmse[i].std()),
+            "mae": float(mae[i].mean()),
+        }
+        for i, params in enumerate(configs)
+    ]
+
+    print(f"✅ Tuning finished in {time.perf_counter() - started:.1f}s")
+    print(f"Best params: {configs[best]}")
+    print(f"CV RMSE: {mean_rmse[best]:.4f}")
+
+    return {
+        "mode": mode,
+        "n_folds": n_folds,
+        "best_params": configs[best],
+        "best_rmse": float(mean_rmse[best]),
+        "best_mae": float(mae[best].mean()),
+        "results": results,
+    }
@@ -5,7 +5,7 @@ Course model cho SmartLearn system.
 from datetime import datetime
 from typing import Optional, List
 
-from sqlalchemy import String, Integer, Text, DateTime, Boolean, ForeignKey
+from sqlalchemy import String, Integer, Text, DateTime, Boolean, ForeignKey, Index
 from sqlalchemy import Column
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -17,6 +17,11 @@ class Course(Base):
     """Course model đại diện cho khóa học trong hệ thống."""
 
     __tablename__ = "courses"
+    __table_args__ = (
+        # Keyset pagination của catalog (course_pagination.py)
+        Index("ix_courses_active_created_id", "is_active", "created_at", "id"),
+        Index("ix_courses_active_enrollment_id", "is_active", "enrollment_count", "id"),
+    )
 
     # Primary key
     id = Column(Integer, primary_key=True, index=True)
@@ -37,6 +42,8 @@ class Course(Base):
     # Statistics
     enrollment_count = Column(Integer, default=0, nullable=False)
     average_rating = Column(Integer, default=0, nullable=False)
+    # Số lessons, cập nhật khi thêm/xóa lesson (progress_counters.py)
+    lesson_count = Column(Integer, default=0, server_default="0", nullable=False)
     
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -62,6 +69,7 @@ class Course(Base):
             "is_active": self.is_active,
             "enrollment_count": self.enrollment_count,
             "average_rating": self.average_rating,
+            "lesson_count": self.lesson_count,
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "updated_at": self.updated_at.isoformat() if self.updated_at else None,
         }
\ No newline at end of file
@@ -8,24 +8,34 @@ from typing import Optional
 
 from fastapi import HTTPException, status
 from jose import jwt, JWTError
-from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from ..core.config import settings
 from ..models.user import User
-
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from . import password_hashing
+from .password_hashing import pwd_context
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify password against hashed version."""
-    return pwd_context.verify(plain_password, hashed_password)
+    """Verify password against hashed version (bcrypt chạy trong hashing pool)."""
+    return password_hashing.verify_password(plain_password, hashed_password)
 
 
 def get_password_hash(password: str) -> str:
-    """Hash password using bcrypt."""
-    return pwd_context.hash(password)
+    """Hash password using bcrypt (chạy trong hashing pool)."""
+    return password_hashing.hash_password(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password mà không chặn event loop."""
+    return await password_hashing.verify_password_async(plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password mà không chặn event loop."""
+    return await password_hashing.hash_password_async(password)
 
 
 def create_access_token(
@@ -117,4 +127,55 @@ def create_user(
     db.commit()
     db.refresh(user)
     
-    return user
\ No newline at end of file
+    return user
+
+
+async def authenticate_user_async(
+    db: AsyncSession, email: str, password: str
+) -> Optional[User]:
+    """Authenticate user (AsyncSession, bcrypt trong hashing pool)."""
+    user = await db.scalar(select(User).where(User.email == email))
+    
+    if not user:
+        return None
+    
+    if not await verify_password_async(password, user.hashed_password):
+        return None
+    
+    if not user.is_active:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User is inactive"
+        )
+    
+    return user
+
+
+async def create_user_async(
+    db: AsyncSession, email: str, password: str, full_name: str
+) -> User:
+    """Tạo user mới (AsyncSession, bcrypt trong hashing pool)."""
+    
+    # Check if user already exists
+    existing_user = await db.scalar(select(User.id).where(User.email == email))
+    if existing_user:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already registered"
+        )
+    
+    # Create new user
+    hashed_password = await get_password_hash_async(password)
+    
+    user = User(
+        email=email,
+        hashed_password=hashed_password,
+        full_name=full_name,
+        is_active=True
+    )
+    
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    
+    return user
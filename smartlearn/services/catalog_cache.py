@@ -0,0 +1,196 @@
+"""
+Read-through cache cho các truy vấn đọc catalog (courses, lessons).
+Kết quả được lưu dưới dạng column values (không giữ ORM objects của
+session khác) trong một LRU có giới hạn; khi đọc lại, rows được gắn vào
+session hiện tại bằng merge(load=False) nên không phát sinh SQL.
+
+Mỗi namespace có một version counter: ghi catalog thì bump version, các
+keys cũ tự hết hiệu lực. Counter mặc định nằm trong process; gắn
+RedisVersionBackend (hoặc backend tương tự) qua set_version_backend để
+nhiều workers cùng thấy invalidation.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Sequence, Tuple
+
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+# Namespaces
+COURSES = "courses"
+LESSONS = "lessons"
+
+CATALOG_CACHE_SIZE = 2048
+# Giới hạn độ cũ của các giá trị không đi qua invalidation (vd enrollment_count)
+CATALOG_CACHE_TTL = 300.0
+# Version từ shared backend được đọc lại tối đa mỗi khoảng này (giây)
+VERSION_CHECK_INTERVAL = 1.0
+
+
+class LocalVersionBackend:
+    """Version counters trong process (mặc định, một worker)."""
+
+    def __init__(self):
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def get(self, namespace: str) -> int:
+        return self._versions.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        with self._lock:
+            version = self._versions.get(namespace, 0) + 1
+            self._versions[namespace] = version
+            return version
+
+
+class RedisVersionBackend:
+    """
+    Version counters dùng chung giữa các workers qua Redis.
+
+    client là một redis.Redis (hoặc object có get/incr tương tự).
+    """
+
+    def __init__(self, client: Any, prefix: str = "smartlearn:catalog_version:"):
+        self.client = client
+        self.prefix = prefix
+
+    def get(self, namespace: str) -> int:
+        return int(self.client.get(self.prefix + namespace) or 0)
+
+    def bump(self, namespace: str) -> int:
+        return int(self.client.incr(self.prefix + namespace))
+
+
+class CatalogCache:
+    """LRU có TTL, keys gắn với version hiện tại của các namespaces."""
+
+    def __init__(self, maxsize: int = CATALOG_CACHE_SIZE, ttl: float = CATALOG_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.backend = LocalVersionBackend()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        # namespace -> (thời điểm đọc từ backend, version)
+        self._versions: Dict[str, Tuple[float, int]] = {}
+        self._lock = threading.Lock()
+
+    def version(self, namespace: str) -> int:
+        checked_at, version = self._versions.get(namespace, (float("-inf"), 0))
+        now = time.monotonic()
+        if now - checked_at >= VERSION_CHECK_INTERVAL:
+            version = self.backend.get(namespace)
+            self._versions[namespace] = (now, version)
+        return version
+
+    def versioned_key(self, namespaces: Sequence[str], key: Hashable) -> Hashable:
+        """
+        Key gắn với version hiện tại của namespaces.
+
+        Lấy key trước khi load và dùng lại khi set: nếu có ghi xen giữa,
+        giá trị cũ chỉ được lưu dưới version cũ.
+        """
+        return (key, tuple(self.version(namespace) for namespace in namespaces))
+
+    def get(self, full_key: Hashable) -> Any:
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[full_key]
+                return None
+            self._entries.move_to_end(full_key)
+            return value
+
+    def set(self, full_key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[full_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(full_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *namespaces: str) -> None:
+        """Bump version của các namespaces (và bỏ các entries local)."""
+        now = time.monotonic()
+        for namespace in namespaces:
+            self._versions[namespace] = (now, self.backend.bump(namespace))
+        with self._lock:
+            self._entries.clear()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        self._versions.clear()
+
+
+catalog_cache = CatalogCache()
+
+
+def set_version_backend(backend: Any) -> None:
+    """Dùng version backend khác (vd RedisVersionBackend) cho catalog cache."""
+    catalog_cache.backend = backend
+    catalog_cache.clear()
+
+
+def invalidate_catalog_cache(*namespaces: str) -> None:
+    """Đánh dấu dữ liệu cached của namespaces hết hiệu lực (gọi sau khi ghi)."""
+    catalog_cache.invalidate(*(namespaces or (COURSES, LESSONS)))
+
+
+def _snapshot(objects: Sequence[Any]) -> Tuple[Tuple[type, Dict[str, Any]], ...]:
+    """Column values của các ORM objects (đã load đầy đủ)."""
+    return tuple(
+        (
+            type(obj),
+            {attr.key: getattr(obj, attr.key) for attr in inspect(obj).mapper.column_attrs},
+        )
+        for obj in objects
+    )
+
+
+def _detached(cls: type, values: Dict[str, Any]) -> Any:
+    obj = cls(**values)
+    make_transient_to_detached(obj)
+    return obj
+
+
+def read_through(
+    db: Session,
+    namespaces: Sequence[str],
+    key: Hashable,
+    load: Callable[[], List[Any]],
+) -> List[Any]:
+    """
+    Rows cho key: từ cache nếu còn hiệu lực, ngược lại gọi load() rồi cache.
+
+    Rows trả về thuộc session db như khi query trực tiếp.
+    """
+    full_key = catalog_cache.versioned_key(namespaces, key)
+    rows = catalog_cache.get(full_key)
+    if rows is None:
+        objects = load()
+        catalog_cache.set(full_key, _snapshot(objects))
+        return objects
+
+    return [db.merge(_detached(cls, values), load=False) for cls, values in rows]
+
+
+async def read_through_async(
+    db: AsyncSession,
+    namespaces: Sequence[str],
+    key: Hashable,
+    load: Callable[[], Awaitable[List[Any]]],
+) -> List[Any]:
+    """Như read_through cho AsyncSession."""
+    full_key = catalog_cache.versioned_key(namespaces, key)
+    rows = catalog_cache.get(full_key)
+    if rows is None:
+        objects = await load()
+        catalog_cache.set(full_key, _snapshot(objects))
+        return objects
+
+    return [await db.merge(_detached(cls, values), load=False) for cls, values in rows]
@@ -0,0 +1,173 @@
+"""
+Catalog snapshot cho SmartLearn recommendation system.
+Giữ trong process danh sách courses đủ điều kiện gợi ý (active và
+published) dưới dạng sorted ID array cùng các cột hiển thị, để
+recommendation chỉ cần boolean mask khi scoring và chỉ hydrate top-k rows.
+"""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import and_, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..models.course import Course
+from .id_encoder import IdEncoder
+
+# Snapshot được build lại sau TTL (giây) hoặc khi CourseService ghi course
+CATALOG_SNAPSHOT_TTL = 60.0
+
+# Các cột hiển thị trong recommendation (cùng thứ tự với dict trả về)
+DISPLAY_FIELDS = ("title", "description", "category", "difficulty_level", "thumbnail_url")
+
+# Các cột được mã hóa thêm thành int codes (dùng cho diversity re-ranking)
+CODED_FIELDS = ("category", "difficulty_level")
+
+
+def _encode_values(values: np.ndarray) -> np.ndarray:
+    """Int code cho từng giá trị (cùng giá trị cùng code, None -> -1)."""
+    lookup: Dict[Any, int] = {}
+    return np.fromiter(
+        (-1 if value is None else lookup.setdefault(value, len(lookup)) for value in values),
+        dtype=np.int32,
+        count=len(values),
+    )
+
+
+class CatalogSnapshot:
+    """
+    Column store bất biến của các courses đủ điều kiện.
+
+    course_ids được sort để tra cứu bằng searchsorted; mỗi cột hiển thị
+    là một object array cùng thứ tự, category/difficulty_level có thêm
+    int codes trong self.codes.
+    """
+
+    def __init__(self, course_ids: np.ndarray, columns: Dict[str, np.ndarray]):
+        self.course_ids = course_ids
+        self.columns = columns
+        self.codes = {field: _encode_values(columns[field]) for field in CODED_FIELDS}
+        # (item_encoder, item index của từng course) - tính lại khi model đổi
+        self._item_indices: Tuple[Optional[IdEncoder], Optional[np.ndarray]] = (None, None)
+
+    @classmethod
+    def from_rows(cls, rows: List[Tuple[Any, ...]]) -> "CatalogSnapshot":
+        """Build từ rows (id, *DISPLAY_FIELDS) đã sort theo id."""
+        course_ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        columns = {}
+        for position, field in enumerate(DISPLAY_FIELDS, start=1):
+            column = np.empty(len(rows), dtype=object)
+            column[:] = [row[position] for row in rows]
+            columns[field] = column
+        return cls(course_ids, columns)
+
+    def __len__(self) -> int:
+        return len(self.course_ids)
+
+    def positions(self, course_ids: Any) -> np.ndarray:
+        """Vị trí trong snapshot của từng course ID (-1 nếu không đủ điều kiện)."""
+        course_ids = np.asarray(course_ids, dtype=np.int64)
+        if len(self.course_ids) == 0:
+            return np.full(course_ids.shape, -1, dtype=np.int64)
+
+        positions = np.searchsorted(self.course_ids, course_ids)
+        np.minimum(positions, len(self.course_ids) - 1, out=positions)
+        return np.where(self.course_ids[positions] == course_ids, positions, -1)
+
+    def candidate_mask(self, item_encoder: IdEncoder, n_items: int) -> np.ndarray:
+        """
+        Boolean mask (n_items,) của items có trong snapshot.
+
+        Item indices của snapshot được cache theo encoder, nên mỗi request
+        chỉ tốn một lần scatter vào mask mới (caller được phép sửa mask).
+        """
+        encoder, indices = self._item_indices
+        if encoder is not item_encoder:
+            indices = item_encoder.encode(self.course_ids)
+            indices = indices[indices >= 0]
+            self._item_indices = (item_encoder, indices)
+
+        mask = np.zeros(n_items, dtype=bool)
+        mask[indices[indices < n_items]] = True
+        return mask
+
+    def record(self, position: int) -> Dict[str, Any]:
+        """Display fields của course ở vị trí position."""
+        record = {"id": int(self.course_ids[position])}
+        for field in DISPLAY_FIELDS:
+            record[field] = self.columns[field][position]
+        return record
+
+
+_snapshot: Tuple[float, Optional[CatalogSnapshot]] = (0.0, None)
+_snapshot_lock = threading.Lock()
+# Tăng mỗi lần invalidate: snapshot build song song với một lần ghi
+# không được coi là còn hạn
+_generation = 0
+
+
+def _snapshot_statement():
+    """Column-only select (không tạo ORM objects) các courses active và published."""
+    return (
+        select(Course.id, *(getattr(Course, field) for field in DISPLAY_FIELDS))
+        .where(
+            and_(
+                Course.is_active == True,
+                Course.is_published == True
+            )
+        )
+        .order_by(Course.id)
+    )
+
+
+def _fresh_snapshot() -> Optional[CatalogSnapshot]:
+    expires_at, snapshot = _snapshot
+    if snapshot is not None and time.monotonic() < expires_at:
+        return snapshot
+    return None
+
+
+def _store_snapshot(snapshot: CatalogSnapshot, generation: int) -> None:
+    global _snapshot
+    expires_at = time.monotonic() + CATALOG_SNAPSHOT_TTL
+    _snapshot = (expires_at if generation == _generation else 0.0, snapshot)
+
+
+def get_catalog_snapshot(db: Session) -> CatalogSnapshot:
+    """Snapshot hiện tại; build lại khi hết TTL hoặc đã bị invalidate."""
+    snapshot = _fresh_snapshot()
+    if snapshot is not None:
+        return snapshot
+
+    with _snapshot_lock:
+        # Một thread build, các thread khác dùng kết quả
+        snapshot = _fresh_snapshot()
+        if snapshot is None:
+            generation = _generation
+            snapshot = CatalogSnapshot.from_rows(db.execute(_snapshot_statement()).all())
+            _store_snapshot(snapshot, generation)
+
+    return snapshot
+
+
+async def get_catalog_snapshot_async(db: AsyncSession) -> CatalogSnapshot:
+    """Như get_catalog_snapshot nhưng query qua AsyncSession."""
+    snapshot = _fresh_snapshot()
+    if snapshot is not None:
+        return snapshot
+
+    generation = _generation
+    result = await db.execute(_snapshot_statement())
+    snapshot = CatalogSnapshot.from_rows(result.all())
+    _store_snapshot(snapshot, generation)
+    return snapshot
+
+
+def invalidate_catalog_snapshot() -> None:
+    """Đánh dấu snapshot hết hạn (gọi sau khi course được tạo/sửa/xóa)."""
+    global _snapshot, _generation
+    _generation += 1
+    _snapshot = (0.0, _snapshot[1])
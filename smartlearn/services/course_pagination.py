@@ -0,0 +1,133 @@
+"""
+Keyset pagination cho catalog khóa học.
+Mỗi trang là một index range scan bắt đầu từ cursor (sort key của row
+cuối trang trước) thay vì OFFSET, nên chi phí không tăng theo độ sâu;
+tổng số courses theo từng filter được cache trong catalog cache (LRU có
+giới hạn, hết hiệu lực khi namespace COURSES đổi version).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Hashable, List, Optional, Tuple
+
+from fastapi import HTTPException, status
+from sqlalchemy import and_, func, or_, select
+
+from ..models.course import Course
+from .catalog_cache import COURSES, catalog_cache
+
+# Sort modes: tên -> cột sắp xếp chính (luôn giảm dần, tie-break bằng id)
+SORT_COLUMNS = {
+    "newest": Course.created_at,
+    "popular": Course.enrollment_count,
+}
+DEFAULT_SORT = "newest"
+
+
+def _invalid_cursor() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+def encode_cursor(sort: str, course: Course) -> str:
+    """Cursor opaque (base64url JSON) trỏ tới sau course."""
+    value = getattr(course, SORT_COLUMNS[sort].key)
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([sort, value, course.id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(sort: str, cursor: str) -> Tuple[Any, int]:
+    """
+    Giải mã cursor thành (sort value, course id).
+
+    Raises:
+        HTTPException: 400 nếu cursor hỏng hoặc thuộc sort mode khác
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, value, course_id = json.loads(base64.urlsafe_b64decode(padded))
+        if cursor_sort != sort or not isinstance(course_id, int):
+            raise ValueError(cursor_sort)
+        if sort == "newest":
+            value = datetime.fromisoformat(value)
+        elif not isinstance(value, int):
+            raise ValueError(value)
+    except (ValueError, TypeError):
+        raise _invalid_cursor()
+    return value, course_id
+
+
+def _filters(category: Optional[str], difficulty_level: Optional[str]) -> List[Any]:
+    conditions = [Course.is_active == True]
+    if category:
+        conditions.append(Course.category == category)
+    if difficulty_level:
+        conditions.append(Course.difficulty_level == difficulty_level)
+    return conditions
+
+
+def page_statement(
+    sort: str,
+    limit: int,
+    cursor: Optional[str] = None,
+    category: Optional[str] = None,
+    difficulty_level: Optional[str] = None,
+):
+    """
+    Select một trang courses theo (sort column DESC, id DESC).
+
+    Lấy limit + 1 rows để biết còn trang sau hay không.
+    """
+    if sort not in SORT_COLUMNS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown sort: {sort}"
+        )
+    column = SORT_COLUMNS[sort]
+
+    conditions = _filters(category, difficulty_level)
+    if cursor:
+        value, course_id = decode_cursor(sort, cursor)
+        conditions.append(
+            or_(
+                column < value,
+                and_(column == value, Course.id < course_id)
+            )
+        )
+
+    return (
+        select(Course)
+        .where(and_(*conditions))
+        .order_by(column.desc(), Course.id.desc())
+        .limit(limit + 1)
+    )
+
+
+def build_page(sort: str, courses: List[Course], limit: int) -> Tuple[List[Course], Optional[str]]:
+    """Cắt row thừa và tạo next_cursor (None nếu là trang cuối)."""
+    if len(courses) <= limit:
+        return courses, None
+    courses = courses[:limit]
+    return courses, encode_cursor(sort, courses[-1])
+
+
+def count_statement(category: Optional[str] = None, difficulty_level: Optional[str] = None):
+    """COUNT courses active theo filter."""
+    return select(func.count(Course.id)).where(and_(*_filters(category, difficulty_level)))
+
+
+def count_cache_key(category: Optional[str], difficulty_level: Optional[str]) -> Hashable:
+    """
+    Key trong catalog cache của COUNT theo filter.
+
+    Lấy key trước khi đếm (xem CatalogCache.versioned_key) để count cũ
+    không bị lưu dưới version mới.
+    """
+    return catalog_cache.versioned_key(
+        (COURSES,), ("course_count", category or None, difficulty_level or None)
+    )
@@ -3,14 +3,28 @@ Course service cho SmartLearn system.
 Xử lý các nghiệp vụ liên quan đến khóa học.
 """
 
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from sqlalchemy import and_, func, select, update
 
 from ..models.course import Course
 from ..models.user_course_progress import UserCourseProgress
 from ..models.user import User
 from ..schemas.course import CourseCreate, CourseUpdate
+from .catalog_cache import (
+    COURSES, catalog_cache, invalidate_catalog_cache, read_through, read_through_async
+)
+from .catalog_snapshot import invalidate_catalog_snapshot
+from .course_pagination import (
+    DEFAULT_SORT, build_page, count_cache_key, count_statement, page_statement
+)
+
+
+def _catalog_changed() -> None:
+    """Invalidate mọi dữ liệu catalog cached sau khi ghi course."""
+    invalidate_catalog_cache(COURSES)
+    invalidate_catalog_snapshot()
 
 
 class CourseService:
@@ -32,13 +46,36 @@ class CourseService:
         db.add(course)
         db.commit()
         db.refresh(course)
+        _catalog_changed()
         
         return course
     
     @staticmethod
     def get_course(db: Session, course_id: int) -> Optional[Course]:
-        """Lấy thông tin khóa học theo ID."""
-        return db.query(Course).filter(Course.id == course_id).first()
+        """Lấy thông tin khóa học theo ID (read-through catalog cache)."""
+        courses = read_through(
+            db, (COURSES,), ("course", course_id),
+            lambda: [
+                course for course in [CourseService._load_course(db, course_id)]
+                if course is not None
+            ]
+        )
+        return courses[0] if courses else None
+    
+    @staticmethod
+    def _load_course(db: Session, course_id: int) -> Optional[Course]:
+        """
+        Đọc course trực tiếp từ DB (dùng cho các thao tác ghi).
+        
+        populate_existing: bản cached mà read_through đã merge vào session
+        có thể cũ, nên ghi đè bằng row vừa đọc thay vì trả lại bản đó.
+        """
+        return (
+            db.query(Course)
+            .filter(Course.id == course_id)
+            .populate_existing()
+            .first()
+        )
     
     @staticmethod
     def get_courses(
@@ -59,12 +96,52 @@ class CourseService:
         
         return query.offset(skip).limit(limit).all()
     
+    @staticmethod
+    def get_courses_page(
+        db: Session,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort: str = DEFAULT_SORT,
+        category: Optional[str] = None,
+        difficulty_level: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Lấy một trang khóa học bằng keyset pagination.
+        
+        Returns:
+            {"items": courses, "next_cursor": cursor hoặc None, "total": số courses theo filter}
+        """
+        courses = db.execute(
+            page_statement(sort, limit, cursor, category, difficulty_level)
+        ).scalars().all()
+        items, next_cursor = build_page(sort, courses, limit)
+        
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "total": CourseService.count_courses(db, category, difficulty_level)
+        }
+    
+    @staticmethod
+    def count_courses(
+        db: Session,
+        category: Optional[str] = None,
+        difficulty_level: Optional[str] = None
+    ) -> int:
+        """Tổng số khóa học active theo filter (cached)."""
+        key = count_cache_key(category, difficulty_level)
+        total = catalog_cache.get(key)
+        if total is None:
+            total = db.scalar(count_statement(category, difficulty_level))
+            catalog_cache.set(key, total)
+        return total
+    
     @staticmethod
     def update_course(
         db: Session, course_id: int, course_data: CourseUpdate
     ) -> Optional[Course]:
         """Cập nhật thông tin khóa học."""
-        course = CourseService.get_course(db, course_id)
+        course = CourseService._load_course(db, course_id)
         
         if not course:
             return None
@@ -76,43 +153,138 @@ class CourseService:
         
         db.commit()
         db.refresh(course)
+        _catalog_changed()
         
         return course
     
     @staticmethod
     def delete_course(db: Session, course_id: int) -> bool:
         """Xóa khóa học (soft delete)."""
-        course = CourseService.get_course(db, course_id)
+        course = CourseService._load_course(db, course_id)
         
         if not course:
             return False
         
         course.is_active = False
         db.commit()
+        _catalog_changed()
         
         return True
     
     @staticmethod
     def get_popular_courses(db: Session, limit: int = 10) -> List[Course]:
-        """Lấy danh sách khóa học phổ biến nhất."""
-        return (
-            db.query(Course)
-            .filter(
-                and_(
-                    Course.is_active == True,
-                    Course.is_published == True
+        """Lấy danh sách khóa học phổ biến nhất (read-through catalog cache)."""
+        return read_through(
+            db, (COURSES,), ("popular", limit),
+            lambda: (
+                db.query(Course)
+                .filter(
+                    and_(
+                        Course.is_active == True,
+                        Course.is_published == True
+                    )
                 )
+                .order_by(Course.enrollment_count.desc())
+                .limit(limit)
+                .all()
             )
-            .order_by(Course.enrollment_count.desc())
-            .limit(limit)
-            .all()
         )
     
     @staticmethod
     def increment_enrollment(db: Session, course_id: int) -> None:
-        """Tăng enrollment count cho khóa học."""
-        course = CourseService.get_course(db, course_id)
+        """Tăng enrollment count cho khóa học (một UPDATE atomic)."""
+        db.execute(
+            update(Course)
+            .where(Course.id == course_id)
+            .values(enrollment_count=Course.enrollment_count + 1)
+            .execution_options(synchronize_session=False)
+        )
+        db.commit()
+
+
+class AsyncCourseService:
+    """Async variants (AsyncSession) của các truy vấn đọc catalog."""
+
+    @staticmethod
+    async def get_course(db: AsyncSession, course_id: int) -> Optional[Course]:
+        """Lấy thông tin khóa học theo ID (read-through catalog cache)."""
+        async def load() -> List[Course]:
+            course = await db.get(Course, course_id)
+            return [course] if course is not None else []
+        
+        courses = await read_through_async(db, (COURSES,), ("course", course_id), load)
+        return courses[0] if courses else None
+    
+    @staticmethod
+    async def get_courses(
+        db: AsyncSession,
+        skip: int = 0,
+        limit: int = 100,
+        category: Optional[str] = None,
+        difficulty_level: Optional[str] = None
+    ) -> List[Course]:
+        """Lấy danh sách khóa học với pagination và filter."""
+        query = select(Course).where(Course.is_active == True)
+        
+        if category:
+            query = query.where(Course.category == category)
+        
+        if difficulty_level:
+            query = query.where(Course.difficulty_level == difficulty_level)
+        
+        result = await db.scalars(query.offset(skip).limit(limit))
+        return list(result.all())
+    
+    @staticmethod
+    async def get_courses_page(
+        db: AsyncSession,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+        sort: str = DEFAULT_SORT,
+        category: Optional[str] = None,
+        difficulty_level: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Lấy một trang khóa học bằng keyset pagination."""
+        result = await db.scalars(
+            page_statement(sort, limit, cursor, category, difficulty_level)
+        )
+        items, next_cursor = build_page(sort, list(result.all()), limit)
+        
+        return {
+            "items": items,
+            "next_cursor": next_cursor,
+            "total": await AsyncCourseService.count_courses(db, category, difficulty_level)
+        }
+    
+    @staticmethod
+    async def count_courses(
+        db: AsyncSession,
+        category: Optional[str] = None,
+        difficulty_level: Optional[str] = None
+    ) -> int:
+        """Tổng số khóa học active theo filter (cached)."""
+        key = count_cache_key(category, difficulty_level)
+        total = catalog_cache.get(key)
+        if total is None:
+            total = await db.scalar(count_statement(category, difficulty_level))
+            catalog_cache.set(key, total)
+        return total
+    
+    @staticmethod
+    async def get_popular_courses(db: AsyncSession, limit: int = 10) -> List[Course]:
+        """Lấy danh sách khóa học phổ biến nhất (read-through catalog cache)."""
+        async def load() -> List[Course]:
+            result = await db.scalars(
+                select(Course)
+                .where(
+                    and_(
+                        Course.is_active == True,
+                        Course.is_published == True
+                    )
+                )
+                .order_by(Course.enrollment_count.desc())
+                .limit(limit)
+            )
+            return list(result.all())
         
-        if course:
-            course.enrollment_count += 1
-            db.commit()
\ No newline at end of file
+        return await read_through_async(db, (COURSES,), ("popular", limit), load)
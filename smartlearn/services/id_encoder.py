@@ -0,0 +1,119 @@
+"""
+ID encoders cho SmartLearn recommendation system.
+Map raw user/course IDs <-> index trong factor matrices bằng int64 arrays
+thay cho Python dicts (nhỏ hơn nhiều, load bằng np.load/mmap).
+"""
+
+import os
+import pickle
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+USER_IDS_FILE = "user_ids.npy"
+ITEM_IDS_FILE = "item_ids.npy"
+LEGACY_MAPPINGS_FILE = "mappings.pkl"
+
+
+class IdEncoder:
+    """
+    Encoder dựa trên array raw IDs theo thứ tự index.
+
+    decode(index) = ids[index]; encode dùng searchsorted trên bản sorted
+    của ids. Khi ids đã sorted (trường hợp train từ đầu) không cần thêm
+    array nào; ids được append sau đó (incremental update) dùng argsort.
+    """
+
+    def __init__(self, ids: np.ndarray):
+        # asarray không copy khi ids đã là int64 (kể cả memory-mapped)
+        self.ids = np.asarray(ids, dtype=np.int64)
+
+        if len(self.ids) < 2 or np.all(self.ids[:-1] < self.ids[1:]):
+            self._sorted_ids = self.ids
+            self._sorter: Optional[np.ndarray] = None
+        else:
+            self._sorter = np.argsort(self.ids, kind="stable")
+            self._sorted_ids = self.ids[self._sorter]
+
+    @classmethod
+    def from_ids(cls, raw_ids: Any) -> "IdEncoder":
+        """Build encoder từ raw IDs (có thể trùng), index theo thứ tự sorted."""
+        return cls(np.unique(np.asarray(raw_ids, dtype=np.int64)))
+
+    @classmethod
+    def from_decoder(cls, decoder: Dict[int, Any]) -> "IdEncoder":
+        """Convert decoder dict (index -> raw ID) của mappings.pkl cũ."""
+        return cls(np.array([decoder[idx] for idx in range(len(decoder))], dtype=np.int64))
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, raw_id: Any) -> bool:
+        return self.get(raw_id) is not None
+
+    def __getitem__(self, raw_id: Any) -> int:
+        idx = self.get(raw_id)
+        if idx is None:
+            raise KeyError(raw_id)
+        return idx
+
+    def get(self, raw_id: Any, default: Optional[int] = None) -> Optional[int]:
+        """Index của một raw ID, hoặc default nếu không có."""
+        idx = int(self.encode(np.array([raw_id]))[0])
+        return idx if idx >= 0 else default
+
+    def encode(self, raw_ids: Any) -> np.ndarray:
+        """Bulk encode raw IDs -> indices (-1 cho IDs không có)."""
+        raw_ids = np.asarray(raw_ids, dtype=np.int64)
+        if len(self.ids) == 0:
+            return np.full(raw_ids.shape, -1, dtype=np.int64)
+
+        positions = np.searchsorted(self._sorted_ids, raw_ids)
+        np.minimum(positions, len(self.ids) - 1, out=positions)
+        found = self._sorted_ids[positions] == raw_ids
+
+        indices = positions if self._sorter is None else self._sorter[positions]
+        return np.where(found, indices, -1)
+
+    def decode(self, indices: Any) -> np.ndarray:
+        """Bulk decode indices -> raw IDs."""
+        return self.ids[np.asarray(indices, dtype=np.int64)]
+
+    def extend(self, raw_ids: Any) -> Tuple["IdEncoder", int]:
+        """
+        Thêm IDs mới vào cuối (index cũ giữ nguyên).
+
+        Returns:
+            Tuple (encoder mới, số IDs đã thêm)
+        """
+        raw_ids = np.unique(np.asarray(raw_ids, dtype=np.int64))
+        new_ids = raw_ids[self.encode(raw_ids) < 0]
+        if len(new_ids) == 0:
+            return self, 0
+        return IdEncoder(np.concatenate([np.asarray(self.ids), new_ids])), len(new_ids)
+
+
+def save_mappings(mappings: Dict[str, IdEncoder], path: str) -> None:
+    """Lưu user/item encoders ra .npy."""
+    np.save(os.path.join(path, USER_IDS_FILE), np.asarray(mappings["user_encoder"].ids))
+    np.save(os.path.join(path, ITEM_IDS_FILE), np.asarray(mappings["item_encoder"].ids))
+
+
+def load_mappings(path: str, mmap_mode: Optional[str] = "r") -> Dict[str, IdEncoder]:
+    """Load user/item encoders; hỗ trợ mappings.pkl (dicts) của các version cũ."""
+    users_path = os.path.join(path, USER_IDS_FILE)
+    items_path = os.path.join(path, ITEM_IDS_FILE)
+
+    if os.path.exists(users_path) and os.path.exists(items_path):
+        return {
+            "user_encoder": IdEncoder(np.load(users_path, mmap_mode=mmap_mode)),
+            "item_encoder": IdEncoder(np.load(items_path, mmap_mode=mmap_mode)),
+        }
+
+    with open(os.path.join(path, LEGACY_MAPPINGS_FILE), "rb") as f:
+        legacy = pickle.load(f)
+
+    return {
+        "user_encoder": IdEncoder.from_decoder(legacy["user_decoder"]),
+        "item_encoder": IdEncoder.from_decoder(legacy["item_decoder"]),
+    }
@@ -0,0 +1,186 @@
+"""
+Item similarity index cho SmartLearn recommendation system.
+Tính trước "similar courses" từ item factors (qi) của SVD model lúc train,
+để serving chỉ còn là một lần đọc hàng trong bảng neighbors.
+"""
+
+import os
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .recommendation_engine import top_k_rows
+
+SIMILAR_ITEMS_FILE = "similar_items.npy"
+SIMILAR_SCORES_FILE = "similar_scores.npy"
+
+# Số neighbors lưu cho mỗi item
+DEFAULT_N_NEIGHBORS = 50
+
+# Catalog nhỏ hơn ngưỡng này dùng exact search, lớn hơn dùng IVF
+EXACT_SEARCH_THRESHOLD = 20000
+
+# Số item mỗi block khi nhân ma trận (giới hạn memory block x n_items)
+DEFAULT_BLOCK_SIZE = 1024
+
+
+def _normalize(item_factors: np.ndarray) -> np.ndarray:
+    """L2-normalize item factors để dot product = cosine similarity."""
+    vectors = np.asarray(item_factors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def _exact_neighbors(
+    vectors: np.ndarray, n_neighbors: int, block_size: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Exact cosine top-k theo từng block items."""
+    n_items = vectors.shape[0]
+    neighbors = np.empty((n_items, n_neighbors), dtype=np.int32)
+    scores = np.empty((n_items, n_neighbors), dtype=np.float32)
+
+    for start in range(0, n_items, block_size):
+        stop = min(start + block_size, n_items)
+        sims = vectors[start:stop] @ vectors.T
+        sims[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        indices = top_k_rows(sims, n_neighbors)
+        neighbors[start:stop] = indices
+        scores[start:stop] = np.take_along_axis(sims, indices, axis=1)
+
+    return neighbors, scores
+
+
+def _kmeans(
+    vectors: np.ndarray, n_lists: int, n_iter: int, seed: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Spherical k-means đơn giản: trả về (centroids, assignment của từng item)."""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(vectors.shape[0], n_lists, replace=False)].copy()
+
+    for _ in range(n_iter):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assignment, vectors)
+        empty = np.bincount(assignment, minlength=n_lists) == 0
+        sums[empty] = centroids[empty]
+        centroids = _normalize(sums)
+
+    return centroids, np.argmax(vectors @ centroids.T, axis=1)
+
+
+def _ivf_neighbors(
+    vectors: np.ndarray,
+    n_neighbors: int,
+    n_lists: int,
+    n_probe: int,
+    block_size: int,
+    seed: int,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Approximate top-k bằng inverted file index.
+
+    Items được chia vào n_lists cluster; items trong cùng cluster chỉ so với
+    items thuộc n_probe cluster gần centroid của chúng nhất.
+    """
+    n_items = vectors.shape[0]
+    centroids, assignment = _kmeans(vectors, n_lists, n_iter=10, seed=seed)
+
+    probe_lists = top_k_rows(centroids @ centroids.T, min(n_probe, n_lists))
+    members = [np.flatnonzero(assignment == c) for c in range(n_lists)]
+
+    neighbors = np.full((n_items, n_neighbors), -1, dtype=np.int32)
+    scores = np.full((n_items, n_neighbors), -np.inf, dtype=np.float32)
+
+    for c in range(n_lists):
+        queries = members[c]
+        if len(queries) == 0:
+            continue
+
+        candidates = np.concatenate([members[p] for p in probe_lists[c]])
+        candidate_vectors = vectors[candidates]
+        k = min(n_neighbors, len(candidates))
+
+        for start in range(0, len(queries), block_size):
+            block = queries[start:start + block_size]
+            sims = vectors[block] @ candidate_vectors.T
+            sims[block[:, None] == candidates[None, :]] = -np.inf
+
+            indices = top_k_rows(sims, k)
+            neighbors[block, :k] = candidates[indices]
+            scores[block, :k] = np.take_along_axis(sims, indices, axis=1)
+
+    neighbors[~np.isfinite(scores)] = -1
+    return neighbors, scores
+
+
+def build_similarity_index(
+    item_factors: np.ndarray,
+    n_neighbors: int = DEFAULT_N_NEIGHBORS,
+    exact_threshold: int = EXACT_SEARCH_THRESHOLD,
+    n_lists: Optional[int] = None,
+    n_probe: int = 8,
+    block_size: int = DEFAULT_BLOCK_SIZE,
+    seed: int = 42,
+) -> "ItemSimilarityIndex":
+    """
+    Build bảng neighbors cosine similarity cho mọi item.
+
+    Args:
+        item_factors: Item factor matrix (n_items, n_factors)
+        n_neighbors: Số neighbors mỗi item
+        exact_threshold: Catalog nhỏ hơn ngưỡng này dùng exact search
+        n_lists: Số cluster IVF (mặc định ~sqrt(n_items))
+        n_probe: Số cluster được so cho mỗi item khi dùng IVF
+        block_size: Số items mỗi block khi nhân ma trận
+        seed: Random seed cho k-means
+
+    Returns:
+        ItemSimilarityIndex; ô trống (catalog nhỏ) có index -1
+    """
+    vectors = _normalize(item_factors)
+    n_items = vectors.shape[0]
+    k = min(n_neighbors, max(n_items - 1, 0))
+
+    if n_items <= exact_threshold:
+        neighbors, scores = _exact_neighbors(vectors, k, block_size)
+    else:
+        if n_lists is None:
+            n_lists = int(np.sqrt(n_items))
+        neighbors, scores = _ivf_neighbors(vectors, k, n_lists, n_probe, block_size, seed)
+
+    return ItemSimilarityIndex(neighbors, scores)
+
+
+class ItemSimilarityIndex:
+    """Bảng neighbors (item index) và cosine similarity đã tính trước."""
+
+    def __init__(self, neighbors: np.ndarray, scores: np.ndarray):
+        self.neighbors = neighbors
+        self.scores = scores
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Kiểm tra thư mục có chứa similarity index hay không."""
+        return os.path.exists(os.path.join(path, SIMILAR_ITEMS_FILE))
+
+    def save(self, path: str) -> None:
+        """Lưu index ra .npy."""
+        np.save(os.path.join(path, SIMILAR_ITEMS_FILE), self.neighbors)
+        np.save(os.path.join(path, SIMILAR_SCORES_FILE), self.scores)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = "r") -> "ItemSimilarityIndex":
+        """Load index (memory-mapped mặc định)."""
+        return cls(
+            np.load(os.path.join(path, SIMILAR_ITEMS_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, SIMILAR_SCORES_FILE), mmap_mode=mmap_mode),
+        )
+
+    def similar(self, item_idx: int, k: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k items giống item_idx nhất (đã sắp xếp giảm dần); k=None lấy cả row."""
+        neighbors = np.asarray(self.neighbors[item_idx, :k])
+        scores = np.asarray(self.scores[item_idx, :k])
+        valid = neighbors >= 0
+        return neighbors[valid], scores[valid]
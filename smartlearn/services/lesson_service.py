@@ -9,6 +9,7 @@ from typing import Optional, List
 from sqlalchemy import and_, func, or_
 from sqlalchemy.orm import Session
 
+from ..models.course import Course
 from ..models.lesson import Lesson
 from ..models.quiz import Quiz
 from ..models.resource import Resource
@@ -17,6 +18,10 @@ from ..models.user_course_progress import UserCourseProgress
 from ..models.user_lesson_progress import UserLessonProgress
 from ..models.user import User
 from ..schemas.lesson import LessonUpdate
+from .catalog_cache import COURSES, LESSONS, invalidate_catalog_cache, read_through
+from .progress_counters import (
+    adjust_completed_lessons, adjust_lesson_count, mark_lesson_completed
+)
 
 
 class LessonService:
@@ -29,12 +34,15 @@ class LessonService:
     
     @staticmethod
     def get_lessons_by_course(db: Session, course_id: int) -> List[Lesson]:
-        """Lấy danh sách bài học theo khóa học."""
-        return (
-            db.query(Lesson)
-            .filter(Lesson.course_id == course_id)
-            .order_by(Lesson.order_index)
-            .all()
+        """Lấy danh sách bài học theo khóa học (read-through catalog cache)."""
+        return read_through(
+            db, (LESSONS,), ("course_lessons", course_id),
+            lambda: (
+                db.query(Lesson)
+                .filter(Lesson.course_id == course_id)
+                .order_by(Lesson.order_index)
+                .all()
+            )
         )
     
     @staticmethod
@@ -42,8 +50,12 @@ class LessonService:
         """Tạo bài học mới."""
         lesson = Lesson(**lesson_data)
         db.add(lesson)
+        db.flush()
+        adjust_lesson_count(db, lesson.course_id, 1)
         db.commit()
         db.refresh(lesson)
+        # Lesson list và Course.lesson_count đều đổi
+        invalidate_catalog_cache(COURSES, LESSONS)
         
         return lesson
     
@@ -54,12 +66,60 @@ class LessonService:
         """Cập nhật thông tin bài học."""
         lesson = LessonService.get_lesson(db, lesson_id)
         if lesson:
+            old_course_id = lesson.course_id
             for field, value in lesson_update.dict(exclude_unset=True).items():
                 setattr(lesson, field, value)
+            
+            # Lesson chuyển sang khóa học khác: chuyển counters theo
+            if lesson.course_id != old_course_id:
+                adjust_lesson_count(db, old_course_id, -1)
+                adjust_lesson_count(db, lesson.course_id, 1)
+                for user_id, in LessonService._completed_by(db, lesson_id):
+                    adjust_completed_lessons(db, user_id, old_course_id, -1)
+                    adjust_completed_lessons(db, user_id, lesson.course_id, 1)
+            
             db.commit()
             db.refresh(lesson)
+            invalidate_catalog_cache(COURSES, LESSONS)
         return lesson
     
+    @staticmethod
+    def _completed_by(db: Session, lesson_id: int) -> List[tuple]:
+        """Rows (user_id,) của các users đã hoàn thành lesson."""
+        return (
+            db.query(UserLessonProgress.user_id)
+            .filter(
+                and_(
+                    UserLessonProgress.lesson_id == lesson_id,
+                    UserLessonProgress.completed == True
+                )
+            )
+            .distinct()
+            .all()
+        )
+    
+    @staticmethod
+    def delete_lesson(db: Session, lesson_id: int) -> bool:
+        """Xóa bài học và cập nhật counters của khóa học và các enrollments."""
+        lesson = LessonService.get_lesson(db, lesson_id)
+        if not lesson:
+            return False
+        
+        # Users đã hoàn thành lesson này mất một completed lesson
+        for user_id, in LessonService._completed_by(db, lesson_id):
+            adjust_completed_lessons(db, user_id, lesson.course_id, -1)
+        
+        db.query(UserLessonProgress).filter(
+            UserLessonProgress.lesson_id == lesson_id
+        ).delete(synchronize_session=False)
+        
+        adjust_lesson_count(db, lesson.course_id, -1)
+        db.delete(lesson)
+        db.commit()
+        invalidate_catalog_cache(COURSES, LESSONS)
+        
+        return True
+    
     @staticmethod
     def get_user_lesson_progress(
         db: Session, user_id: int, lesson_id: int
@@ -90,11 +150,19 @@ class LessonService:
             )
             db.add(progress)
         
-        # Update progress fields
+        # Update progress fields (completed đổi riêng bên dưới)
         for field, value in progress_data.items():
-            setattr(progress, field, value)
+            if field != "completed":
+                setattr(progress, field, value)
         
         progress.last_accessed = datetime.utcnow()
+        db.flush()
+        
+        # Completed counter chỉ đổi khi request này đổi trạng thái completed
+        completed = progress_data.get("completed")
+        if completed is not None and mark_lesson_completed(db, user_id, lesson_id, bool(completed)):
+            course_id = db.query(Lesson.course_id).filter(Lesson.id == lesson_id).scalar()
+            adjust_completed_lessons(db, user_id, course_id, 1 if completed else -1)
         
         db.commit()
         db.refresh(progress)
@@ -105,26 +173,22 @@ class LessonService:
     def get_course_completion_percentage(
         db: Session, user_id: int, course_id: int
     ) -> float:
-        """Tính phần trăm hoàn thành khóa học."""
-        
-        # Get total lessons in course
-        total_lessons = db.query(Lesson).filter(Lesson.course_id == course_id).count()
+        """Tính phần trăm hoàn thành khóa học (đọc counters, một row)."""
         
-        if total_lessons == 0:
-            return 0.0
-        
-        # Get completed lessons
-        completed_lessons = (
-            db.query(UserLessonProgress)
-            .join(Lesson, UserLessonProgress.lesson_id == Lesson.id)
+        counts = (
+            db.query(Course.lesson_count, UserCourseProgress.completed_lessons)
+            .join(UserCourseProgress, UserCourseProgress.course_id == Course.id)
             .filter(
                 and_(
-                    UserLessonProgress.user_id == user_id,
-                    Lesson.course_id == course_id,
-                    UserLessonProgress.completed == True
+                    Course.id == course_id,
+                    UserCourseProgress.user_id == user_id
                 )
             )
-            .count()
+            .first()
         )
         
-        return round((completed_lessons / total_lessons) * 100, 2)
\ No newline at end of file
+        if not counts or not counts.lesson_count:
+            return 0.0
+        
+        total_lessons, completed_lessons = counts
+        return round((min(completed_lessons, total_lessons) / total_lessons) * 100, 2)
\ No newline at end of file
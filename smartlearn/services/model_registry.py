@@ -0,0 +1,435 @@
+"""
+Model registry cho SmartLearn recommendation system.
+Quản lý các phiên bản model trong ml_pipeline/models và hot-reload
+phiên bản mới mà không cần restart process.
+
+Layout:
+    models/
+        CURRENT                 # tên version đang active
+        versions/<version>/     # *.npy factors, *_ids.npy, topk_*.npy, ...
+            manifest.json       # version, sha256 từng file, metrics/training info
+
+Các version mới không chứa pickle; pickle chỉ còn được đọc để chuyển đổi
+model ở layout cũ.
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .id_encoder import ITEM_IDS_FILE, USER_IDS_FILE, IdEncoder, load_mappings
+from .item_similarity import ItemSimilarityIndex
+from .recommendation_engine import (
+    ENGINE_META_FILE, ITEM_BIAS_FILE, ITEM_FACTORS_FILE, USER_BIAS_FILE, USER_FACTORS_FILE,
+    ScoringEngine
+)
+
+MODELS_DIR = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), "..", "ml_pipeline", "models")
+)
+
+CURRENT_FILE = "CURRENT"
+VERSIONS_DIR = "versions"
+LEGACY_VERSION = "legacy"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_FORMAT = 1
+LEGACY_INFO_FILE = "training_info.pkl"
+
+# Artifacts bắt buộc của mọi version không phải legacy
+REQUIRED_FILES = (
+    ENGINE_META_FILE, USER_FACTORS_FILE, ITEM_FACTORS_FILE, USER_BIAS_FILE, ITEM_BIAS_FILE,
+    USER_IDS_FILE, ITEM_IDS_FILE,
+)
+
+# Số versions giữ lại trên disk (để rollback)
+DEFAULT_KEEP_VERSIONS = 5
+
+# Chu kỳ kiểm tra version mới (giây)
+DEFAULT_POLL_INTERVAL = 30.0
+
+
+def new_version_name() -> str:
+    """Tạo tên version theo thời gian (sắp xếp được theo thứ tự train)."""
+    return datetime.utcnow().strftime("%Y%m%dT%H%M%S%f")
+
+
+def version_dir(version: str, models_dir: str = MODELS_DIR) -> str:
+    """Đường dẫn thư mục của một version."""
+    if version == LEGACY_VERSION:
+        return models_dir
+    return os.path.join(models_dir, VERSIONS_DIR, version)
+
+
+def create_version_dir(models_dir: str = MODELS_DIR) -> Tuple[str, str]:
+    """Tạo thư mục cho version mới, trả về (version, path)."""
+    version = new_version_name()
+    path = version_dir(version, models_dir)
+    os.makedirs(path, exist_ok=False)
+    return version, path
+
+
+def read_current_version(models_dir: str = MODELS_DIR) -> Optional[str]:
+    """Đọc version đang active; 'legacy' nếu chỉ có file pickle ở layout cũ."""
+    current_path = os.path.join(models_dir, CURRENT_FILE)
+    try:
+        with open(current_path, "r", encoding="utf-8") as f:
+            version = f.read().strip()
+        return version or None
+    except FileNotFoundError:
+        if os.path.exists(os.path.join(models_dir, "svd_model.pkl")):
+            return LEGACY_VERSION
+        return None
+
+
+def publish_version(version: str, models_dir: str = MODELS_DIR) -> None:
+    """Chuyển CURRENT sang version (atomic rename, reader không thấy file dở dang)."""
+    current_path = os.path.join(models_dir, CURRENT_FILE)
+    tmp_path = f"{current_path}.{os.getpid()}.tmp"
+
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(version)
+        f.flush()
+        os.fsync(f.fileno())
+
+    os.replace(tmp_path, current_path)
+
+
+def clone_version(
+    version: str, exclude: Tuple[str, ...] = (), models_dir: str = MODELS_DIR
+) -> Tuple[str, str]:
+    """
+    Tạo version mới chứa artifacts của version (trừ manifest và exclude).
+
+    Files được hard-link (artifacts bất biến sau khi publish), copy nếu
+    filesystem không hỗ trợ; caller ghi thêm artifacts rồi write_manifest.
+    """
+    source = version_dir(version, models_dir)
+    new_version, path = create_version_dir(models_dir)
+    for name in os.listdir(source):
+        source_path = os.path.join(source, name)
+        if name == MANIFEST_FILE or name in exclude or not os.path.isfile(source_path):
+            continue
+        try:
+            os.link(source_path, os.path.join(path, name))
+        except OSError:
+            shutil.copy2(source_path, os.path.join(path, name))
+    return new_version, path
+
+
+def list_versions(models_dir: str = MODELS_DIR) -> List[str]:
+    """Danh sách versions trên disk, cũ nhất trước."""
+    root = os.path.join(models_dir, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name))
+    )
+
+
+def previous_version(models_dir: str = MODELS_DIR) -> Optional[str]:
+    """Version ngay trước version đang active (đích rollback mặc định)."""
+    current = read_current_version(models_dir)
+    versions = list_versions(models_dir)
+    if current not in versions:
+        return versions[-1] if versions else None
+    position = versions.index(current)
+    return versions[position - 1] if position > 0 else None
+
+
+def prune_versions(keep: int = DEFAULT_KEEP_VERSIONS, models_dir: str = MODELS_DIR) -> None:
+    """Xóa versions cũ, luôn giữ lại version đang active."""
+    current = read_current_version(models_dir)
+    versions = list_versions(models_dir)
+
+    for version in versions[:-keep] if keep > 0 else versions:
+        if version != current:
+            shutil.rmtree(version_dir(version, models_dir), ignore_errors=True)
+
+
+def _sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _json_default(value: Any) -> Any:
+    """Cho phép numpy scalars/arrays trong training info."""
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def write_manifest(path: str, info: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Ghi manifest.json cho thư mục version (gọi sau khi đã ghi xong mọi artifact).
+
+    Manifest liệt kê sha256 và kích thước của từng file cùng training
+    info (metrics, params, checkpoint...). Ghi tạm rồi os.replace.
+    """
+    files = {}
+    for name in sorted(os.listdir(path)):
+        file_path = os.path.join(path, name)
+        if name == MANIFEST_FILE or name.endswith(".tmp") or not os.path.isfile(file_path):
+            continue
+        files[name] = {"sha256": _sha256(file_path), "bytes": os.path.getsize(file_path)}
+
+    manifest = {
+        "format": MANIFEST_FORMAT,
+        "version": os.path.basename(os.path.normpath(path)),
+        "created_at": datetime.utcnow().isoformat(),
+        "files": files,
+        "info": info or {},
+    }
+
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    tmp_path = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, default=_json_default)
+    os.replace(tmp_path, manifest_path)
+
+    return manifest
+
+
+def read_manifest(path: str) -> Optional[Dict[str, Any]]:
+    """Manifest của version, None nếu version không có (layout cũ)."""
+    try:
+        with open(os.path.join(path, MANIFEST_FILE), "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def read_training_info(version: str, models_dir: str = MODELS_DIR) -> Dict[str, Any]:
+    """
+    Training info của version: từ manifest, hoặc training_info.pkl của layout legacy.
+
+    Raises:
+        ValueError: Version không phải legacy mà không có manifest
+    """
+    path = version_dir(version, models_dir)
+    manifest = read_manifest(path)
+    if manifest is not None:
+        return manifest.get("info", {})
+
+    if version != LEGACY_VERSION:
+        raise ValueError(f"Version {version} is corrupt: {MANIFEST_FILE} missing")
+
+    legacy_path = os.path.join(path, LEGACY_INFO_FILE)
+    if os.path.exists(legacy_path):
+        with open(legacy_path, "rb") as f:
+            return pickle.load(f)
+    return {}
+
+
+def verify_version(version: str, models_dir: str = MODELS_DIR, checksums: bool = True) -> List[str]:
+    """
+    Kiểm tra artifacts của version theo manifest.
+
+    Args:
+        checksums: False chỉ so sánh kích thước file (nhanh, dùng khi load)
+
+    Returns:
+        Danh sách lỗi (rỗng nếu hợp lệ)
+    """
+    path = version_dir(version, models_dir)
+    manifest = read_manifest(path)
+    if manifest is None:
+        return [f"{MANIFEST_FILE} not found"]
+
+    problems = []
+    for name, entry in manifest.get("files", {}).items():
+        file_path = os.path.join(path, name)
+        if not os.path.exists(file_path):
+            problems.append(f"{name}: missing")
+        elif os.path.getsize(file_path) != entry["bytes"]:
+            problems.append(f"{name}: size mismatch")
+        elif checksums and _sha256(file_path) != entry["sha256"]:
+            problems.append(f"{name}: checksum mismatch")
+    return problems
+
+
+class LoadedModel:
+    """Bundle bất biến của một version đã load; swap nguyên bundle khi reload."""
+
+    def __init__(
+        self,
+        version: str,
+        path: str,
+        mappings: Dict[str, IdEncoder],
+        engine: ScoringEngine,
+        topk_items: Optional[np.ndarray] = None,
+        topk_scores: Optional[np.ndarray] = None,
+        similarity: Optional[ItemSimilarityIndex] = None,
+        manifest: Optional[Dict[str, Any]] = None,
+    ):
+        self.version = version
+        self.path = path
+        self.mappings = mappings
+        self.engine = engine
+        self.topk_items = topk_items
+        self.topk_scores = topk_scores
+        self.similarity = similarity
+        self.manifest = manifest
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """Training info (metrics, params, checkpoint) từ manifest."""
+        return (self.manifest or {}).get("info", {})
+
+
+def load_version(version: str, models_dir: str = MODELS_DIR) -> LoadedModel:
+    """
+    Load mappings, scoring engine, top-K store và similarity index của một version.
+
+    Version có manifest được kiểm tra nhanh (file tồn tại, đúng kích thước)
+    trước khi map; checksum đầy đủ do verify_version/model_versions.py làm.
+    Chỉ version legacy được đọc pickle; version khác thiếu manifest hoặc
+    .npy arrays là corrupt (không unpickle file lạ nằm trong thư mục version).
+
+    Raises:
+        ValueError: Artifacts không khớp manifest hoặc thiếu arrays
+    """
+    path = version_dir(version, models_dir)
+    legacy = version == LEGACY_VERSION
+
+    manifest = read_manifest(path)
+    if manifest is not None:
+        problems = verify_version(version, models_dir, checksums=False)
+        if problems:
+            raise ValueError(f"Version {version} is corrupt: {', '.join(problems)}")
+    elif not legacy:
+        raise ValueError(f"Version {version} is corrupt: {MANIFEST_FILE} missing")
+
+    if not legacy:
+        missing = [name for name in REQUIRED_FILES if not os.path.exists(os.path.join(path, name))]
+        if missing:
+            raise ValueError(f"Version {version} is corrupt: {', '.join(missing)} missing")
+
+    mappings = load_mappings(path, mmap_mode="r")
+
+    if ScoringEngine.exists(path):
+        # Factor matrices memory-mapped, dùng chung giữa các workers
+        engine = ScoringEngine.load(path, mmap_mode="r")
+    else:
+        # Layout cũ chỉ có pickle: extract factors từ SVD object
+        with open(os.path.join(path, "svd_model.pkl"), "rb") as f:
+            engine = ScoringEngine.from_svd(pickle.load(f), mappings)
+
+    topk_items = topk_scores = None
+    items_path = os.path.join(path, "topk_items.npy")
+    scores_path = os.path.join(path, "topk_scores.npy")
+    if os.path.exists(items_path) and os.path.exists(scores_path):
+        topk_items = np.load(items_path, mmap_mode="r")
+        topk_scores = np.load(scores_path, mmap_mode="r")
+
+    similarity = None
+    if ItemSimilarityIndex.exists(path):
+        similarity = ItemSimilarityIndex.load(path, mmap_mode="r")
+
+    return LoadedModel(
+        version, path, mappings, engine, topk_items, topk_scores, similarity, manifest
+    )
+
+
+class ModelRegistry:
+    """
+    Giữ model đang active và hot-reload khi CURRENT đổi.
+
+    Request chỉ đọc reference tới bundle hiện tại (không lock); reload
+    load version mới hoàn toàn rồi mới gán lại reference, nên request
+    đang chạy vẫn dùng bundle cũ đến khi xong.
+    """
+
+    def __init__(
+        self, models_dir: str = MODELS_DIR, poll_interval: float = DEFAULT_POLL_INTERVAL
+    ):
+        self.models_dir = models_dir
+        self.poll_interval = poll_interval
+        self._current: Optional[LoadedModel] = None
+        self._stamp: Optional[Tuple[str, int]] = None
+        self._load_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def _read_stamp(self) -> Optional[Tuple[str, int]]:
+        """(version, mtime của CURRENT) - đổi khi version được publish lại."""
+        version = read_current_version(self.models_dir)
+        if version is None:
+            return None
+
+        current_path = os.path.join(self.models_dir, CURRENT_FILE)
+        try:
+            mtime = os.stat(current_path).st_mtime_ns
+        except FileNotFoundError:
+            mtime = 0
+        return version, mtime
+
+    def get(self) -> Optional[LoadedModel]:
+        """Bundle hiện tại; load đồng bộ ở lần đầu nếu chưa preload."""
+        current = self._current
+        if current is None:
+            self.refresh()
+            current = self._current
+        return current
+
+    def refresh(self) -> bool:
+        """Load version mới nếu CURRENT đổi. Returns True nếu đã swap."""
+        with self._load_lock:
+            stamp = self._read_stamp()
+            if stamp is None or stamp == self._stamp:
+                return False
+
+            try:
+                bundle = load_version(stamp[0], self.models_dir)
+            except FileNotFoundError:
+                print("⚠️ Model files not found. Please train the model first.")
+                return False
+            except Exception as e:
+                print(f"❌ Error loading model version {stamp[0]}: {e}")
+                return False
+
+            self._current = bundle
+            self._stamp = stamp
+            print(f"✅ Model version {bundle.version} loaded")
+            return True
+
+    def preload(self) -> None:
+        """Load model trước khi nhận request (gọi trong lifespan startup)."""
+        self.refresh()
+
+    def _watch(self) -> None:
+        while not self._stop_event.wait(self.poll_interval):
+            self.refresh()
+
+    def start_watching(self) -> None:
+        """Chạy background thread kiểm tra version mới theo poll_interval."""
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop_event.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, name="model-registry-watcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        """Dừng background watcher."""
+        self._stop_event.set()
+        if self._watcher is not None:
+            self._watcher.join(timeout=5)
+            self._watcher = None
+
+
+# Registry dùng chung trong process
+model_registry = ModelRegistry()
@@ -0,0 +1,181 @@
+"""
+Password hashing pool cho SmartLearn system.
+bcrypt chạy trong một process pool riêng để CPU của login/register không
+chiếm FastAPI threadpool và event loop; số jobs đang chờ bị giới hạn, vượt
+quá thì trả 503 thay vì xếp hàng vô hạn.
+
+Mỗi uvicorn worker có pool riêng, nên số workers của pool mặc định là
+cores / WEB_CONCURRENCY (số uvicorn workers); đặt HASH_POOL_WORKERS để
+cấu hình trực tiếp. Worker process chết (BrokenProcessPool) thì pool được
+tạo lại và job chạy lại một lần.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Optional
+
+from fastapi import HTTPException, status
+from passlib.context import CryptContext
+
+# Password hashing context (mỗi worker process có bản riêng)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def _default_workers() -> int:
+    """Chia cores cho các uvicorn workers cùng máy (mỗi worker một pool)."""
+    configured = os.environ.get("HASH_POOL_WORKERS")
+    if configured:
+        return max(1, int(configured))
+    web_workers = max(1, int(os.environ.get("WEB_CONCURRENCY", "1")))
+    return max(1, (os.cpu_count() or 1) // web_workers)
+
+
+HASH_POOL_WORKERS = _default_workers()
+
+# Tối đa số jobs đang chạy + đang chờ trong pool
+HASH_MAX_PENDING = HASH_POOL_WORKERS * 4
+
+# Client nên thử lại sau (giây) khi pool đầy
+HASH_RETRY_AFTER = 1
+
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_lock = threading.Lock()
+_pending = 0
+_pending_lock = threading.Lock()
+
+
+def _verify(plain_password: str, hashed_password: str) -> bool:
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+def _hash(password: str) -> str:
+    return pwd_context.hash(password)
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                # spawn: không fork một process đang có nhiều threads
+                _executor = ProcessPoolExecutor(
+                    max_workers=HASH_POOL_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _executor
+
+
+def _discard_executor(broken: ProcessPoolExecutor) -> None:
+    """Bỏ pool đã hỏng; lần gọi _get_executor sau tạo pool mới."""
+    global _executor
+    with _executor_lock:
+        if _executor is broken:
+            _executor = None
+    broken.shutdown(wait=False, cancel_futures=True)
+
+
+def _release(future: Future) -> None:
+    global _pending
+    with _pending_lock:
+        _pending -= 1
+
+
+def _submit(executor: ProcessPoolExecutor, fn, *args) -> Future:
+    """
+    Đưa job vào pool.
+
+    Raises:
+        HTTPException: 503 nếu số jobs đang chờ đã đạt HASH_MAX_PENDING
+    """
+    global _pending
+    with _pending_lock:
+        if _pending >= HASH_MAX_PENDING:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication service busy, please retry",
+                headers={"Retry-After": str(HASH_RETRY_AFTER)},
+            )
+        _pending += 1
+
+    try:
+        future = executor.submit(fn, *args)
+    except BaseException:
+        _release(None)
+        raise
+
+    # Slot chỉ được trả khi worker làm xong (kể cả khi caller hủy await)
+    future.add_done_callback(_release)
+    return future
+
+
+def _unavailable() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication service unavailable, please retry",
+        headers={"Retry-After": str(HASH_RETRY_AFTER)},
+    )
+
+
+def _run(fn, *args):
+    """Chạy job trong pool (blocking); pool hỏng thì tạo lại và thử lại một lần."""
+    for retry in (False, True):
+        executor = _get_executor()
+        try:
+            return _submit(executor, fn, *args).result()
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            if retry:
+                raise _unavailable()
+
+
+async def _run_async(fn, *args):
+    """Như _run nhưng await trên event loop."""
+    for retry in (False, True):
+        executor = _get_executor()
+        try:
+            return await asyncio.wrap_future(_submit(executor, fn, *args))
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            if retry:
+                raise _unavailable()
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify password trong pool (blocking caller thread, không tốn CPU của nó)."""
+    return _run(_verify, plain_password, hashed_password)
+
+
+def hash_password(password: str) -> str:
+    """Hash password trong pool (blocking caller thread)."""
+    return _run(_hash, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password trong pool mà không chặn event loop."""
+    return await _run_async(_verify, plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash password trong pool mà không chặn event loop."""
+    return await _run_async(_hash, password)
+
+
+def start_hashing_pool() -> None:
+    """Khởi tạo pool và các worker processes (gọi khi startup)."""
+    executor = _get_executor()
+    # Spawn workers trước request đầu tiên
+    for future in [executor.submit(os.getpid) for _ in range(HASH_POOL_WORKERS)]:
+        future.result()
+
+
+def shutdown_hashing_pool() -> None:
+    """Dừng pool (gọi khi shutdown)."""
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
@@ -0,0 +1,176 @@
+"""
+Authenticated-user cache cho SmartLearn API.
+Giữ trong process các tokens đã verify (token -> user_id) và principals
+gọn (id, is_active) dưới dạng bounded TTL/LRU, để get_current_principal không
+phải decode JWT và query User trên mỗi request.
+
+Mọi thay đổi User.is_active (ORM flush, bulk UPDATE, delete) đều
+invalidate principal tương ứng qua SQLAlchemy events; TTL giới hạn độ
+trễ giữa các worker processes.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Hashable, NamedTuple, Optional, Set
+
+from jose import jwt, JWTError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from ..models.user import User
+
+# Principal được đọc lại từ DB sau TTL (giây) kể cả khi không có event
+PRINCIPAL_CACHE_TTL = 60.0
+PRINCIPAL_CACHE_SIZE = 10000
+
+# Token đã verify được giữ tối đa TTL này (và không quá claim exp)
+TOKEN_CACHE_TTL = 300.0
+TOKEN_CACHE_SIZE = 20000
+
+# Key trong Session.info chứa các user IDs cần invalidate khi commit
+_PENDING_KEY = "principal_cache_pending"
+
+
+class UserPrincipal(NamedTuple):
+    """Danh tính gọn của user đã xác thực."""
+
+    id: int
+    is_active: bool
+
+
+class _TTLCache:
+    """LRU có giới hạn kích thước, mỗi entry có thời điểm hết hạn riêng."""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+_tokens = _TTLCache(TOKEN_CACHE_SIZE)
+_principals = _TTLCache(PRINCIPAL_CACHE_SIZE)
+
+
+def _token_ttl(token: str) -> float:
+    """TTL cache của token: TOKEN_CACHE_TTL, cắt theo claim exp nếu có."""
+    try:
+        exp = jwt.get_unverified_claims(token).get("exp")
+    except JWTError:
+        return 0.0
+    if exp is None:
+        return TOKEN_CACHE_TTL
+    return min(TOKEN_CACHE_TTL, float(exp) - time.time())
+
+
+def resolve_token(token: str, verify: Callable[[str], int]) -> int:
+    """
+    User ID của token; chỉ gọi verify (decode + kiểm tra chữ ký) khi miss.
+
+    Lỗi của verify (token không hợp lệ) được raise lại và không được cache.
+    """
+    user_id = _tokens.get(token)
+    if user_id is not None:
+        return user_id
+
+    user_id = verify(token)
+    ttl = _token_ttl(token)
+    if ttl > 0:
+        _tokens.set(token, user_id, ttl)
+    return user_id
+
+
+def get_principal(db: Session, user_id: int) -> Optional[UserPrincipal]:
+    """Principal của user (cache hit không chạy SQL); None nếu user không tồn tại."""
+    principal = _principals.get(user_id)
+    if principal is not None:
+        return principal
+
+    row = db.query(User.id, User.is_active).filter(User.id == user_id).first()
+    if not row:
+        return None
+
+    principal = UserPrincipal(id=row.id, is_active=bool(row.is_active))
+    _principals.set(user_id, principal, PRINCIPAL_CACHE_TTL)
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """Xóa principal của user khỏi cache."""
+    _principals.pop(user_id)
+
+
+def clear_principal_cache() -> None:
+    """Xóa toàn bộ tokens và principals đã cache."""
+    _tokens.clear()
+    _principals.clear()
+
+
+def _pending(session: Session) -> Set[int]:
+    return session.info.setdefault(_PENDING_KEY, set())
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    if not inspect(target).attrs.is_active.history.has_changes():
+        return
+    # Invalidate ngay và lần nữa sau commit: một request đọc giá trị cũ
+    # giữa flush và commit không được giữ nó trong cache
+    invalidate_principal(target.id)
+    session = Session.object_session(target)
+    if session is not None:
+        _pending(session).add(target.id)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    invalidate_principal(target.id)
+
+
+@event.listens_for(Session, "after_commit")
+def _session_committed(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING_KEY, ()):
+        invalidate_principal(user_id)
+
+
+@event.listens_for(Session, "after_rollback")
+def _session_rolled_back(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bulk_user_write(orm_execute_state) -> None:
+    # Bulk update(User)/delete(User) không đi qua mapper events:
+    # không biết rows nào bị ảnh hưởng nên xóa toàn bộ principals
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete):
+        return
+    mapper = orm_execute_state.bind_mapper
+    if mapper is not None and mapper.class_ is User:
+        _principals.clear()
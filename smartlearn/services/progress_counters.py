@@ -0,0 +1,169 @@
+"""
+Denormalized progress counters cho SmartLearn system.
+Course.lesson_count và UserCourseProgress.completed_lessons được cập nhật
+atomically (UPDATE ... SET x = x + delta) trong cùng transaction với thay
+đổi gốc; reconcile_counters tính lại từ Lesson/UserLessonProgress để
+backfill hoặc sửa lệch.
+
+Chạy backfill/reconcile:
+    python -m smartlearn.services.progress_counters
+"""
+
+from typing import Dict
+
+from sqlalchemy import and_, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from ..models.course import Course
+from ..models.lesson import Lesson
+from ..models.user_course_progress import UserCourseProgress
+from ..models.user_lesson_progress import UserLessonProgress
+
+
+def adjust_lesson_count(db: Session, course_id: int, delta: int) -> None:
+    """Cộng delta vào Course.lesson_count (caller commit)."""
+    db.execute(
+        update(Course)
+        .where(Course.id == course_id)
+        .values(lesson_count=Course.lesson_count + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def adjust_completed_lessons(db: Session, user_id: int, course_id: int, delta: int) -> None:
+    """Cộng delta vào completed_lessons của enrollment (caller commit)."""
+    db.execute(
+        update(UserCourseProgress)
+        .where(
+            and_(
+                UserCourseProgress.user_id == user_id,
+                UserCourseProgress.course_id == course_id
+            )
+        )
+        .values(completed_lessons=UserCourseProgress.completed_lessons + delta)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def mark_lesson_completed(db: Session, user_id: int, lesson_id: int, completed: bool) -> bool:
+    """
+    Đổi UserLessonProgress.completed bằng một UPDATE có điều kiện.
+
+    WHERE lọc theo trạng thái cũ nên khi hai requests cùng đổi, chỉ một
+    UPDATE khớp row(s); caller chỉ cộng counter khi hàm trả về True. Rows
+    (user, lesson) trùng từ dữ liệu cũ vẫn tính là một lần đổi. Row
+    progress phải đã được flush (caller commit).
+
+    Returns:
+        True nếu request này đã đổi trạng thái
+    """
+    if completed:
+        unchanged = or_(UserLessonProgress.completed == None, UserLessonProgress.completed == False)
+    else:
+        unchanged = UserLessonProgress.completed == True
+
+    result = db.execute(
+        update(UserLessonProgress)
+        .where(
+            and_(
+                UserLessonProgress.user_id == user_id,
+                UserLessonProgress.lesson_id == lesson_id,
+                unchanged
+            )
+        )
+        .values(completed=completed)
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+
+def _lesson_count_subquery():
+    return (
+        select(func.count(Lesson.id))
+        .where(Lesson.course_id == Course.id)
+        .correlate(Course)
+        .scalar_subquery()
+    )
+
+
+def _completed_lessons_subquery():
+    return (
+        select(func.count(func.distinct(UserLessonProgress.lesson_id)))
+        .join(Lesson, UserLessonProgress.lesson_id == Lesson.id)
+        .where(
+            and_(
+                UserLessonProgress.user_id == UserCourseProgress.user_id,
+                Lesson.course_id == UserCourseProgress.course_id,
+                UserLessonProgress.completed == True
+            )
+        )
+        .correlate(UserCourseProgress)
+        .scalar_subquery()
+    )
+
+
+def seed_completed_lessons(db: Session, user_id: int, course_id: int) -> None:
+    """
+    Đặt completed_lessons của enrollment mới từ các lessons user đã hoàn
+    thành trước khi đăng ký (caller commit).
+    """
+    db.execute(
+        update(UserCourseProgress)
+        .where(
+            and_(
+                UserCourseProgress.user_id == user_id,
+                UserCourseProgress.course_id == course_id
+            )
+        )
+        .values(completed_lessons=_completed_lessons_subquery())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def reconcile_counters(db: Session) -> Dict[str, int]:
+    """
+    Tính lại mọi counters từ dữ liệu gốc; chỉ ghi các rows bị lệch.
+
+    Returns:
+        Số rows đã sửa của từng counter
+    """
+    lesson_count = _lesson_count_subquery()
+    courses = db.execute(
+        update(Course)
+        .where(Course.lesson_count != lesson_count)
+        .values(lesson_count=lesson_count)
+        .execution_options(synchronize_session=False)
+    )
+
+    completed_lessons = _completed_lessons_subquery()
+    enrollments = db.execute(
+        update(UserCourseProgress)
+        .where(UserCourseProgress.completed_lessons != completed_lessons)
+        .values(completed_lessons=completed_lessons)
+        .execution_options(synchronize_session=False)
+    )
+
+    db.commit()
+
+    return {
+        "lesson_count": courses.rowcount,
+        "completed_lessons": enrollments.rowcount,
+    }
+
+
+def main() -> None:
+    """Backfill/reconcile counters cho toàn bộ database."""
+    from ..core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        fixed = reconcile_counters(db)
+    finally:
+        db.close()
+
+    print(f"✅ Reconciled counters: {fixed['lesson_count']} courses, "
+          f"{fixed['completed_lessons']} enrollments updated")
+
+
+if __name__ == "__main__":
+    main()
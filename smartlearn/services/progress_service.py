@@ -4,8 +4,9 @@ Xử lý tiến độ học tập của user.
 """
 
 from typing import List, Dict, Any
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, select
 
 from ..models.course import Course
 from ..models.lesson import Lesson
@@ -14,75 +15,93 @@ from ..models.user_course_progress import UserCourseProgress
 from ..models.user_lesson_progress import UserLessonProgress
 from ..models.user_progress import UserProgress
 from ..models.user import User
+from .progress_counters import (
+    adjust_completed_lessons, mark_lesson_completed, seed_completed_lessons
+)
 
 
-class ProgressService:
-    """Service class để xử lý tiến độ học tập."""
+def _completion_percentage(total_lessons: int, completed_lessons: int) -> float:
+    if total_lessons > 0:
+        return round((completed_lessons / total_lessons) * 100, 2)
+    return 0
 
-    @staticmethod
-    def get_user_course_progress(
-        db: Session, user_id: int, course_id: int
-    ) -> Dict[str, Any]:
-        """Lấy tiến độ học tập của user với khóa học."""
-        
-        # Get course
-        course = db.query(Course).filter(Course.id == course_id).first()
-        if not course:
-            return {}
-        
-        # Get total lessons
-        total_lessons = (
-            db.query(Lesson)
-            .filter(Lesson.course_id == course_id)
-            .count()
+
+def _all_progress_statement(user_id: int):
+    """
+    Một query cho tiến độ mọi khóa học user đã đăng ký.
+
+    Đọc thẳng các counters Course.lesson_count và
+    UserCourseProgress.completed_lessons (xem progress_counters).
+    """
+    return (
+        select(
+            UserCourseProgress.course_id,
+            Course.title,
+            Course.lesson_count,
+            UserCourseProgress.completed_lessons,
         )
-        
-        # Get completed lessons
-        completed_lessons = (
-            db.query(UserLessonProgress)
-            .join(Lesson, UserLessonProgress.lesson_id == Lesson.id)
-            .filter(
-                and_(
-                    UserLessonProgress.user_id == user_id,
-                    Lesson.course_id == course_id,
-                    UserLessonProgress.completed == True
-                )
+        .join(Course, Course.id == UserCourseProgress.course_id)
+        .where(UserCourseProgress.user_id == user_id)
+        .order_by(UserCourseProgress.course_id)
+    )
+
+
+def _course_progress_statement(user_id: int, course_id: int):
+    """Một row (title, lesson_count, completed_lessons) cho course; NULL nếu chưa đăng ký."""
+    return (
+        select(
+            Course.title,
+            Course.lesson_count,
+            UserCourseProgress.completed_lessons,
+        )
+        .outerjoin(
+            UserCourseProgress,
+            and_(
+                UserCourseProgress.course_id == Course.id,
+                UserCourseProgress.user_id == user_id
             )
-            .count()
         )
-        
-        # Calculate percentage
-        completion_percentage = 0
-        if total_lessons > 0:
-            completion_percentage = round((completed_lessons / total_lessons) * 100, 2)
-        
-        return {
+        .where(Course.id == course_id)
+    )
+
+
+def _course_progress_dict(course_id: int, row) -> Dict[str, Any]:
+    if row is None:
+        return {}
+    course_title, total_lessons, completed_lessons = row
+    return _progress_rows_to_dicts(
+        [(course_id, course_title, total_lessons, completed_lessons or 0)]
+    )[0]
+
+
+def _progress_rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    return [
+        {
             "course_id": course_id,
             "total_lessons": total_lessons,
             "completed_lessons": completed_lessons,
-            "completion_percentage": completion_percentage,
-            "course_title": course.title
+            "completion_percentage": _completion_percentage(total_lessons, completed_lessons),
+            "course_title": course_title
         }
+        for course_id, course_title, total_lessons, completed_lessons in rows
+    ]
+
+
+class ProgressService:
+    """Service class để xử lý tiến độ học tập."""
+
+    @staticmethod
+    def get_user_course_progress(
+        db: Session, user_id: int, course_id: int
+    ) -> Dict[str, Any]:
+        """Lấy tiến độ học tập của user với khóa học (đọc counters)."""
+        row = db.execute(_course_progress_statement(user_id, course_id)).first()
+        return _course_progress_dict(course_id, row)
     
     @staticmethod
     def get_user_all_progress(db: Session, user_id: int) -> List[Dict[str, Any]]:
-        """Lấy tiến độ của user với tất cả khóa học."""
-        
-        # Get courses user is enrolled in
-        user_courses = (
-            db.query(UserCourseProgress)
-            .filter(UserCourseProgress.user_id == user_id)
-            .all()
-        )
-        
-        progress_list = []
-        for user_course in user_courses:
-            progress = ProgressService.get_user_course_progress(
-                db, user_id, user_course.course_id
-            )
-            progress_list.append(progress)
-        
-        return progress_list
+        """Lấy tiến độ của user với tất cả khóa học (một query trên counters)."""
+        return _progress_rows_to_dicts(db.execute(_all_progress_statement(user_id)).all())
     
     @staticmethod
     def enroll_in_course(db: Session, user_id: int, course_id: int) -> None:
@@ -107,6 +126,10 @@ class ProgressService:
                 course_id=course_id
             )
             db.add(enrollment)
+            db.flush()
+            
+            # Lessons đã hoàn thành trước khi đăng ký vẫn được tính
+            seed_completed_lessons(db, user_id, course_id)
             db.commit()
             
             # Update course enrollment count
@@ -145,10 +168,13 @@ class ProgressService:
             )
             db.add(progress)
         
-        # Mark as completed
-        progress.completed = True
         progress.video_completed = True
         progress.reading_accessed = True
+        db.flush()
+        
+        # Mark as completed; chỉ request thực sự đổi trạng thái tăng counter
+        if mark_lesson_completed(db, user_id, lesson_id, True):
+            adjust_completed_lessons(db, user_id, lesson.course_id, 1)
         
         db.commit()
         
@@ -157,46 +183,46 @@ class ProgressService:
     
     @staticmethod
     def check_course_completion(db: Session, user_id: int, course_id: int) -> None:
-        """Kiểm tra xem user đã hoàn thành khóa học chưa."""
-        
-        # Get total lessons in course
-        total_lessons = (
-            db.query(Lesson)
-            .filter(Lesson.course_id == course_id)
-            .count()
-        )
-        
-        if total_lessons == 0:
-            return
+        """Kiểm tra xem user đã hoàn thành khóa học chưa (đọc counters)."""
         
-        # Get completed lessons
-        completed_lessons = (
-            db.query(UserLessonProgress)
-            .join(Lesson, UserLessonProgress.lesson_id == Lesson.id)
+        row = (
+            db.query(Course.lesson_count, UserCourseProgress)
+            .join(UserCourseProgress, UserCourseProgress.course_id == Course.id)
             .filter(
                 and_(
-                    UserLessonProgress.user_id == user_id,
-                    Lesson.course_id == course_id,
-                    UserLessonProgress.completed == True
+                    Course.id == course_id,
+                    UserCourseProgress.user_id == user_id
                 )
             )
-            .count()
+            .first()
         )
+        if not row:
+            return
+        
+        total_lessons, course_progress = row
+        if total_lessons == 0:
+            return
         
         # Update course progress if fully completed
-        if completed_lessons >= total_lessons:
-            course_progress = (
-                db.query(UserCourseProgress)
-                .filter(
-                    and_(
-                        UserCourseProgress.user_id == user_id,
-                        UserCourseProgress.course_id == course_id
-                    )
-                )
-                .first()
-            )
-            
-            if course_progress and not course_progress.completed_at:
-                from datetime import datetime
-                course_progress.completed_at = datetime.utcnow()
-                db.commit()
\ No newline at end of file
+        if course_progress.completed_lessons >= total_lessons and not course_progress.completed_at:
+            from datetime import datetime
+            course_progress.completed_at = datetime.utcnow()
+            db.commit()
+
+
+class AsyncProgressService:
+    """Async variants (AsyncSession) của các truy vấn đọc tiến độ học tập."""
+
+    @staticmethod
+    async def get_user_course_progress(
+        db: AsyncSession, user_id: int, course_id: int
+    ) -> Dict[str, Any]:
+        """Lấy tiến độ học tập của user với khóa học (đọc counters)."""
+        result = await db.execute(_course_progress_statement(user_id, course_id))
+        return _course_progress_dict(course_id, result.first())
+    
+    @staticmethod
+    async def get_user_all_progress(db: AsyncSession, user_id: int) -> List[Dict[str, Any]]:
+        """Lấy tiến độ của user với tất cả khóa học (một query trên counters)."""
+        result = await db.execute(_all_progress_statement(user_id))
+        return _progress_rows_to_dicts(result.all())
@@ -0,0 +1,396 @@
+"""
+Recommendation scoring engine cho SmartLearn system.
+Vectorized top-N scoring trên factor matrices của SVD model.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+# Tên files khi export engine ra disk (raw .npy để np.load mmap được)
+USER_FACTORS_FILE = "user_factors.npy"
+ITEM_FACTORS_FILE = "item_factors.npy"
+USER_BIAS_FILE = "user_bias.npy"
+ITEM_BIAS_FILE = "item_bias.npy"
+ENGINE_META_FILE = "engine.json"
+
+# Regularization khi fold-in user mới (bằng reg_all lúc train)
+DEFAULT_FOLD_IN_REG = 0.02
+
+# Số users xử lý trong một block khi batch scoring (giới hạn memory)
+DEFAULT_BATCH_BLOCK_SIZE = 1024
+
+# MMR re-ranking: trọng số của diversity (0 = chỉ theo predicted rating)
+DEFAULT_DIVERSITY = 0.3
+# Similarity giữa hai courses: cùng category / cùng difficulty level
+CATEGORY_SIMILARITY = 0.8
+DIFFICULTY_SIMILARITY = 0.2
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """Lấy index của k phần tử lớn nhất, sắp xếp giảm dần theo score."""
+    n = scores.shape[-1]
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+
+    if k >= n:
+        return np.argsort(-scores, kind="stable")
+
+    # argpartition O(n) rồi chỉ sort k phần tử đứng đầu
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def top_k_rows(scores: np.ndarray, k: int) -> np.ndarray:
+    """Top-k index theo từng hàng của score matrix (users x items)."""
+    n = scores.shape[1]
+    k = min(k, n)
+    if k <= 0:
+        return np.empty((scores.shape[0], 0), dtype=np.int64)
+
+    if k < n:
+        candidates = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        candidates = np.broadcast_to(np.arange(n), scores.shape)
+
+    candidate_scores = np.take_along_axis(scores, candidates, axis=1)
+    order = np.argsort(-candidate_scores, axis=1, kind="stable")
+    return np.take_along_axis(candidates, order, axis=1)
+
+
+def mmr_rerank(
+    scores: np.ndarray,
+    categories: np.ndarray,
+    levels: np.ndarray,
+    k: int,
+    diversity: float = DEFAULT_DIVERSITY,
+) -> np.ndarray:
+    """
+    Maximal marginal relevance trên một tập candidates nhỏ (vd. top-200).
+
+    Mỗi bước chọn candidate có (1 - diversity) * relevance - diversity *
+    max similarity với các items đã chọn; relevance là score chuẩn hóa về
+    [0, 1], similarity dựa trên category/difficulty codes (code < 0 là
+    không rõ, không tính giống). Cost O(k * n) phép toán vector.
+
+    Args:
+        scores: Scores của candidates (-inf = không hợp lệ)
+        categories: Category code của từng candidate
+        levels: Difficulty level code của từng candidate
+        k: Số items cần chọn
+        diversity: Trọng số diversity trong [0, 1]
+
+    Returns:
+        Vị trí (trong candidates) của k items theo thứ tự mới
+    """
+    valid = np.flatnonzero(np.isfinite(scores))
+    k = min(k, len(valid))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if diversity <= 0:
+        return valid[np.argsort(-scores[valid], kind="stable")[:k]]
+
+    candidate_scores = scores[valid].astype(np.float64)
+    categories = np.asarray(categories)[valid]
+    levels = np.asarray(levels)[valid]
+
+    low, high = candidate_scores.min(), candidate_scores.max()
+    relevance = (candidate_scores - low) / (high - low) if high > low else np.ones(len(valid))
+    relevance *= 1.0 - diversity
+
+    penalty = np.zeros(len(valid))
+    selected = np.empty(k, dtype=np.int64)
+    for step in range(k):
+        gain = relevance - diversity * penalty
+        gain[selected[:step]] = -np.inf
+        chosen = int(np.argmax(gain))
+        selected[step] = chosen
+
+        similarity = CATEGORY_SIMILARITY * (
+            (categories == categories[chosen]) & (categories >= 0)
+        ) + DIFFICULTY_SIMILARITY * ((levels == levels[chosen]) & (levels >= 0))
+        np.maximum(penalty, similarity, out=penalty)
+
+    return valid[selected]
+
+
+class ScoringEngine:
+    """
+    Biased matrix factorization scorer.
+
+    est(u, i) = global_mean + bu[u] + bi[i] + pu[u] · qi[i]
+
+    Các array được index theo encoder index trong mappings
+    (user_encoder/item_encoder), không phải inner id của Surprise.
+    """
+
+    def __init__(
+        self,
+        user_factors: np.ndarray,
+        item_factors: np.ndarray,
+        user_bias: np.ndarray,
+        item_bias: np.ndarray,
+        global_mean: float,
+        rating_scale: Tuple[float, float] = (1.0, 5.0),
+    ):
+        self.user_factors = user_factors
+        self.item_factors = item_factors
+        self.user_bias = user_bias
+        self.item_bias = item_bias
+        self.global_mean = float(global_mean)
+        self.rating_scale = rating_scale
+
+    @property
+    def n_users(self) -> int:
+        return self.user_factors.shape[0]
+
+    @property
+    def n_items(self) -> int:
+        return self.item_factors.shape[0]
+
+    @classmethod
+    def from_svd(cls, model: Any, mappings: Dict[str, Any]) -> "ScoringEngine":
+        """
+        Extract factor matrices và biases từ Surprise SVD đã train.
+
+        User/item không có trong trainset (ví dụ chỉ xuất hiện trong testset)
+        nhận factor và bias bằng 0, giống cách Surprise xử lý unknown ids.
+        """
+        trainset = model.trainset
+        user_ids = mappings["user_encoder"].ids
+        item_ids = mappings["item_encoder"].ids
+
+        n_users = len(user_ids)
+        n_items = len(item_ids)
+        n_factors = model.pu.shape[1]
+
+        inner_users = np.array(
+            [trainset._raw2inner_id_users.get(int(raw_id), -1) for raw_id in user_ids],
+            dtype=np.int64,
+        )
+        inner_items = np.array(
+            [trainset._raw2inner_id_items.get(int(raw_id), -1) for raw_id in item_ids],
+            dtype=np.int64,
+        )
+        known_users = inner_users >= 0
+        known_items = inner_items >= 0
+
+        user_factors = np.zeros((n_users, n_factors), dtype=np.float32)
+        item_factors = np.zeros((n_items, n_factors), dtype=np.float32)
+        user_bias = np.zeros(n_users, dtype=np.float32)
+        item_bias = np.zeros(n_items, dtype=np.float32)
+
+        user_factors[known_users] = model.pu[inner_users[known_users]]
+        item_factors[known_items] = model.qi[inner_items[known_items]]
+
+        global_mean = 0.0
+        if model.biased:
+            user_bias[known_users] = model.bu[inner_users[known_users]]
+            item_bias[known_items] = model.bi[inner_items[known_items]]
+            global_mean = trainset.global_mean
+
+        return cls(
+            user_factors,
+            item_factors,
+            user_bias,
+            item_bias,
+            global_mean,
+            rating_scale=trainset.rating_scale,
+        )
+
+    @staticmethod
+    def exists(path: str) -> bool:
+        """Kiểm tra thư mục có chứa engine đã export hay không."""
+        return os.path.exists(os.path.join(path, ENGINE_META_FILE))
+
+    def save(self, path: str) -> None:
+        """Export factor matrices và biases ra .npy cùng metadata JSON."""
+        np.save(os.path.join(path, USER_FACTORS_FILE), np.ascontiguousarray(self.user_factors))
+        np.save(os.path.join(path, ITEM_FACTORS_FILE), np.ascontiguousarray(self.item_factors))
+        np.save(os.path.join(path, USER_BIAS_FILE), np.ascontiguousarray(self.user_bias))
+        np.save(os.path.join(path, ITEM_BIAS_FILE), np.ascontiguousarray(self.item_bias))
+
+        meta = {
+            "global_mean": self.global_mean,
+            "rating_scale": list(self.rating_scale),
+            "n_users": self.n_users,
+            "n_items": self.n_items,
+            "n_factors": self.item_factors.shape[1],
+        }
+        with open(os.path.join(path, ENGINE_META_FILE), "w", encoding="utf-8") as f:
+            json.dump(meta, f, indent=2)
+
+    @classmethod
+    def load(cls, path: str, mmap_mode: Optional[str] = "r") -> "ScoringEngine":
+        """
+        Load engine đã export.
+
+        Với mmap_mode="r" các array được map từ file, nên mọi worker process
+        dùng chung page cache của OS thay vì giữ bản copy riêng.
+        """
+        with open(os.path.join(path, ENGINE_META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+
+        return cls(
+            np.load(os.path.join(path, USER_FACTORS_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, ITEM_FACTORS_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, USER_BIAS_FILE), mmap_mode=mmap_mode),
+            np.load(os.path.join(path, ITEM_BIAS_FILE), mmap_mode=mmap_mode),
+            meta["global_mean"],
+            rating_scale=tuple(meta["rating_scale"]),
+        )
+
+    def score_user(self, user_idx: int) -> np.ndarray:
+        """Predicted rating của một user cho toàn bộ catalog (một mat-vec product)."""
+        return self.score_vector(self.user_factors[user_idx], self.user_bias[user_idx])
+
+    def score_vector(self, user_vector: np.ndarray, user_bias: float) -> np.ndarray:
+        """Predicted rating cho toàn bộ catalog từ một user vector bất kỳ."""
+        scores = self.item_factors @ user_vector
+        scores += self.item_bias
+        scores += self.global_mean + user_bias
+        return np.clip(scores, *self.rating_scale, out=scores)
+
+    def fold_in_user(
+        self,
+        item_indices: np.ndarray,
+        ratings: np.ndarray,
+        reg: float = DEFAULT_FOLD_IN_REG,
+    ) -> Tuple[np.ndarray, float]:
+        """
+        Ước lượng user vector và bias cho user mới từ vài ratings.
+
+        Giữ nguyên item factors, giải ridge least-squares nhỏ
+        (n_factors + 1 ẩn) trên residual r - global_mean - bi.
+
+        Args:
+            item_indices: Item indices user đã rate
+            ratings: Ratings tương ứng
+            reg: Regularization mỗi rating (giống reg_all khi train)
+
+        Returns:
+            Tuple (user vector, user bias)
+        """
+        item_indices = np.asarray(item_indices, dtype=np.int64)
+        ratings = np.asarray(ratings, dtype=np.float64)
+
+        design = np.hstack([
+            np.asarray(self.item_factors[item_indices], dtype=np.float64),
+            np.ones((len(item_indices), 1)),
+        ])
+        residual = ratings - self.global_mean - self.item_bias[item_indices]
+
+        gram = design.T @ design
+        gram[np.diag_indices_from(gram)] += reg * max(len(item_indices), 1)
+        solution = np.linalg.solve(gram, design.T @ residual)
+
+        return solution[:-1].astype(self.item_factors.dtype), float(solution[-1])
+
+    @staticmethod
+    def _top_k_scores(
+        scores: np.ndarray, k: int, candidate_mask: Optional[np.ndarray]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        if candidate_mask is not None:
+            candidates = np.flatnonzero(candidate_mask)
+            item_indices = candidates[top_k_indices(scores[candidates], k)]
+        else:
+            item_indices = top_k_indices(scores, k)
+
+        return item_indices, scores[item_indices]
+
+    def top_k(
+        self,
+        user_idx: int,
+        k: int,
+        candidate_mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Top-k item index và score cho user.
+
+        Args:
+            user_idx: User index trong user_encoder
+            k: Số lượng items cần lấy
+            candidate_mask: Boolean mask (n_items,) - chỉ các item True được xét
+
+        Returns:
+            Tuple (item indices, scores) đã sắp xếp giảm dần
+        """
+        return self._top_k_scores(self.score_user(user_idx), k, candidate_mask)
+
+    def top_k_vector(
+        self,
+        user_vector: np.ndarray,
+        user_bias: float,
+        k: int,
+        candidate_mask: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Top-k cho user vector đã fold-in (user không có trong model)."""
+        return self._top_k_scores(self.score_vector(user_vector, user_bias), k, candidate_mask)
+
+    def predict(self, user_indices: np.ndarray, item_indices: np.ndarray) -> np.ndarray:
+        """Predicted rating cho từng cặp (user, item) - dùng khi evaluate."""
+        user_indices = np.asarray(user_indices, dtype=np.int64)
+        item_indices = np.asarray(item_indices, dtype=np.int64)
+
+        scores = np.einsum(
+            "ij,ij->i", self.user_factors[user_indices], self.item_factors[item_indices]
+        ).astype(np.float64)
+        scores += self.global_mean + self.user_bias[user_indices] + self.item_bias[item_indices]
+        return np.clip(scores, *self.rating_scale, out=scores)
+
+    def score_users(self, user_indices: np.ndarray) -> np.ndarray:
+        """Predicted ratings cho nhiều users: một matrix product (users x items)."""
+        scores = self.user_factors[user_indices] @ self.item_factors.T
+        scores += self.item_bias
+        scores += (self.global_mean + self.user_bias[user_indices])[:, None]
+        return np.clip(scores, *self.rating_scale, out=scores)
+
+    def top_k_batch(
+        self,
+        user_indices: np.ndarray,
+        k: int,
+        candidate_mask: Optional[np.ndarray] = None,
+        exclude_rows: Optional[np.ndarray] = None,
+        exclude_items: Optional[np.ndarray] = None,
+        block_size: int = DEFAULT_BATCH_BLOCK_SIZE,
+    ) -> Iterator[Tuple[int, np.ndarray, np.ndarray]]:
+        """
+        Top-k cho nhiều users, xử lý theo block để giới hạn memory.
+
+        Args:
+            user_indices: User indices (n,) trong user_encoder
+            k: Số lượng items mỗi user
+            candidate_mask: Boolean mask (n_items,) dùng chung cho mọi user
+            exclude_rows: Vị trí trong user_indices của từng cặp cần loại
+            exclude_items: Item index tương ứng với exclude_rows
+            block_size: Số users mỗi block
+
+        Yields:
+            Tuple (block start, item indices (b, k), scores (b, k));
+            item bị loại có score -inf và chỉ xuất hiện khi thiếu candidates
+        """
+        user_indices = np.asarray(user_indices, dtype=np.int64)
+
+        if exclude_rows is not None and len(exclude_rows):
+            order = np.argsort(exclude_rows, kind="stable")
+            exclude_rows = np.asarray(exclude_rows)[order]
+            exclude_items = np.asarray(exclude_items)[order]
+        else:
+            exclude_rows = exclude_items = None
+
+        for start in range(0, len(user_indices), block_size):
+            stop = min(start + block_size, len(user_indices))
+            scores = self.score_users(user_indices[start:stop])
+
+            if candidate_mask is not None:
+                scores[:, ~candidate_mask] = -np.inf
+
+            if exclude_rows is not None:
+                lo, hi = np.searchsorted(exclude_rows, [start, stop])
+                scores[exclude_rows[lo:hi] - start, exclude_items[lo:hi]] = -np.inf
+
+            item_indices = top_k_rows(scores, k)
+            yield start, item_indices, np.take_along_axis(scores, item_indices, axis=1)
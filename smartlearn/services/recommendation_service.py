@@ -3,11 +3,12 @@ Recommendation service cho SmartLearn system.
 SVD-based collaborative filtering recommendation engine.
 """
 
-import pickle
-import os
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, select
 
 from ..models.course import Course
 from ..models.lesson import Lesson
@@ -15,54 +16,95 @@ from ..models.resource import Resource
 from ..models.user_course_progress import UserCourseProgress
 from ..models.user_progress import UserProgress
 from ..models.interaction import Interaction
+from .catalog_cache import COURSES, catalog_cache
+from .catalog_snapshot import (
+    CatalogSnapshot, get_catalog_snapshot, get_catalog_snapshot_async
+)
+from .model_registry import LoadedModel, model_registry
+from .recommendation_engine import mmr_rerank
+
+# Số courses của popular ranking giữ trong catalog cache (namespace
+# COURSES: hết hiệu lực khi course đổi, như CourseService.get_popular_courses)
+POPULAR_CACHE_SIZE = 50
+_POPULAR_CACHE_KEY = "popular_ranking"
 
-# ML model cache
-_model_cache = None
-_mappings_cache = None
-_model_path = None
-_mappings_path = None
+# Số ratings tối thiểu để fold-in user mới vào model
+MIN_FOLD_IN_RATINGS = 1
 
+# Số candidates (theo predicted rating) đưa vào diversity re-ranking
+RERANK_POOL_SIZE = 200
 
 def _load_model():
-    """Load SVD model và ID mappings từ pickle files."""
-    global _model_cache, _mappings_cache
+    """Load scoring engine (factor arrays) và ID mappings của version đang active."""
+    bundle = model_registry.get()
     
-    if _model_cache is not None:
-        return _model_cache, _mappings_cache
+    if bundle is None:
+        return None, None
     
-    # Define model paths
-    base_dir = os.path.dirname(__file__)
-    models_dir = os.path.join(base_dir, "..", "ml_pipeline", "models")
+    return bundle.engine, bundle.mappings
+
+
+def _course_to_recommendation(
+    catalog: CatalogSnapshot, position: int, predicted_rating: float
+) -> Dict[str, Any]:
+    """Convert course (vị trí trong catalog snapshot) thành recommendation dict."""
+    recommendation = catalog.record(position)
+    recommendation["predicted_rating"] = round(float(predicted_rating), 2)
+    return recommendation
+
+
+def _rerank(
+    catalog: CatalogSnapshot, course_ids: np.ndarray, scores: np.ndarray, limit: int
+) -> List[Dict[str, Any]]:
+    """
+    Chọn limit courses từ candidate pool bằng MMR (category/difficulty)
+    rồi hydrate chỉ các rows được chọn.
+    """
+    positions = catalog.positions(course_ids)
+    scores = np.where(positions >= 0, scores, -np.inf)
+    order = mmr_rerank(
+        scores,
+        catalog.codes["category"][positions],
+        catalog.codes["difficulty_level"][positions],
+        limit,
+    )
+    return [
+        _course_to_recommendation(catalog, positions[i], scores[i])
+        for i in order
+    ]
+
+
+def _recommendations_from_store(
+    bundle: LoadedModel,
+    user_idx: int,
+    catalog: CatalogSnapshot,
+    enrolled_ids: np.ndarray,
+    limit: int,
+) -> Optional[List[Dict[str, Any]]]:
+    """
+    Đọc recommendations đã tính trước cho user (store top-K là candidate pool).
+
+    Returns None nếu không có store hoặc không đủ candidates sau khi lọc
+    (khi đó caller fallback sang live scoring).
+    """
+    topk_items, topk_scores = bundle.topk_items, bundle.topk_scores
     
-    model_path = os.path.join(models_dir, "svd_model.pkl")
-    mappings_path = os.path.join(models_dir, "mappings.pkl")
+    if topk_items is None or user_idx >= topk_items.shape[0]:
+        return None
     
-    try:
-        # Load model
-        with open(model_path, "rb") as f:
-            _model_cache = pickle.load(f)
-        
-        # Load mappings
-        with open(mappings_path, "rb") as f:
-            _mappings_cache = pickle.load(f)
-        
-        print("✅ Model and mappings loaded successfully")
-        return _model_cache, _mappings_cache
-        
-    except FileNotFoundError:
-        print("⚠️ Model files not found. Please train the model first.")
-        return None, None
-    except Exception as e:
-        print(f"❌ Error loading model: {e}")
-        return None, None
+    course_ids = np.asarray(topk_items[user_idx])
+    keep = (catalog.positions(course_ids) >= 0) & ~np.isin(course_ids, enrolled_ids)
+    if keep.sum() < limit:
+        return None
+    
+    return _rerank(catalog, course_ids[keep], np.asarray(topk_scores[user_idx])[keep], limit)
 
 
-def get_popular_courses(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
-    """Lấy danh sách khóa học phổ biến nhất."""
-    
-    courses = (
-        db.query(Course)
-        .filter(
+def _popular_courses_statement(limit: int):
+    """Select các khóa học phổ biến nhất."""
+    return (
+        select(Course)
+        .where(
             and_(
                 Course.is_active == True,
                 Course.is_published == True
@@ -70,22 +112,57 @@ def get_popular_courses(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
         )
         .order_by(Course.enrollment_count.desc())
         .limit(limit)
-        .all()
     )
+
+
+def _popular_course_to_dict(course: Course) -> Dict[str, Any]:
+    return {
+        "id": course.id,
+        "title": course.title,
+        "description": course.description,
+        "category": course.category,
+        "difficulty_level": course.difficulty_level,
+        "thumbnail_url": course.thumbnail_url,
+        "enrollment_count": course.enrollment_count,
+        "average_rating": course.average_rating
+    }
+
+
+def _query_popular_courses(db: Session, limit: int) -> List[Dict[str, Any]]:
+    """Query danh sách khóa học phổ biến nhất từ database."""
+    courses = db.scalars(_popular_courses_statement(limit)).all()
+    return [_popular_course_to_dict(course) for course in courses]
+
+
+async def _query_popular_courses_async(db: AsyncSession, limit: int) -> List[Dict[str, Any]]:
+    courses = (await db.scalars(_popular_courses_statement(limit))).all()
+    return [_popular_course_to_dict(course) for course in courses]
+
+
+def get_popular_courses(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
+    """Lấy danh sách khóa học phổ biến nhất (ranking cached trong catalog cache)."""
+    if limit > POPULAR_CACHE_SIZE:
+        return _query_popular_courses(db, limit)
     
-    return [
-        {
-            "id": course.id,
-            "title": course.title,
-            "description": course.description,
-            "category": course.category,
-            "difficulty_level": course.difficulty_level,
-            "thumbnail_url": course.thumbnail_url,
-            "enrollment_count": course.enrollment_count,
-            "average_rating": course.average_rating
-        }
-        for course in courses
-    ]
+    key = catalog_cache.versioned_key((COURSES,), _POPULAR_CACHE_KEY)
+    courses = catalog_cache.get(key)
+    if courses is None:
+        courses = _query_popular_courses(db, POPULAR_CACHE_SIZE)
+        catalog_cache.set(key, courses)
+    return [dict(course) for course in courses[:limit]]
+
+
+async def get_popular_courses_async(db: AsyncSession, limit: int = 10) -> List[Dict[str, Any]]:
+    """Như get_popular_courses nhưng query qua AsyncSession."""
+    if limit > POPULAR_CACHE_SIZE:
+        return await _query_popular_courses_async(db, limit)
+    
+    key = catalog_cache.versioned_key((COURSES,), _POPULAR_CACHE_KEY)
+    courses = catalog_cache.get(key)
+    if courses is None:
+        courses = await _query_popular_courses_async(db, POPULAR_CACHE_SIZE)
+        catalog_cache.set(key, courses)
+    return [dict(course) for course in courses[:limit]]
 
 
 def get_popular_resources(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
@@ -111,76 +188,320 @@ def get_popular_resources(db: Session, limit: int = 10) -> List[Dict[str, Any]]:
     ]
 
 
+def _user_ratings_statement(user_id: int):
+    """Select ratings khóa học (Interaction) của user."""
+    return (
+        select(Interaction.item_id, Interaction.rating)
+        .where(
+            and_(
+                Interaction.user_id == user_id,
+                Interaction.item_type == "course",
+                Interaction.rating != None
+            )
+        )
+    )
+
+
+def _enrolled_ids_statement(user_id: int):
+    """Select course IDs user đã đăng ký."""
+    return select(UserCourseProgress.course_id).where(UserCourseProgress.user_id == user_id)
+
+
+def _fold_in_new_user(
+    user_id: int, db: Session, bundle: LoadedModel
+) -> Optional[Tuple[np.ndarray, float]]:
+    """
+    Ước lượng user vector cho user chưa có trong model từ các ratings
+    (Interaction) của họ. Returns None nếu không đủ ratings.
+    """
+    return _fold_in_ratings(bundle, db.execute(_user_ratings_statement(user_id)).all())
+
+
+def _fold_in_ratings(
+    bundle: LoadedModel, ratings: List[Tuple[int, float]]
+) -> Optional[Tuple[np.ndarray, float]]:
+    """Fold-in từ các cặp (course ID, rating); None nếu không đủ ratings đã biết."""
+    if not ratings:
+        return None
+    
+    item_ids, values = zip(*ratings)
+    item_indices = bundle.mappings["item_encoder"].encode(item_ids)
+    known = item_indices >= 0
+    if known.sum() < MIN_FOLD_IN_RATINGS:
+        return None
+    
+    return bundle.engine.fold_in_user(
+        item_indices[known], np.array(values, dtype=np.float64)[known]
+    )
+
+
 def get_personalized_recommendations(
     user_id: int, db: Session, limit: int = 10
 ) -> List[Dict[str, Any]]:
-    """Lấy personalized recommendations cho user."""
+    """
+    Lấy personalized recommendations cho user.
+
+    Top RERANK_POOL_SIZE courses theo predicted rating được re-rank (MMR
+    theo category/difficulty) để lấy limit courses đa dạng hơn.
+    """
     
-    model, mappings = _load_model()
+    # Hold one bundle for the whole request (safe across hot reloads)
+    bundle = model_registry.get()
     
-    if model is None or mappings is None:
+    if bundle is None:
         print("⚠️ Model not available, falling back to popular courses")
         return get_popular_courses(db, limit)
     
     try:
+        # Cold start: fold the user's ratings into the frozen item factors
+        user_idx = bundle.mappings["user_encoder"].get(user_id)
+        folded_user = None
+        if user_idx is None:
+            folded_user = _fold_in_new_user(user_id, db, bundle)
+            if folded_user is None:
+                print(f"⚠️ User {user_id} not in training data, falling back")
+                return get_popular_courses(db, limit)
+        
         # Get user enrolled courses
-        enrolled_courses = (
-            db.query(UserCourseProgress.course_id)
-            .filter(UserCourseProgress.user_id == user_id)
-            .all()
+        enrolled_ids = db.scalars(_enrolled_ids_statement(user_id)).all()
+        
+        return _score_personalized(
+            bundle, user_idx, folded_user, enrolled_ids, get_catalog_snapshot(db), limit
         )
-        enrolled_ids = {course_id for course_id, in enrolled_courses}
-        
-        # Get all available courses
-        all_courses = (
-            db.query(Course)
-            .filter(
-                and_(
-                    Course.is_active == True,
-                    Course.is_published == True
-                )
-            )
-            .all()
+        
+    except Exception as e:
+        print(f"❌ Error in personalized recommendations: {e}")
+        return get_popular_courses(db, limit)
+
+
+def _score_personalized(
+    bundle: LoadedModel,
+    user_idx: Optional[int],
+    folded_user: Optional[Tuple[np.ndarray, float]],
+    enrolled_ids: List[int],
+    catalog: CatalogSnapshot,
+    limit: int,
+) -> List[Dict[str, Any]]:
+    """Phần không truy cập database của personalized recommendations."""
+    engine = bundle.engine
+    item_encoder = bundle.mappings["item_encoder"]
+    enrolled_ids = np.asarray(enrolled_ids, dtype=np.int64)
+    
+    # Candidate mask: courses available (catalog snapshot) and not enrolled yet
+    candidate_mask = catalog.candidate_mask(item_encoder, engine.n_items)
+    enrolled_indices = item_encoder.encode(enrolled_ids)
+    candidate_mask[enrolled_indices[enrolled_indices >= 0]] = False
+    
+    if folded_user is not None:
+        user_vector, user_bias = folded_user
+        item_indices, scores = engine.top_k_vector(
+            user_vector, user_bias, max(limit, RERANK_POOL_SIZE), candidate_mask
         )
+    else:
+        # Serve from precomputed store, live scoring only on a miss
+        recommendations = _recommendations_from_store(
+            bundle, user_idx, catalog, enrolled_ids, limit
+        )
+        if recommendations is not None:
+            return recommendations
         
-        # Get user ID in model space
-        user_encoder = mappings["user_encoder"]
-        user_decoder = mappings["user_decoder"]
-        item_encoder = mappings["item_encoder"]
-        item_decoder = mappings["item_decoder"]
-        
-        # Get user index in model
-        if user_id not in user_encoder:
-            print(f"⚠️ User {user_id} not in training data, falling back")
-            return get_popular_courses(db, limit)
-        
-        user_idx = user_encoder[user_id]
-        
-        # Predict ratings for all courses user hasn't enrolled
-        recommendations = []
-        
-        for course in all_courses:
-            if course.id not in enrolled_ids and course.id in item_encoder:
-                item_idx = item_encoder[course.id]
-                
-                # Predict rating using SVD model
-                prediction = model.predict(user_idx, item_idx)
-                predicted_rating = prediction.est
-                
-                recommendations.append({
-                    "id": course.id,
-                    "title": course.title,
-                    "description": course.description,
-                    "category": course.category,
-                    "difficulty_level": course.difficulty_level,
-                    "thumbnail_url": course.thumbnail_url,
-                    "predicted_rating": round(predicted_rating, 2)
-                })
-        
-        # Sort by predicted rating and return top N
-        recommendations.sort(key=lambda x: x["predicted_rating"], reverse=True)
-        return recommendations[:limit]
+        # Score whole catalog in one pass, keep the re-ranking pool
+        item_indices, scores = engine.top_k(
+            user_idx, max(limit, RERANK_POOL_SIZE), candidate_mask
+        )
+    
+    # Re-rank the pool, hydrate only the chosen rows
+    return _rerank(catalog, item_encoder.decode(item_indices), scores, limit)
+
+
+async def get_personalized_recommendations_async(
+    user_id: int, db: AsyncSession, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """
+    Như get_personalized_recommendations nhưng query qua AsyncSession.
+
+    Chỉ các truy vấn được await; scoring (vài ms NumPy) chạy trực tiếp
+    trên event loop.
+    """
+    bundle = model_registry.get()
+    
+    if bundle is None:
+        print("⚠️ Model not available, falling back to popular courses")
+        return await get_popular_courses_async(db, limit)
+    
+    try:
+        user_idx = bundle.mappings["user_encoder"].get(user_id)
+        folded_user = None
+        if user_idx is None:
+            ratings = (await db.execute(_user_ratings_statement(user_id))).all()
+            folded_user = _fold_in_ratings(bundle, ratings)
+            if folded_user is None:
+                print(f"⚠️ User {user_id} not in training data, falling back")
+                return await get_popular_courses_async(db, limit)
+        
+        enrolled_ids = (await db.scalars(_enrolled_ids_statement(user_id))).all()
+        catalog = await get_catalog_snapshot_async(db)
+        
+        return _score_personalized(bundle, user_idx, folded_user, enrolled_ids, catalog, limit)
         
     except Exception as e:
         print(f"❌ Error in personalized recommendations: {e}")
-        return get_popular_courses(db, limit)
\ No newline at end of file
+        return await get_popular_courses_async(db, limit)
+
+
+def get_batch_recommendations(
+    user_ids: List[int], db: Session, limit: int = 10
+) -> Dict[int, List[Dict[str, Any]]]:
+    """
+    Lấy personalized recommendations cho nhiều users trong một lần gọi.
+
+    Enrollments của tất cả users được lấy bằng một query, và scoring
+    chạy theo block users x items thay vì từng user một.
+    """
+    user_ids = list(dict.fromkeys(user_ids))
+    if not user_ids:
+        return {}
+
+    # Hold one bundle for the whole request (safe across hot reloads)
+    bundle = model_registry.get()
+    
+    if bundle is None:
+        print("⚠️ Model not available, falling back to popular courses")
+        popular = get_popular_courses(db, limit)
+        return {user_id: popular for user_id in user_ids}
+    
+    try:
+        engine = bundle.engine
+        mappings = bundle.mappings
+        item_encoder = mappings["item_encoder"]
+        
+        all_user_indices = mappings["user_encoder"].encode(user_ids)
+        known_users = [u for u, idx in zip(user_ids, all_user_indices) if idx >= 0]
+        user_indices = all_user_indices[all_user_indices >= 0]
+        results: Dict[int, List[Dict[str, Any]]] = {}
+        
+        # Users not in training data share one popular list
+        unknown_users = [u for u, idx in zip(user_ids, all_user_indices) if idx < 0]
+        if unknown_users:
+            popular = get_popular_courses(db, limit)
+            for user_id in unknown_users:
+                results[user_id] = popular
+        
+        if not known_users:
+            return results
+        
+        # Available courses from the catalog snapshot
+        catalog = get_catalog_snapshot(db)
+        candidate_mask = catalog.candidate_mask(item_encoder, engine.n_items)
+        
+        # Get enrolled courses of every user in one query
+        row_of_user = {user_id: row for row, user_id in enumerate(known_users)}
+        enrollments = (
+            db.query(UserCourseProgress.user_id, UserCourseProgress.course_id)
+            .filter(UserCourseProgress.user_id.in_(known_users))
+            .all()
+        )
+        exclude_rows = np.array(
+            [row_of_user[user_id] for user_id, _ in enrollments], dtype=np.int64
+        )
+        exclude_items = item_encoder.encode([course_id for _, course_id in enrollments])
+        known = exclude_items >= 0
+        
+        blocks = engine.top_k_batch(
+            user_indices,
+            max(limit, RERANK_POOL_SIZE),
+            candidate_mask,
+            exclude_rows[known],
+            exclude_items[known],
+        )
+        for start, item_indices, scores in blocks:
+            course_ids = item_encoder.decode(item_indices)
+            for offset in range(item_indices.shape[0]):
+                results[known_users[start + offset]] = _rerank(
+                    catalog, course_ids[offset], scores[offset], limit
+                )
+        
+        return results
+        
+    except Exception as e:
+        print(f"❌ Error in batch recommendations: {e}")
+        popular = get_popular_courses(db, limit)
+        return {user_id: popular for user_id in user_ids}
+
+
+def _similar_neighbors(
+    bundle: Optional[LoadedModel], course_id: int
+) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Course IDs và scores của mọi neighbors đã lưu; None nếu cần fallback
+    sang popular.
+
+    Lấy cả row (tối đa n_neighbors lúc build) để sau khi lọc courses ẩn
+    hoặc chưa publish vẫn còn đủ limit nếu index có đủ.
+    """
+    if bundle is None or bundle.similarity is None:
+        print("⚠️ Similarity index not available, falling back to popular courses")
+        return None
+    
+    item_encoder = bundle.mappings["item_encoder"]
+    item_idx = item_encoder.get(course_id)
+    if item_idx is None:
+        return None
+    
+    # Precomputed neighbors: a single row lookup
+    neighbors, scores = bundle.similarity.similar(item_idx)
+    return item_encoder.decode(neighbors), scores
+
+
+def _hydrate_similar(
+    catalog: CatalogSnapshot, course_ids: np.ndarray, scores: np.ndarray, limit: int
+) -> List[Dict[str, Any]]:
+    """Only hydrate the neighbor rows that are still available."""
+    positions = catalog.positions(course_ids)
+    available = positions >= 0
+    
+    similar = []
+    for position, score in zip(positions[available][:limit], scores[available][:limit]):
+        course = catalog.record(position)
+        course["similarity"] = round(float(score), 4)
+        similar.append(course)
+    return similar
+
+
+def _exclude_course(courses: List[Dict[str, Any]], course_id: int, limit: int) -> List[Dict[str, Any]]:
+    return [c for c in courses if c["id"] != course_id][:limit]
+
+
+def get_similar_courses(
+    course_id: int, db: Session, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """Lấy các khóa học tương tự (item-item similarity trên SVD item factors)."""
+    
+    try:
+        neighbors = _similar_neighbors(model_registry.get(), course_id)
+        if neighbors is None:
+            return _exclude_course(get_popular_courses(db, limit + 1), course_id, limit)
+        
+        return _hydrate_similar(get_catalog_snapshot(db), *neighbors, limit)
+        
+    except Exception as e:
+        print(f"❌ Error in similar courses: {e}")
+        return get_popular_courses(db, limit)
+
+
+async def get_similar_courses_async(
+    course_id: int, db: AsyncSession, limit: int = 10
+) -> List[Dict[str, Any]]:
+    """Như get_similar_courses nhưng query qua AsyncSession."""
+    
+    try:
+        neighbors = _similar_neighbors(model_registry.get(), course_id)
+        if neighbors is None:
+            popular = await get_popular_courses_async(db, limit + 1)
+            return _exclude_course(popular, course_id, limit)
+        
+        return _hydrate_similar(await get_catalog_snapshot_async(db), *neighbors, limit)
+        
+    except Exception as e:
+        print(f"❌ Error in similar courses: {e}")
+        return await get_popular_courses_async(db, limit)
@@ -0,0 +1,81 @@
+"""Tests cho HTTP conditional responses (api/conditional.py)."""
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from fastapi import Request
+
+from smartlearn.api.conditional import (
+    PUBLIC_CATALOG_CACHE_CONTROL, conditional_json, rows_etag, rows_last_modified
+)
+
+UPDATED_AT = datetime(2024, 5, 1, 12, 30, 15, 500000, tzinfo=timezone.utc)
+
+
+def _request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": raw})
+
+
+def _rows():
+    return [SimpleNamespace(id=1, updated_at=UPDATED_AT), SimpleNamespace(id=2, updated_at=None)]
+
+
+def _build():
+    raise AssertionError("body must not be built for 304")
+
+
+def test_returns_body_with_validators():
+    etag = rows_etag(_rows())
+    response = conditional_json(_request(), etag, lambda: {"ok": True}, rows_last_modified(_rows()))
+
+    assert response.status_code == 200
+    assert response.body == b'{"ok":true}'
+    assert response.headers["etag"] == etag
+    assert response.headers["cache-control"] == PUBLIC_CATALOG_CACHE_CONTROL
+    assert response.headers["last-modified"] == "Wed, 01 May 2024 12:30:15 GMT"
+
+
+def test_matching_if_none_match_returns_304():
+    etag = rows_etag(_rows())
+    strong = etag[2:]
+
+    response = conditional_json(_request(if_none_match=f'"other", {strong}'), etag, _build)
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+
+def test_if_modified_since_ignored_when_etag_mismatches():
+    response = conditional_json(
+        _request(if_none_match='W/"other"', if_modified_since="Wed, 01 May 2024 12:30:15 GMT"),
+        rows_etag(_rows()),
+        lambda: [],
+        UPDATED_AT,
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("since, expected", [
+    ("Wed, 01 May 2024 12:30:15 GMT", 304),
+    ("Wed, 01 May 2024 12:30:14 GMT", 200),
+    ("not a date", 200),
+])
+def test_if_modified_since(since, expected):
+    response = conditional_json(
+        _request(if_modified_since=since), rows_etag(_rows()), lambda: [], UPDATED_AT
+    )
+    assert response.status_code == expected
+
+
+def test_etag_changes_with_rows_and_extra():
+    rows = _rows()
+    etag = rows_etag(rows)
+
+    assert rows_etag(rows, "cursor") != etag
+    rows[1].updated_at = UPDATED_AT
+    assert rows_etag(rows) != etag
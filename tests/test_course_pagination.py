@@ -0,0 +1,55 @@
+"""Tests cho keyset pagination cursors (course_pagination.py)."""
+
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("fastapi")
+pytest.importorskip("sqlalchemy")
+
+from fastapi import HTTPException
+
+from smartlearn.services.course_pagination import build_page, decode_cursor, encode_cursor
+
+
+def _course(course_id, created_at=datetime(2024, 5, 1, 12, 30), enrollment_count=7):
+    return SimpleNamespace(id=course_id, created_at=created_at, enrollment_count=enrollment_count)
+
+
+def test_cursor_roundtrip_newest():
+    course = _course(42)
+    cursor = encode_cursor("newest", course)
+
+    assert "=" not in cursor
+    assert decode_cursor("newest", cursor) == (course.created_at, 42)
+
+
+def test_cursor_roundtrip_popular():
+    cursor = encode_cursor("popular", _course(3, enrollment_count=120))
+    assert decode_cursor("popular", cursor) == (120, 3)
+
+
+@pytest.mark.parametrize("cursor", ["not-base64!", "e30", ""])
+def test_decode_rejects_garbage(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("newest", cursor)
+    assert error.value.status_code == 400
+
+
+def test_decode_rejects_cursor_of_other_sort():
+    cursor = encode_cursor("popular", _course(3))
+    with pytest.raises(HTTPException) as error:
+        decode_cursor("newest", cursor)
+    assert error.value.status_code == 400
+
+
+def test_build_page_sets_next_cursor_only_when_more_rows():
+    courses = [_course(i) for i in (5, 4, 3)]
+
+    page, next_cursor = build_page("newest", courses, limit=3)
+    assert page == courses and next_cursor is None
+
+    page, next_cursor = build_page("newest", courses, limit=2)
+    assert [c.id for c in page] == [5, 4]
+    assert decode_cursor("newest", next_cursor)[1] == 4
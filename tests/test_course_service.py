@@ -0,0 +1,64 @@
+"""Tests cho các thao tác ghi course đi sau read-through cache (course_service.py)."""
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("smartlearn.core.database")
+pytest.importorskip("smartlearn.services.course_service")
+
+from sqlalchemy import create_engine, update
+from sqlalchemy.orm import sessionmaker
+
+from smartlearn.core.database import Base
+from smartlearn.models.course import Course
+from smartlearn.services.catalog_cache import catalog_cache
+from smartlearn.services.course_service import CourseService
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    catalog_cache.clear()
+    yield sessionmaker(bind=engine)
+    catalog_cache.clear()
+    engine.dispose()
+
+
+@pytest.fixture
+def stale_course_id(session_factory):
+    """Course có bản cached enrollment_count=0 trong khi DB đã là 5."""
+    with session_factory() as db:
+        course = Course(title="NumPy", is_published=True, enrollment_count=0)
+        db.add(course)
+        db.commit()
+        course_id = course.id
+
+        assert CourseService.get_course(db, course_id).enrollment_count == 0
+
+    # Worker khác ghi enrollments; enrollment_count không invalidate cache
+    with session_factory() as db:
+        db.execute(update(Course).where(Course.id == course_id).values(enrollment_count=5))
+        db.commit()
+
+    return course_id
+
+
+def test_increment_enrollment_after_cached_read(session_factory, stale_course_id):
+    with session_factory() as db:
+        assert CourseService.get_course(db, stale_course_id).enrollment_count == 0
+
+        CourseService.increment_enrollment(db, stale_course_id)
+
+    with session_factory() as db:
+        assert db.get(Course, stale_course_id).enrollment_count == 6
+
+
+def test_load_course_replaces_cached_copy(session_factory, stale_course_id):
+    with session_factory() as db:
+        cached = CourseService.get_course(db, stale_course_id)
+
+        course = CourseService._load_course(db, stale_course_id)
+
+        assert course is cached
+        assert course.enrollment_count == 5
@@ -0,0 +1,38 @@
+"""Tests cho train/test split (data_split.py)."""
+
+import numpy as np
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("surprise")
+
+from data_split import leave_last_n_split, random_split
+
+
+def test_leave_last_n_holds_out_latest_per_user():
+    user_ids = np.array([1, 2, 1, 1, 2, 2, 3])
+    timestamps = np.array([10, 5, 30, 20, 7, 6, 1])
+
+    test = leave_last_n_split(user_ids, timestamps, n=1)
+
+    # User 1: ts 30, user 2: ts 7; user 3 chỉ có một interaction
+    assert test.tolist() == [False, False, True, False, True, False, False]
+
+
+def test_leave_last_n_keeps_small_users_in_train():
+    user_ids = np.array([1, 1, 2, 2, 2])
+    timestamps = np.array([1, 2, 1, 2, 3])
+
+    test = leave_last_n_split(user_ids, timestamps, n=2)
+
+    assert test.tolist() == [False, False, False, True, True]
+
+
+def test_leave_last_n_empty():
+    assert leave_last_n_split(np.array([]), np.array([])).shape == (0,)
+
+
+def test_random_split_size_and_seed():
+    test = random_split(100, test_size=0.2, seed=7)
+    assert test.sum() == 20
+    assert np.array_equal(test, random_split(100, test_size=0.2, seed=7))
@@ -0,0 +1,57 @@
+"""Tests cho IdEncoder (map raw IDs <-> indices bằng int64 arrays)."""
+
+import numpy as np
+
+from smartlearn.services.id_encoder import IdEncoder, load_mappings, save_mappings
+
+
+def test_from_ids_dedupes_and_sorts():
+    encoder = IdEncoder.from_ids([30, 10, 20, 10])
+    assert encoder.ids.tolist() == [10, 20, 30]
+    assert encoder.encode([20, 10, 30]).tolist() == [1, 0, 2]
+
+
+def test_encode_unknown_ids_returns_minus_one():
+    encoder = IdEncoder.from_ids([10, 20, 30])
+    assert encoder.encode([5, 20, 25, 99]).tolist() == [-1, 1, -1, -1]
+    assert encoder.get(25) is None
+    assert 20 in encoder and 25 not in encoder
+
+
+def test_encode_on_empty_encoder():
+    encoder = IdEncoder(np.array([], dtype=np.int64))
+    assert encoder.encode([1, 2]).tolist() == [-1, -1]
+
+
+def test_extend_keeps_existing_indices():
+    encoder = IdEncoder.from_ids([10, 20, 30])
+    extended, added = encoder.extend([5, 20, 40, 5])
+
+    assert added == 2
+    assert extended.encode([10, 20, 30]).tolist() == [0, 1, 2]
+    assert extended.encode([5, 40]).tolist() == [3, 4]
+    assert extended.decode([3, 4]).tolist() == [5, 40]
+
+
+def test_extend_without_new_ids_returns_same_encoder():
+    encoder = IdEncoder.from_ids([10, 20])
+    extended, added = encoder.extend([20, 10])
+    assert extended is encoder and added == 0
+
+
+def test_encode_decode_roundtrip_unsorted_ids():
+    encoder = IdEncoder(np.array([7, 3, 9, 1]))
+    raw = np.array([1, 9, 3, 7])
+    assert encoder.decode(encoder.encode(raw)).tolist() == raw.tolist()
+
+
+def test_save_and_load_mappings(tmp_path):
+    mappings = {
+        "user_encoder": IdEncoder.from_ids([1, 2, 3]),
+        "item_encoder": IdEncoder(np.array([30, 10])),
+    }
+    save_mappings(mappings, str(tmp_path))
+    loaded = load_mappings(str(tmp_path))
+
+    assert loaded["user_encoder"].ids.tolist() == [1, 2, 3]
+    assert loaded["item_encoder"].encode([10, 30]).tolist() == [1, 0]
@@ -0,0 +1,48 @@
+"""Tests cho cửa sổ checkpoint của incremental_update.py."""
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("smartlearn.core.database")
+
+from incremental_update import next_checkpoint, select_unapplied
+
+T = pd.Timestamp("2024-05-01 12:00", tz="UTC")
+
+
+def _window(rows, since):
+    df = pd.DataFrame(rows, columns=["id", "created_at"])
+    return df[df["created_at"] > since].reset_index(drop=True)
+
+
+def _minutes(n):
+    return T + pd.Timedelta(minutes=n)
+
+
+def test_two_runs_within_overlap_apply_each_rating_once():
+    # id 1 đã export; id 2 commit trễ (created_at trước export, không có trong export)
+    db = [(1, _minutes(-5)), (2, _minutes(-3)), (3, _minutes(2))]
+    checkpoint, applied_ids = T, [1]
+
+    window = _window(db, checkpoint - pd.Timedelta(minutes=10))
+    first = select_unapplied(window, checkpoint, applied_ids)
+    assert sorted(first["id"]) == [2, 3]
+    checkpoint, applied_ids = next_checkpoint(window, first, checkpoint)
+    assert checkpoint == _minutes(2)
+    assert applied_ids == [1, 2, 3]
+
+    # Lần chạy sau 5 phút: id 5 commit trễ với created_at trước checkpoint
+    db += [(4, _minutes(6)), (5, _minutes(1))]
+    window = _window(db, checkpoint - pd.Timedelta(minutes=10))
+    second = select_unapplied(window, checkpoint, applied_ids)
+    assert sorted(second["id"]) == [4, 5]
+    checkpoint, applied_ids = next_checkpoint(window, second, checkpoint)
+    assert checkpoint == _minutes(6)
+    assert applied_ids == [2, 3, 4, 5]
+
+
+def test_manifest_without_applied_ids_skips_exported_range():
+    window = _window([(1, _minutes(-5)), (2, _minutes(1))], T - pd.Timedelta(minutes=10))
+    unapplied = select_unapplied(window, T, None)
+    assert unapplied["id"].tolist() == [2]
+    assert next_checkpoint(window, unapplied, T)[1] == [1, 2]
@@ -0,0 +1,26 @@
+"""Tests cho ItemSimilarityIndex."""
+
+import numpy as np
+
+from smartlearn.services.item_similarity import ItemSimilarityIndex, build_similarity_index
+
+
+def test_similar_without_k_returns_whole_row():
+    rng = np.random.default_rng(0)
+    index = build_similarity_index(rng.normal(size=(30, 4)).astype(np.float32), n_neighbors=10)
+
+    neighbors, scores = index.similar(3)
+
+    assert len(neighbors) == 10
+    assert 3 not in neighbors.tolist()
+    assert np.all(np.diff(scores) <= 1e-6)
+    assert index.similar(3, 4)[0].tolist() == neighbors[:4].tolist()
+
+
+def test_similar_drops_padding():
+    index = ItemSimilarityIndex(
+        np.array([[2, 1, -1, -1]]), np.array([[0.9, 0.5, np.nan, np.nan]], dtype=np.float32)
+    )
+    neighbors, scores = index.similar(0)
+    assert neighbors.tolist() == [2, 1]
+    assert scores.tolist() == [np.float32(0.9), np.float32(0.5)]
@@ -0,0 +1,58 @@
+"""Tests cho NumPy ALS trainer (mf_trainer.py)."""
+
+import numpy as np
+
+from mf_trainer import _solve_rows, build_csr, train_als
+
+
+def _ratings(n_users=30, n_items=20, density=0.5, seed=0):
+    rng = np.random.default_rng(seed)
+    mask = rng.random((n_users, n_items)) < density
+    users, items = np.nonzero(mask)
+    truth = rng.normal(size=(n_users, 3)) @ rng.normal(size=(3, n_items))
+    ratings = np.clip(3.0 + truth[users, items], 1.0, 5.0).astype(np.float32)
+    return users, items, ratings
+
+
+def test_build_csr_groups_ratings_by_row():
+    indptr, cols, values = build_csr(
+        np.array([2, 0, 2, 1]), np.array([5, 6, 7, 8]), np.array([1.0, 2.0, 3.0, 4.0]), 4
+    )
+    assert indptr.tolist() == [0, 1, 2, 4, 4]
+    assert cols.tolist() == [6, 8, 5, 7]
+    assert values.tolist() == [2.0, 4.0, 1.0, 3.0]
+
+
+def test_solve_rows_matches_per_row_ridge():
+    rng = np.random.default_rng(1)
+    users, items, ratings = _ratings()
+    # Một row không có rating
+    keep = users != 3
+    indptr, cols, values = build_csr(users[keep], items[keep], ratings[keep], 30)
+    features = rng.normal(size=(20, 5)).astype(np.float64)
+    reg = 0.1
+
+    # Batch nhỏ để đi qua nhiều batches của cùng một count
+    solution = _solve_rows(indptr, cols, values, features, reg, block_rows=2, block_ratings=16)
+
+    for row in range(30):
+        lo, hi = indptr[row], indptr[row + 1]
+        if hi == lo:
+            assert np.all(solution[row] == 0)
+            continue
+        F = features[cols[lo:hi]]
+        expected = np.linalg.solve(F.T @ F + reg * (hi - lo) * np.eye(5), F.T @ values[lo:hi])
+        np.testing.assert_allclose(solution[row], expected, rtol=1e-6, atol=1e-8)
+
+
+def test_train_als_fits_low_rank_ratings():
+    users, items, ratings = _ratings()
+    engine = train_als(
+        users, items, ratings, 31, 20, n_factors=5, n_epochs=20, reg=0.01, verbose=False
+    )
+
+    errors = engine.predict(users, items) - ratings
+    assert np.sqrt(np.mean(errors ** 2)) < 0.3
+    assert engine.user_factors.dtype == np.float32
+    # User không có rating: factors và bias bằng 0
+    assert np.all(engine.user_factors[30] == 0) and engine.user_bias[30] == 0
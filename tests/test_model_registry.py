@@ -0,0 +1,70 @@
+"""Tests cho load_version (model registry)."""
+
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from smartlearn.services.id_encoder import IdEncoder, save_mappings
+from smartlearn.services.model_registry import (
+    LEGACY_VERSION, create_version_dir, load_version, read_training_info, write_manifest
+)
+from smartlearn.services.recommendation_engine import ScoringEngine
+
+
+def _engine():
+    rng = np.random.default_rng(0)
+    return ScoringEngine(
+        rng.normal(size=(3, 2)).astype(np.float32),
+        rng.normal(size=(4, 2)).astype(np.float32),
+        np.zeros(3, dtype=np.float32),
+        np.zeros(4, dtype=np.float32),
+        global_mean=3.0,
+    )
+
+
+def _mappings():
+    return {"user_encoder": IdEncoder.from_ids([1, 2, 3]), "item_encoder": IdEncoder.from_ids([5, 6, 7, 8])}
+
+
+def test_load_version_reads_arrays(tmp_path):
+    version, path = create_version_dir(str(tmp_path))
+    _engine().save(path)
+    save_mappings(_mappings(), path)
+    write_manifest(path, {"rmse": 0.9})
+
+    bundle = load_version(version, str(tmp_path))
+
+    assert bundle.engine.n_users == 3
+    assert read_training_info(version, str(tmp_path)) == {"rmse": 0.9}
+    assert bundle.mappings["item_encoder"].encode([7]).tolist() == [2]
+
+
+def test_load_version_refuses_pickle_outside_legacy(tmp_path):
+    version, path = create_version_dir(str(tmp_path))
+    save_mappings(_mappings(), path)
+    with open(os.path.join(path, "svd_model.pkl"), "wb") as f:
+        pickle.dump({"not": "a model"}, f)
+
+    with pytest.raises(ValueError, match="corrupt"):
+        load_version(version, str(tmp_path))
+
+
+def test_version_without_manifest_is_corrupt(tmp_path):
+    version, path = create_version_dir(str(tmp_path))
+    _engine().save(path)
+    save_mappings(_mappings(), path)
+    with open(os.path.join(path, "training_info.pkl"), "wb") as f:
+        pickle.dump({"rmse": 0.9}, f)
+
+    with pytest.raises(ValueError, match="corrupt"):
+        read_training_info(version, str(tmp_path))
+    with pytest.raises(ValueError, match="corrupt"):
+        load_version(version, str(tmp_path))
+
+
+def test_legacy_training_info_pickle(tmp_path):
+    with open(os.path.join(tmp_path, "training_info.pkl"), "wb") as f:
+        pickle.dump({"rmse": 0.9}, f)
+    assert read_training_info(LEGACY_VERSION, str(tmp_path)) == {"rmse": 0.9}
@@ -0,0 +1,117 @@
+"""Tests cho denormalized progress counters (progress_counters.py)."""
+
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("sqlalchemy")
+pytest.importorskip("smartlearn.core.database")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from smartlearn.core.database import Base
+from smartlearn.models.course import Course
+from smartlearn.models.lesson import Lesson
+from smartlearn.models.user import User
+from smartlearn.models.user_course_progress import UserCourseProgress
+from smartlearn.models.user_lesson_progress import UserLessonProgress
+from smartlearn.services.progress_counters import (
+    adjust_completed_lessons, adjust_lesson_count, mark_lesson_completed, reconcile_counters
+)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(bind=engine)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def enrollment(db):
+    """Một user đăng ký một course có hai lessons, chưa hoàn thành lesson nào."""
+    user = User(email="learner@example.com", hashed_password="x", full_name="Learner")
+    course = Course(title="NumPy", lesson_count=2)
+    db.add_all([user, course])
+    db.flush()
+
+    lessons = [
+        Lesson(course_id=course.id, title=f"Lesson {i}", order_index=i) for i in (1, 2)
+    ]
+    db.add_all(lessons)
+    db.add(UserCourseProgress(user_id=user.id, course_id=course.id, completed_lessons=0))
+    db.flush()
+    db.add_all([
+        UserLessonProgress(user_id=user.id, lesson_id=lesson.id, completed=False)
+        for lesson in lessons
+    ])
+    db.commit()
+    return SimpleNamespace(user=user, course=course, lessons=lessons)
+
+
+def _counters(db, enrollment):
+    db.expire_all()
+    progress = (
+        db.query(UserCourseProgress)
+        .filter(
+            UserCourseProgress.user_id == enrollment.user.id,
+            UserCourseProgress.course_id == enrollment.course.id
+        )
+        .one()
+    )
+    course = db.get(Course, enrollment.course.id)
+    return course.lesson_count, progress.completed_lessons
+
+
+def test_mark_lesson_completed_changes_state_once(db, enrollment):
+    user_id, lesson_id = enrollment.user.id, enrollment.lessons[0].id
+
+    assert mark_lesson_completed(db, user_id, lesson_id, True)
+    # Request thứ hai (hoặc retry) không khớp row nào nên không cộng counter lần nữa
+    assert not mark_lesson_completed(db, user_id, lesson_id, True)
+
+    assert mark_lesson_completed(db, user_id, lesson_id, False)
+    assert not mark_lesson_completed(db, user_id, lesson_id, False)
+
+
+def test_mark_lesson_completed_without_progress_row(db, enrollment):
+    assert not mark_lesson_completed(db, enrollment.user.id, 999, True)
+
+
+def test_mark_lesson_completed_counts_any_matched_row():
+    # Rows trùng (user, lesson) cũ khớp nhiều hơn một row; vẫn là một lần đổi trạng thái
+    db = SimpleNamespace(execute=lambda statement: SimpleNamespace(rowcount=2))
+    assert mark_lesson_completed(db, 1, 1, True)
+
+
+def test_adjust_counters(db, enrollment):
+    adjust_lesson_count(db, enrollment.course.id, 1)
+    adjust_completed_lessons(db, enrollment.user.id, enrollment.course.id, 1)
+    adjust_completed_lessons(db, enrollment.user.id, enrollment.course.id, 1)
+    adjust_completed_lessons(db, enrollment.user.id, enrollment.course.id, -1)
+    db.commit()
+
+    assert _counters(db, enrollment) == (3, 1)
+
+
+def test_reconcile_fixes_only_drifted_rows(db, enrollment):
+    mark_lesson_completed(db, enrollment.user.id, enrollment.lessons[0].id, True)
+    db.commit()
+
+    # completed_lessons lệch (0 thay vì 1), lesson_count đúng
+    assert reconcile_counters(db) == {"lesson_count": 0, "completed_lessons": 1}
+    assert _counters(db, enrollment) == (2, 1)
+
+    adjust_lesson_count(db, enrollment.course.id, 5)
+    adjust_completed_lessons(db, enrollment.user.id, enrollment.course.id, -1)
+    db.commit()
+
+    assert reconcile_counters(db) == {"lesson_count": 1, "completed_lessons": 1}
+    assert _counters(db, enrollment) == (2, 1)
+    assert reconcile_counters(db) == {"lesson_count": 0, "completed_lessons": 0}
@@ -0,0 +1,107 @@
+"""Tests cho ScoringEngine (top-k scoring trên factor matrices)."""
+
+import numpy as np
+
+from smartlearn.services.recommendation_engine import ScoringEngine, mmr_rerank
+
+
+def _engine(n_users=6, n_items=40, n_factors=4, seed=0):
+    rng = np.random.default_rng(seed)
+    return ScoringEngine(
+        rng.normal(size=(n_users, n_factors)).astype(np.float32),
+        rng.normal(size=(n_items, n_factors)).astype(np.float32),
+        rng.normal(scale=0.1, size=n_users).astype(np.float32),
+        rng.normal(scale=0.1, size=n_items).astype(np.float32),
+        global_mean=3.5,
+        rating_scale=(-100.0, 100.0),
+    )
+
+
+def _brute_force(engine, user_idx):
+    return (
+        engine.global_mean
+        + engine.user_bias[user_idx]
+        + engine.item_bias
+        + engine.item_factors @ engine.user_factors[user_idx]
+    )
+
+
+def test_top_k_matches_brute_force_order():
+    engine = _engine()
+    expected = _brute_force(engine, 2)
+
+    items, scores = engine.top_k(2, 5)
+
+    np.testing.assert_array_equal(items, np.argsort(-expected, kind="stable")[:5])
+    np.testing.assert_allclose(scores, expected[items], rtol=1e-5)
+    assert np.all(np.diff(scores) <= 0)
+
+
+def test_top_k_respects_candidate_mask():
+    engine = _engine()
+    mask = np.zeros(engine.n_items, dtype=bool)
+    mask[[3, 7, 11]] = True
+
+    items, _ = engine.top_k(0, 10, candidate_mask=mask)
+
+    assert sorted(items.tolist()) == [3, 7, 11]
+
+
+def test_top_k_clips_to_rating_scale():
+    engine = _engine()
+    engine.rating_scale = (1.0, 5.0)
+
+    _, scores = engine.top_k(1, engine.n_items)
+
+    assert scores.min() >= 1.0 and scores.max() <= 5.0
+
+
+def test_top_k_batch_matches_single_user_and_excludes_items():
+    engine = _engine()
+    users = np.array([4, 0, 2])
+    exclude_rows = np.array([2, 0])
+    exclude_items = np.array([
+        engine.top_k(2, 1)[0][0],
+        engine.top_k(4, 1)[0][0],
+    ])
+
+    blocks = list(engine.top_k_batch(
+        users, 5, exclude_rows=exclude_rows, exclude_items=exclude_items, block_size=2
+    ))
+
+    assert [start for start, _, _ in blocks] == [0, 2]
+    items = np.vstack([block_items for _, block_items, _ in blocks])
+    for row, user_idx in enumerate(users):
+        mask = np.ones(engine.n_items, dtype=bool)
+        mask[exclude_items[exclude_rows == row]] = False
+        expected, _ = engine.top_k(user_idx, 5, candidate_mask=mask)
+        np.testing.assert_array_equal(items[row], expected)
+
+
+def test_mmr_without_diversity_keeps_score_order():
+    scores = np.array([0.2, 0.9, -np.inf, 0.5])
+    order = mmr_rerank(scores, np.zeros(4), np.zeros(4), k=3, diversity=0.0)
+    assert order.tolist() == [1, 3, 0]
+
+
+def test_mmr_promotes_other_category():
+    scores = np.array([1.0, 0.95, 0.5])
+    categories = np.array([0, 0, 1])
+    levels = np.full(3, -1)
+
+    order = mmr_rerank(scores, categories, levels, k=3, diversity=0.7)
+
+    assert order.tolist() == [0, 2, 1]
+
+
+def test_mmr_unknown_codes_are_not_similar():
+    scores = np.array([1.0, 0.95, 0.5])
+    unknown = np.full(3, -1)
+    order = mmr_rerank(scores, unknown, unknown, k=3, diversity=0.7)
+    assert order.tolist() == [0, 1, 2]
+
+
+def test_mmr_skips_invalid_candidates():
+    scores = np.array([-np.inf, 0.3, -np.inf])
+    order = mmr_rerank(scores, np.arange(3), np.arange(3), k=5)
+    assert order.tolist() == [1]